@@ -23,6 +23,15 @@ from src.models.Book import Book
 from src.models.UserBooks import UserBook
 from src.models.User import User
 from src.models.Video import Video
+from src.models.LibraryLocation import LibraryLocation
+from src.models.LibraryTile import LibraryTile
+from src.models.BibliocommonsRecord import BibliocommonsRecord
+from src.models.ScrapeJob import ScrapeJob
+from src.models.AvailabilityWatch import AvailabilityWatch
+from src.models.AvailabilitySnapshot import AvailabilitySnapshot
+from src.models.NotificationOutbox import NotificationOutbox
+from src.models.IngestJob import IngestJob
+from src.models.BookExtraction import BookExtraction
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
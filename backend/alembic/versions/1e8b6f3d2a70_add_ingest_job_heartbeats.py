@@ -0,0 +1,32 @@
+"""Add ingest_jobs.owner and heartbeat_at so only abandoned jobs are failed
+
+Revision ID: 1e8b6f3d2a70
+Revises: 7d4e2a9b5c31
+Create Date: 2026-10-17 23:48:09.615204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1e8b6f3d2a70'
+down_revision: Union[str, Sequence[str], None] = '7d4e2a9b5c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingest_jobs', sa.Column('owner', sa.Text(), nullable=True))
+    # Unfinished jobs from before the upgrade have no owner to heartbeat them and
+    # are failed once the stale window passes
+    op.add_column('ingest_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingest_jobs', 'heartbeat_at')
+    op.drop_column('ingest_jobs', 'owner')
@@ -0,0 +1,49 @@
+"""Add library directory tables
+
+Revision ID: 3b9e1f7c2a41
+Revises: 550ddff95b84
+Create Date: 2026-10-17 10:12:03.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e1f7c2a41'
+down_revision: Union[str, Sequence[str], None] = '550ddff95b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('library_locations',
+    sa.Column('osm_id', sa.Text(), nullable=False),
+    sa.Column('name', sa.Text(), nullable=False),
+    sa.Column('branch_name', sa.Text(), nullable=True),
+    sa.Column('latitude', sa.Float(), nullable=False),
+    sa.Column('longitude', sa.Float(), nullable=False),
+    sa.Column('library_id', sa.Text(), nullable=True),
+    sa.Column('address', sa.Text(), nullable=True),
+    sa.Column('city', sa.Text(), nullable=True),
+    sa.Column('tile', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('osm_id')
+    )
+    op.create_index(op.f('ix_library_locations_tile'), 'library_locations', ['tile'], unique=False)
+    op.create_table('library_tiles',
+    sa.Column('tile', sa.Text(), nullable=False),
+    sa.Column('library_count', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('tile')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('library_tiles')
+    op.drop_index(op.f('ix_library_locations_tile'), table_name='library_locations')
+    op.drop_table('library_locations')
@@ -0,0 +1,52 @@
+"""Add scrape jobs table
+
+Revision ID: 5f1a9c3e7b20
+Revises: c47e2b915d08
+Create Date: 2026-10-17 15:12:08.402771
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1a9c3e7b20'
+down_revision: Union[str, Sequence[str], None] = 'c47e2b915d08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('scrape_jobs',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('dedupe_key', sa.Text(), nullable=False),
+    sa.Column('library_id', sa.Text(), nullable=False),
+    sa.Column('isbn', sa.Text(), nullable=False),
+    sa.Column('status', sa.Text(), server_default='pending', nullable=False),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('lease_owner', sa.Text(), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_scrape_jobs_active_dedupe_key', 'scrape_jobs', ['dedupe_key'], unique=True,
+                    postgresql_where=sa.text("status IN ('pending', 'running')"))
+    op.create_index('ix_scrape_jobs_dedupe_key_completed_at', 'scrape_jobs', ['dedupe_key', 'completed_at'], unique=False)
+    op.create_index('ix_scrape_jobs_status_created_at', 'scrape_jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_scrape_jobs_status_created_at', table_name='scrape_jobs')
+    op.drop_index('ix_scrape_jobs_dedupe_key_completed_at', table_name='scrape_jobs')
+    op.drop_index('uq_scrape_jobs_active_dedupe_key', table_name='scrape_jobs',
+                  postgresql_where=sa.text("status IN ('pending', 'running')"))
+    op.drop_table('scrape_jobs')
@@ -0,0 +1,50 @@
+"""Make availability watches on any branch (NULL branch_name) unique too
+
+Revision ID: 7d4e2a9b5c31
+Revises: b6e04f2a9c13
+Create Date: 2026-10-17 23:05:41.220917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4e2a9b5c31'
+down_revision: Union[str, Sequence[str], None] = 'b6e04f2a9c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULLs never conflict in uq_availability_watches_target; fold existing
+    # any-branch duplicates into the oldest watch before indexing them
+    op.execute("""
+        WITH ranked AS (
+            SELECT watch_id,
+                   first_value(watch_id) OVER (
+                       PARTITION BY user_id, isbn, library_id ORDER BY created_at, watch_id
+                   ) AS keep_id
+            FROM availability_watches
+            WHERE branch_name IS NULL
+        ), moved AS (
+            UPDATE notification_outbox o SET watch_id = r.keep_id
+            FROM ranked r
+            WHERE o.watch_id = r.watch_id AND r.watch_id <> r.keep_id
+        )
+        DELETE FROM availability_watches w
+        USING ranked r
+        WHERE w.watch_id = r.watch_id AND r.watch_id <> r.keep_id
+    """)
+    op.create_index(
+        'uq_availability_watches_any_branch', 'availability_watches', ['user_id', 'isbn', 'library_id'],
+        unique=True, postgresql_where=sa.text('branch_name IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_availability_watches_any_branch', table_name='availability_watches')
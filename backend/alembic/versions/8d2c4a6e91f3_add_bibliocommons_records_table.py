@@ -0,0 +1,34 @@
+"""Add bibliocommons records table
+
+Revision ID: 8d2c4a6e91f3
+Revises: 3b9e1f7c2a41
+Create Date: 2026-10-17 11:02:45.730194
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2c4a6e91f3'
+down_revision: Union[str, Sequence[str], None] = '3b9e1f7c2a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bibliocommons_records',
+    sa.Column('library_id', sa.Text(), nullable=False),
+    sa.Column('isbn', sa.Text(), nullable=False),
+    sa.Column('record_id', sa.Text(), nullable=True),
+    sa.Column('checked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('library_id', 'isbn')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('bibliocommons_records')
@@ -0,0 +1,74 @@
+"""Add availability watch, snapshot and notification outbox tables
+
+Revision ID: a93d6e0f4c17
+Revises: 5f1a9c3e7b20
+Create Date: 2026-10-17 16:48:31.225914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93d6e0f4c17'
+down_revision: Union[str, Sequence[str], None] = '5f1a9c3e7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('availability_watches',
+    sa.Column('watch_id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('isbn', sa.Text(), nullable=False),
+    sa.Column('library_id', sa.Text(), nullable=False),
+    sa.Column('branch_name', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('watch_id'),
+    sa.UniqueConstraint('user_id', 'isbn', 'library_id', 'branch_name', name='uq_availability_watches_target')
+    )
+    op.create_index(op.f('ix_availability_watches_user_id'), 'availability_watches', ['user_id'], unique=False)
+    op.create_index('ix_availability_watches_library_id_isbn', 'availability_watches', ['library_id', 'isbn'], unique=False)
+    op.create_table('availability_snapshots',
+    sa.Column('library_id', sa.Text(), nullable=False),
+    sa.Column('isbn', sa.Text(), nullable=False),
+    sa.Column('is_available', sa.Boolean(), nullable=True),
+    sa.Column('available_locations', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('holds', sa.Integer(), nullable=True),
+    sa.Column('copies', sa.Integer(), nullable=True),
+    sa.Column('not_found', sa.Boolean(), nullable=True),
+    sa.Column('status_text', sa.Text(), nullable=True),
+    sa.Column('checked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('next_poll_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('library_id', 'isbn')
+    )
+    op.create_index(op.f('ix_availability_snapshots_next_poll_at'), 'availability_snapshots', ['next_poll_at'], unique=False)
+    op.create_table('notification_outbox',
+    sa.Column('notification_id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('watch_id', sa.UUID(), nullable=True),
+    sa.Column('kind', sa.Text(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['watch_id'], ['availability_watches.watch_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('notification_id')
+    )
+    op.create_index(op.f('ix_notification_outbox_user_id'), 'notification_outbox', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_notification_outbox_user_id'), table_name='notification_outbox')
+    op.drop_table('notification_outbox')
+    op.drop_index(op.f('ix_availability_snapshots_next_poll_at'), table_name='availability_snapshots')
+    op.drop_table('availability_snapshots')
+    op.drop_index('ix_availability_watches_library_id_isbn', table_name='availability_watches')
+    op.drop_index(op.f('ix_availability_watches_user_id'), table_name='availability_watches')
+    op.drop_table('availability_watches')
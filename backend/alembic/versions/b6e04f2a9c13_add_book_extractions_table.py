@@ -0,0 +1,36 @@
+"""Add book_extractions table caching Gemini book extraction per transcript
+
+Revision ID: b6e04f2a9c13
+Revises: f3a8d61c0b27
+Create Date: 2026-10-17 22:31:47.902316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e04f2a9c13'
+down_revision: Union[str, Sequence[str], None] = 'f3a8d61c0b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('book_extractions',
+    sa.Column('transcript_hash', sa.Text(), nullable=False),
+    sa.Column('prompt_version', sa.Text(), nullable=False),
+    sa.Column('model', sa.Text(), nullable=False),
+    sa.Column('books', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('transcript_hash', 'prompt_version', 'model')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('book_extractions')
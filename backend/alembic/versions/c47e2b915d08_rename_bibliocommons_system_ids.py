@@ -0,0 +1,43 @@
+"""Rename bibliocommons system ids to match biblioID.csv
+
+Revision ID: c47e2b915d08
+Revises: 8d2c4a6e91f3
+Create Date: 2026-10-17 13:40:12.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47e2b915d08'
+down_revision: Union[str, Sequence[str], None] = '8d2c4a6e91f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Before the registry, "bpl" meant Burnaby and "spl" Surrey (the only names that
+# mapped to them); in biblioID.csv those ids are Boston and Seattle.
+RENAMES = [("bpl", "burnaby"), ("coqlib", "coqlibrary"), ("spl", "surrey")]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for old, new in RENAMES:
+        op.execute(sa.text(
+            "UPDATE library_locations SET library_id = :new WHERE library_id = :old"
+        ).bindparams(old=old, new=new))
+    # Record ids are looked up on <library_id>.bibliocommons.com, so rows indexed under
+    # "bpl"/"spl" are Boston and Seattle records, not Burnaby and Surrey ones; drop them
+    # and let the new ids rebuild from their own catalogs on the next search
+    op.execute(sa.text("DELETE FROM bibliocommons_records WHERE library_id IN ('bpl', 'spl')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Index rows are left alone: they are rebuilt on demand either way
+    for old, new in RENAMES:
+        op.execute(sa.text(
+            "UPDATE library_locations SET library_id = :old WHERE library_id = :new"
+        ).bindparams(old=old, new=new))
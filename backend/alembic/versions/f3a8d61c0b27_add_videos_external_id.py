@@ -0,0 +1,36 @@
+"""Add videos.external_id so every URL variant of a video shares its transcript
+
+Revision ID: f3a8d61c0b27
+Revises: e2b7c5d19a84
+Create Date: 2026-10-17 21:40:12.508114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a8d61c0b27'
+down_revision: Union[str, Sequence[str], None] = 'e2b7c5d19a84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('videos', sa.Column('external_id', sa.Text(), nullable=True))
+    op.create_index(op.f('ix_videos_external_id'), 'videos', ['external_id'], unique=False)
+    # Full TikTok URLs already carry the ID; short links are filled in when next submitted
+    op.execute(r"""
+        UPDATE videos
+        SET external_id = (regexp_match(url, '/(video|photo)/([0-9]{8,})'))[2]
+        WHERE platform = 'tiktok' AND external_id IS NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_videos_external_id'), table_name='videos')
+    op.drop_column('videos', 'external_id')
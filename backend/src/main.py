@@ -4,7 +4,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .util.db import lifespan
-from .router import health_router, get_book_router, book_router, users_router, auth_router
+from .router import health_router, get_book_router, book_router, users_router, auth_router, watch_router
 
 # Ensure selector loop on Windows for psycopg async pool
 if os.name == "nt":
@@ -27,4 +27,5 @@ app.include_router(health_router.router)
 app.include_router(get_book_router.router)
 app.include_router(book_router.router)
 app.include_router(users_router.router)
-app.include_router(auth_router.router)
\ No newline at end of file
+app.include_router(auth_router.router)
+app.include_router(watch_router.router)
\ No newline at end of file
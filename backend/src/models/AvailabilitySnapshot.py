@@ -0,0 +1,20 @@
+from sqlalchemy import Boolean, Column, DateTime, Integer, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from .Base import Base
+
+
+class AvailabilitySnapshot(Base):
+    __tablename__ = "availability_snapshots"
+
+    # Last polled availability of one watched (system, ISBN) pair, shared by every watcher
+    library_id = Column(Text, primary_key=True)
+    isbn = Column(Text, primary_key=True)
+    is_available = Column(Boolean, nullable=True)
+    available_locations = Column(JSONB, nullable=True)
+    holds = Column(Integer, nullable=True)
+    copies = Column(Integer, nullable=True)
+    not_found = Column(Boolean, nullable=True)
+    status_text = Column(Text, nullable=True)
+    checked_at = Column(DateTime(timezone=True), nullable=True)  # NULL = never polled
+    next_poll_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
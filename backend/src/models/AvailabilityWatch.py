@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Text, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from .Base import Base
+
+
+class AvailabilityWatch(Base):
+    __tablename__ = "availability_watches"
+    __table_args__ = (
+        UniqueConstraint("user_id", "isbn", "library_id", "branch_name", name="uq_availability_watches_target"),
+        # NULLs are distinct in the constraint above, so any-branch watches need their own index
+        Index(
+            "uq_availability_watches_any_branch", "user_id", "isbn", "library_id", unique=True,
+            postgresql_where=text("branch_name IS NULL"),
+        ),
+        Index("ix_availability_watches_library_id_isbn", "library_id", "isbn"),
+    )
+
+    watch_id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    isbn = Column(Text, nullable=False)  # normalized ISBN-13
+    library_id = Column(Text, nullable=False)  # bibliocommons system
+    branch_name = Column(Text, nullable=True)  # NULL = any branch of the system
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
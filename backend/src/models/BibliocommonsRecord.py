@@ -0,0 +1,12 @@
+from sqlalchemy import Column, DateTime, Text
+from sqlalchemy.sql import func
+from .Base import Base
+
+
+class BibliocommonsRecord(Base):
+    __tablename__ = "bibliocommons_records"
+
+    library_id = Column(Text, primary_key=True)
+    isbn = Column(Text, primary_key=True)
+    record_id = Column(Text, nullable=True)  # NULL = searched, not in this catalog
+    checked_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
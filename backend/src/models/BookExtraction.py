@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from .Base import Base
+
+
+class BookExtraction(Base):
+    __tablename__ = "book_extractions"
+
+    # Books Gemini found in one transcript, for one version of the extraction prompt and one model
+    transcript_hash = Column(Text, primary_key=True)  # sha256 of the transcript text
+    prompt_version = Column(Text, primary_key=True)
+    model = Column(Text, primary_key=True)
+    books = Column(JSONB, nullable=False)  # [{"title", "author"}] as extracted
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Text, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+from .Base import Base
+
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    job_id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    url = Column(Text, nullable=False)
+    status = Column(Text, nullable=False, server_default="pending")  # pending | running | done | failed
+    stage = Column(Text, nullable=True)  # stage currently running
+    # [{"name", "status", "started_at", "finished_at", "duration_ms", "detail"}] in pipeline order
+    stages = Column(JSONB, nullable=False)
+    result = Column(JSONB, nullable=True)  # {"books": [...]} once done
+    error = Column(Text, nullable=True)
+    owner = Column(Text, nullable=True)  # node whose pool holds the job, queued or running
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Refreshed by the owner while the job is unfinished; a silent owner has gone away
+    heartbeat_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
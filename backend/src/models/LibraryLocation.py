@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Float, Text
+from sqlalchemy.sql import func
+from .Base import Base
+
+
+class LibraryLocation(Base):
+    __tablename__ = "library_locations"
+
+    osm_id = Column(Text, primary_key=True)  # e.g. "node/123456"
+    name = Column(Text, nullable=False)
+    branch_name = Column(Text, nullable=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    library_id = Column(Text, nullable=True)  # matched bibliocommons system, precomputed
+    address = Column(Text, nullable=True)
+    city = Column(Text, nullable=True)
+    tile = Column(Text, nullable=False, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, Integer, Text
+from .Base import Base
+
+
+class LibraryTile(Base):
+    __tablename__ = "library_tiles"
+
+    # Directory coverage: one row per grid tile that has been fetched from Overpass
+    tile = Column(Text, primary_key=True)
+    library_count = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
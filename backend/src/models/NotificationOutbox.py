@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Text, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+from .Base import Base
+
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+
+    notification_id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
+    watch_id = Column(
+        UUID(as_uuid=True), ForeignKey("availability_watches.watch_id", ondelete="CASCADE"), nullable=True
+    )
+    kind = Column(Text, nullable=False)  # became_available | no_longer_available | holds_changed
+    payload = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    delivered_at = Column(DateTime(timezone=True), nullable=True)  # NULL = not sent yet
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, DateTime, Index, Integer, Text, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+from .Base import Base
+
+
+class ScrapeJob(Base):
+    __tablename__ = "scrape_jobs"
+    __table_args__ = (
+        # At most one pending/running job per (system, ISBN) across the fleet
+        Index(
+            "uq_scrape_jobs_active_dedupe_key", "dedupe_key", unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+        Index("ix_scrape_jobs_dedupe_key_completed_at", "dedupe_key", "completed_at"),
+        Index("ix_scrape_jobs_status_created_at", "status", "created_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    dedupe_key = Column(Text, nullable=False)  # "<library_id>:<isbn13>" or "<library_id>:<isbn13>+<isbn13>..." (editions)
+    library_id = Column(Text, nullable=False)
+    isbn = Column(Text, nullable=False)
+    status = Column(Text, nullable=False, server_default="pending")  # pending | running | done | failed
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    lease_owner = Column(Text, nullable=True)  # node that holds the running job
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
@@ -10,5 +10,6 @@ class Video(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     platform = Column(Text, nullable=True)  # e.g. "tiktok", "youtube"
     url = Column(Text, nullable=False, unique=True)
+    external_id = Column(Text, nullable=True, index=True)  # platform's video ID, e.g. TikTok's numeric ID
     transcript = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
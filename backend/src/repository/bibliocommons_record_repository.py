@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+
+from ..models.BibliocommonsRecord import BibliocommonsRecord
+
+
+class BibliocommonsRecordRepository:
+    def get(self, db: Session, library_id: str, isbn: str) -> Optional[BibliocommonsRecord]:
+        return (
+            db.query(BibliocommonsRecord)
+            .filter(BibliocommonsRecord.library_id == library_id, BibliocommonsRecord.isbn == isbn)
+            .first()
+        )
+
+    def upsert(self, db: Session, library_id: str, isbn: str, record_id: Optional[str], checked_at: datetime) -> None:
+        db.merge(BibliocommonsRecord(library_id=library_id, isbn=isbn, record_id=record_id, checked_at=checked_at))
+        db.commit()
+
+    def delete(self, db: Session, library_id: str, isbn: str) -> None:
+        db.query(BibliocommonsRecord).filter(
+            BibliocommonsRecord.library_id == library_id, BibliocommonsRecord.isbn == isbn
+        ).delete()
+        db.commit()
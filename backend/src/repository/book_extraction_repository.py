@@ -0,0 +1,23 @@
+from typing import Dict, List, Optional, Set
+from sqlalchemy.orm import Session
+
+from ..models.BookExtraction import BookExtraction
+
+
+class BookExtractionRepository:
+    def get(self, db: Session, transcript_hash: str, prompt_version: str, model: str) -> Optional[List[Dict]]:
+        row = db.get(BookExtraction, (transcript_hash, prompt_version, model))
+        return [dict(book) for book in row.books] if row else None
+
+    def save(self, db: Session, transcript_hash: str, prompt_version: str, model: str, books: List[Dict]) -> None:
+        db.merge(BookExtraction(
+            transcript_hash=transcript_hash, prompt_version=prompt_version, model=model, books=books,
+        ))
+        db.commit()
+
+    def hashes(self, db: Session, prompt_version: str, model: str) -> Set[str]:
+        """Transcript hashes already extracted with this prompt version and model"""
+        rows = db.query(BookExtraction.transcript_hash).filter(
+            BookExtraction.prompt_version == prompt_version, BookExtraction.model == model
+        ).all()
+        return {row.transcript_hash for row in rows}
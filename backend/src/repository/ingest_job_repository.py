@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
+from sqlalchemy.orm import Session
+
+from ..models.IngestJob import IngestJob
+
+
+class IngestJobRepository:
+    def create(self, db: Session, user_id: UUID, url: str, stages: List[Dict], owner: str) -> IngestJob:
+        job = IngestJob(user_id=user_id, url=url, stages=stages, owner=owner)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def get(self, db: Session, job_id: UUID, user_id: Optional[UUID] = None) -> Optional[IngestJob]:
+        query = db.query(IngestJob).filter(IngestJob.job_id == job_id)
+        if user_id is not None:
+            query = query.filter(IngestJob.user_id == user_id)
+        return query.first()
+
+    def list_for_user(self, db: Session, user_id: UUID, limit: int = 20) -> List[IngestJob]:
+        return (
+            db.query(IngestJob)
+            .filter(IngestJob.user_id == user_id)
+            .order_by(IngestJob.created_at.desc())
+            .limit(limit)
+            .all()
+        )
+
+    def update(self, db: Session, job_id: UUID, **fields) -> None:
+        """Write progress fields (status, stage, stages, result, error, finished_at); counts as a heartbeat"""
+        fields["updated_at"] = fields["heartbeat_at"] = datetime.now(timezone.utc)
+        db.query(IngestJob).filter(IngestJob.job_id == job_id).update(fields, synchronize_session=False)
+        db.commit()
+
+    def heartbeat(self, db: Session, owner: str) -> int:
+        """Mark every unfinished job held by `owner` (queued or mid-stage) as still alive"""
+        beaten = (
+            db.query(IngestJob)
+            .filter(IngestJob.owner == owner, IngestJob.status.in_(("pending", "running")))
+            .update({"heartbeat_at": datetime.now(timezone.utc)}, synchronize_session=False)
+        )
+        db.commit()
+        return beaten
+
+    def fail_stale(self, db: Session, max_age_seconds: float) -> int:
+        """Fail unfinished jobs whose owner hasn't heartbeated for max_age_seconds (its process went away)"""
+        now = datetime.now(timezone.utc)
+        failed = (
+            db.query(IngestJob)
+            .filter(
+                IngestJob.status.in_(("pending", "running")),
+                IngestJob.heartbeat_at < now - timedelta(seconds=max_age_seconds),
+            )
+            .update(
+                {"status": "failed", "error": "interrupted", "finished_at": now, "updated_at": now},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return failed
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy.orm import Session
+
+from ..models.LibraryLocation import LibraryLocation
+from ..models.LibraryTile import LibraryTile
+
+
+class LibraryDirectoryRepository:
+    def list_locations(self, db: Session) -> List[LibraryLocation]:
+        return db.query(LibraryLocation).all()
+
+    def list_tiles(self, db: Session) -> List[LibraryTile]:
+        return db.query(LibraryTile).all()
+
+    def replace_tile(self, db: Session, tile: str, locations: List[LibraryLocation], refreshed_at: datetime) -> None:
+        # A tile is always refreshed as a whole, so drop what it had before
+        db.query(LibraryLocation).filter(LibraryLocation.tile == tile).delete()
+        for location in locations:
+            db.merge(location)
+        db.merge(LibraryTile(tile=tile, library_count=len(locations), refreshed_at=refreshed_at))
+        db.commit()
@@ -0,0 +1,125 @@
+import json
+from typing import Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Channels used to wake claimers and waiters; payload is the job id
+NEW_JOB_CHANNEL = "scrape_jobs_new"
+DONE_JOB_CHANNEL = "scrape_jobs_done"
+
+
+class ScrapeJobRepository:
+    def fresh_result(self, db: Session, dedupe_key: str, max_age_seconds: float) -> Optional[Dict]:
+        """Result of the newest job for this key completed within the freshness window"""
+        row = db.execute(text("""
+            SELECT result FROM scrape_jobs
+            WHERE dedupe_key = :key AND status = 'done'
+              AND completed_at > now() - make_interval(secs => :max_age)
+            ORDER BY completed_at DESC
+            LIMIT 1
+        """), {"key": dedupe_key, "max_age": max_age_seconds}).first()
+        return row.result if row else None
+
+    def enqueue(self, db: Session, dedupe_key: str, library_id: str, isbn: str) -> str:
+        """Insert a pending job unless one is already active for the key; returns the active job id"""
+        row = db.execute(text("""
+            INSERT INTO scrape_jobs (dedupe_key, library_id, isbn)
+            VALUES (:key, :library_id, :isbn)
+            ON CONFLICT (dedupe_key) WHERE status IN ('pending', 'running') DO NOTHING
+            RETURNING id
+        """), {"key": dedupe_key, "library_id": library_id, "isbn": isbn}).first()
+        if row:
+            db.execute(text("SELECT pg_notify(:channel, :payload)"),
+                       {"channel": NEW_JOB_CHANNEL, "payload": str(row.id)})
+        else:
+            row = db.execute(text("""
+                SELECT id FROM scrape_jobs
+                WHERE dedupe_key = :key AND status IN ('pending', 'running')
+            """), {"key": dedupe_key}).first()
+        db.commit()
+        if row is None:
+            # The active job finished between the insert and the select; enqueue again
+            return self.enqueue(db, dedupe_key, library_id, isbn)
+        return str(row.id)
+
+    def get(self, db: Session, job_id: str) -> Optional[Dict]:
+        row = db.execute(text("""
+            SELECT id, status, result, error, attempts, lease_expires_at < now() AS lease_expired
+            FROM scrape_jobs WHERE id = :id
+        """), {"id": job_id}).first()
+        return dict(row._mapping) if row else None
+
+    def claim(self, db: Session, owner: str, lease_seconds: float, max_attempts: int) -> Optional[Dict]:
+        """Lease the oldest claimable job (pending, or running with an expired lease)"""
+        row = db.execute(text("""
+            UPDATE scrape_jobs
+            SET status = 'running', lease_owner = :owner,
+                lease_expires_at = now() + make_interval(secs => :lease),
+                attempts = attempts + 1, updated_at = now()
+            WHERE id = (
+                SELECT id FROM scrape_jobs
+                WHERE (status = 'pending' OR (status = 'running' AND lease_expires_at < now()))
+                  AND attempts < :max_attempts
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING id, library_id, isbn, attempts
+        """), {"owner": owner, "lease": lease_seconds, "max_attempts": max_attempts}).first()
+        db.commit()
+        return dict(row._mapping) if row else None
+
+    def renew(self, db: Session, job_id: str, owner: str, lease_seconds: float) -> bool:
+        row = db.execute(text("""
+            UPDATE scrape_jobs
+            SET lease_expires_at = now() + make_interval(secs => :lease), updated_at = now()
+            WHERE id = :id AND lease_owner = :owner AND status = 'running'
+            RETURNING id
+        """), {"id": job_id, "owner": owner, "lease": lease_seconds}).first()
+        db.commit()
+        return row is not None
+
+    def complete(self, db: Session, job_id: str, owner: str, result: Dict) -> None:
+        db.execute(text("""
+            UPDATE scrape_jobs
+            SET status = 'done', result = CAST(:result AS jsonb), error = NULL,
+                lease_owner = NULL, lease_expires_at = NULL, completed_at = now(), updated_at = now()
+            WHERE id = :id AND lease_owner = :owner AND status = 'running'
+        """), {"id": job_id, "owner": owner, "result": json.dumps(result)})
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": DONE_JOB_CHANNEL, "payload": job_id})
+        db.commit()
+
+    def fail(self, db: Session, job_id: str, owner: str, error: str, retry: bool) -> None:
+        """Record a failed attempt: back to pending for another try, or failed for good"""
+        db.execute(text("""
+            UPDATE scrape_jobs
+            SET status = CASE WHEN :retry THEN 'pending' ELSE 'failed' END,
+                error = :error, lease_owner = NULL, lease_expires_at = NULL, updated_at = now(),
+                completed_at = CASE WHEN :retry THEN NULL ELSE now() END
+            WHERE id = :id AND lease_owner = :owner AND status = 'running'
+        """), {"id": job_id, "owner": owner, "error": error, "retry": retry})
+        db.execute(text("SELECT pg_notify(:channel, :payload)"),
+                   {"channel": NEW_JOB_CHANNEL if retry else DONE_JOB_CHANNEL, "payload": job_id})
+        db.commit()
+
+    def sweep(self, db: Session, max_attempts: int, retention_seconds: float) -> int:
+        """Fail jobs whose last lease expired with no attempts left, and drop old finished jobs"""
+        expired = db.execute(text("""
+            UPDATE scrape_jobs
+            SET status = 'failed', error = 'lease expired', lease_owner = NULL,
+                completed_at = now(), updated_at = now()
+            WHERE status = 'running' AND lease_expires_at < now() AND attempts >= :max_attempts
+            RETURNING id
+        """), {"max_attempts": max_attempts}).all()
+        for row in expired:
+            db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": DONE_JOB_CHANNEL, "payload": str(row.id)})
+        db.execute(text("""
+            DELETE FROM scrape_jobs
+            WHERE status IN ('done', 'failed') AND completed_at < now() - make_interval(secs => :retention)
+        """), {"retention": retention_seconds})
+        db.commit()
+        return len(expired)
+
+    def counts(self, db: Session) -> Dict[str, int]:
+        rows = db.execute(text("SELECT status, count(*) AS n FROM scrape_jobs GROUP BY status")).all()
+        return {row.status: row.n for row in rows}
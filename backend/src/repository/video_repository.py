@@ -9,4 +9,13 @@ class VideoRepository:
         db.refresh(video)
 
     def get_video_by_url(self, db: Session, url: str):
-        return db.query(Video).filter(Video.url == url).first()
\ No newline at end of file
+        return db.query(Video).filter(Video.url == url).first()
+
+    def get_video_by_external_id(self, db: Session, platform: str, external_id: str):
+        return db.query(Video).filter(
+            Video.platform == platform, Video.external_id == external_id
+        ).order_by(Video.created_at).first()
+
+    def set_external_id(self, db: Session, video: Video, external_id: str):
+        video.external_id = external_id
+        db.commit()
\ No newline at end of file
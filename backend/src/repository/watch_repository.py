@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..models.AvailabilitySnapshot import AvailabilitySnapshot
+from ..models.AvailabilityWatch import AvailabilityWatch
+from ..models.NotificationOutbox import NotificationOutbox
+
+
+class WatchRepository:
+    def add(self, db: Session, user_id: UUID, isbn: str, library_id: str, branch_name: Optional[str]) -> AvailabilityWatch:
+        """
+        Watch a (system, ISBN), optionally at one branch; idempotent. Concurrent adds
+        of the same watch are settled by the unique constraint and the any-branch
+        partial index, so both callers get the one row.
+        """
+        params = {"user_id": user_id, "isbn": isbn, "library_id": library_id, "branch_name": branch_name}
+        db.execute(text("""
+            INSERT INTO availability_watches (user_id, isbn, library_id, branch_name)
+            VALUES (:user_id, :isbn, :library_id, :branch_name)
+            ON CONFLICT DO NOTHING
+        """), params)
+        # One shared snapshot row per pair; a new pair is due immediately
+        db.execute(text("""
+            INSERT INTO availability_snapshots (library_id, isbn) VALUES (:library_id, :isbn)
+            ON CONFLICT (library_id, isbn) DO NOTHING
+        """), params)
+        db.commit()
+        return (
+            db.query(AvailabilityWatch)
+            .filter(
+                AvailabilityWatch.user_id == user_id,
+                AvailabilityWatch.isbn == isbn,
+                AvailabilityWatch.library_id == library_id,
+                AvailabilityWatch.branch_name.is_(None) if branch_name is None
+                else AvailabilityWatch.branch_name == branch_name,
+            )
+            .one()
+        )
+
+    def delete(self, db: Session, user_id: UUID, watch_id: UUID) -> bool:
+        deleted = (
+            db.query(AvailabilityWatch)
+            .filter(AvailabilityWatch.user_id == user_id, AvailabilityWatch.watch_id == watch_id)
+            .delete()
+        )
+        db.commit()
+        return deleted > 0
+
+    def list_for_user(self, db: Session, user_id: UUID) -> List[Tuple[AvailabilityWatch, Optional[AvailabilitySnapshot]]]:
+        return (
+            db.query(AvailabilityWatch, AvailabilitySnapshot)
+            .outerjoin(
+                AvailabilitySnapshot,
+                (AvailabilitySnapshot.library_id == AvailabilityWatch.library_id)
+                & (AvailabilitySnapshot.isbn == AvailabilityWatch.isbn),
+            )
+            .filter(AvailabilityWatch.user_id == user_id)
+            .order_by(AvailabilityWatch.created_at)
+            .all()
+        )
+
+    def claim_due(self, db: Session, limit: int, interval_seconds: float) -> List[Tuple[str, str]]:
+        """
+        Take up to `limit` watched pairs whose poll is due and push their next poll
+        out by the interval. SKIP LOCKED keeps concurrent schedulers off each
+        other's pairs, so each pair is polled at most once per interval.
+        Pairs nobody watches any more are dropped instead.
+        """
+        db.execute(text("""
+            DELETE FROM availability_snapshots s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM availability_watches w WHERE w.library_id = s.library_id AND w.isbn = s.isbn
+            )
+        """))
+        rows = db.execute(text("""
+            UPDATE availability_snapshots
+            SET next_poll_at = now() + make_interval(secs => :interval)
+            WHERE (library_id, isbn) IN (
+                SELECT library_id, isbn FROM availability_snapshots
+                WHERE next_poll_at <= now()
+                ORDER BY next_poll_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT :limit
+            )
+            RETURNING library_id, isbn
+        """), {"interval": interval_seconds, "limit": limit}).all()
+        db.commit()
+        return [(row.library_id, row.isbn) for row in rows]
+
+    def get_snapshot(self, db: Session, library_id: str, isbn: str) -> Optional[AvailabilitySnapshot]:
+        return db.get(AvailabilitySnapshot, (library_id, isbn))
+
+    def watches_for(self, db: Session, library_id: str, isbn: str) -> List[AvailabilityWatch]:
+        return (
+            db.query(AvailabilityWatch)
+            .filter(AvailabilityWatch.library_id == library_id, AvailabilityWatch.isbn == isbn)
+            .all()
+        )
+
+    def save_poll(
+        self, db: Session, library_id: str, isbn: str, availability: Dict, checked_at: datetime,
+        notifications: List[NotificationOutbox],
+    ) -> None:
+        """Store the new snapshot and its notifications in one transaction"""
+        snapshot = db.get(AvailabilitySnapshot, (library_id, isbn))
+        if snapshot is None:
+            snapshot = AvailabilitySnapshot(library_id=library_id, isbn=isbn)
+            db.add(snapshot)
+        snapshot.is_available = bool(availability.get("is_available"))
+        snapshot.available_locations = availability.get("available_locations", [])
+        snapshot.holds = availability.get("holds", 0)
+        snapshot.copies = availability.get("copies", 0)
+        snapshot.not_found = bool(availability.get("not_found"))
+        snapshot.status_text = availability.get("status_text", "")
+        snapshot.checked_at = checked_at
+        db.add_all(notifications)
+        db.commit()
+
+    def list_notifications(self, db: Session, user_id: UUID, undelivered_only: bool = False) -> List[NotificationOutbox]:
+        query = db.query(NotificationOutbox).filter(NotificationOutbox.user_id == user_id)
+        if undelivered_only:
+            query = query.filter(NotificationOutbox.delivered_at.is_(None))
+        return query.order_by(NotificationOutbox.created_at.desc()).limit(100).all()
+
+    def mark_delivered(self, db: Session, user_id: UUID, notification_ids: List[UUID], delivered_at: datetime) -> int:
+        updated = (
+            db.query(NotificationOutbox)
+            .filter(
+                NotificationOutbox.user_id == user_id,
+                NotificationOutbox.notification_id.in_(notification_ids),
+                NotificationOutbox.delivered_at.is_(None),
+            )
+            .update({NotificationOutbox.delivered_at: delivered_at}, synchronize_session=False)
+        )
+        db.commit()
+        return updated
@@ -1,33 +1,75 @@
-from fastapi import APIRouter, Depends, Query
+import asyncio
+import json
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ..util.db import get_db
-from ..service.get_book_service import GetBookService
 from ..service.google_books_service import GoogleBooksService
+from ..service.ingest_job_service import ingest_jobs
 from ..service.library_service import LibraryService
 from ..service.recommendation_service import RecommendationService
 from pydantic import BaseModel
 from ..models.User import User
 from ..models.UserBooks import UserBook
 from ..models.Book import Book
+from ..repository.user_book_repository import UserBookRepository
 from ..util.auth_state import get_current_user
 
 router = APIRouter(prefix="/get-book", tags=["book"])
 
-get_book_service = GetBookService()
 google_books_service = GoogleBooksService()
 library_service = LibraryService()
 recommendation_service = RecommendationService()
+user_book_repo = UserBookRepository()
 
 class TikTokLinkRequest(BaseModel):
     tiktok_url: str
 
 @router.post("/from-tiktok")
-def get_book_from_tt(request: TikTokLinkRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    books = get_book_service.get_book_from_tt(db, request.tiktok_url, current_user.user_id)
+async def get_book_from_tt(request: TikTokLinkRequest, current_user: User = Depends(get_current_user)):
+    """
+    Synchronous form of /from-tiktok/jobs: runs the same job and answers once it
+    has finished. The wait holds no worker thread.
+    """
+    job = await asyncio.to_thread(ingest_jobs.submit, current_user.user_id, request.tiktok_url)
+    job = await ingest_jobs.wait(UUID(job["job_id"]), current_user.user_id)
+    books = job["result"]["books"] if job["status"] == "done" else []
     print(books)
     return {"books": books}
 
+@router.post("/from-tiktok/jobs", status_code=status.HTTP_202_ACCEPTED, summary="Start a background TikTok ingestion job")
+def start_tiktok_job(request: TikTokLinkRequest, current_user: User = Depends(get_current_user)):
+    """
+    Returns the job right away (`job_id`, `status: pending`). The link then goes
+    through download, transcribe, extract, lookup and save in the background;
+    follow it with GET /from-tiktok/jobs/{job_id} or its /events stream.
+    """
+    return ingest_jobs.submit(current_user.user_id, request.tiktok_url)
+
+@router.get("/from-tiktok/jobs", summary="The current user's recent ingestion jobs")
+def list_tiktok_jobs(current_user: User = Depends(get_current_user)):
+    return {"jobs": ingest_jobs.list_jobs(current_user.user_id)}
+
+@router.get("/from-tiktok/jobs/{job_id}", summary="Status, per-stage timings and result of an ingestion job")
+def get_tiktok_job(job_id: UUID, current_user: User = Depends(get_current_user)):
+    return ingest_jobs.get_job(job_id, current_user.user_id)
+
+@router.get("/from-tiktok/jobs/{job_id}/events", summary="Server-sent progress events for an ingestion job")
+async def stream_tiktok_job(job_id: UUID, current_user: User = Depends(get_current_user)):
+    """
+    text/event-stream of `progress` events (the whole job, sent whenever a stage
+    starts or finishes), ending with a `done` or `failed` event.
+    """
+    # 404 before the stream starts
+    await asyncio.to_thread(ingest_jobs.get_job, job_id, current_user.user_id)
+    return StreamingResponse(
+        ingest_jobs.progress_events(job_id, current_user.user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/search", summary="Search books by name using Google Books API")
 def search_books(
     q: str = Query(..., description="Search query (book title, author, etc.)"),
@@ -54,7 +96,15 @@ async def find_book_at_libraries(
     isbn: str = Query(..., description="Book ISBN"),
     lat: float = Query(..., description="User's latitude"),
     lng: float = Query(..., description="User's longitude"),
-    max_distance: float = Query(15, description="Maximum search distance in kilometers")
+    max_distance: float = Query(15, description="Maximum search distance in kilometers"),
+    limit: Optional[int] = Query(None, ge=1, description="Only return the best N libraries"),
+    target_libraries: Optional[int] = Query(
+        None, ge=1, description="Progressive search: stop widening the radius once this many tracked libraries are found"
+    ),
+    radius_steps: Optional[List[float]] = Query(
+        None, description="Radii in km for the progressive search, tried in order up to max_distance (default: 2, 5, 10)"
+    ),
+    all_editions: bool = Query(False, description="Also check other editions of the book and merge their availability")
 ):
     """
     Find nearby libraries and check book availability
@@ -63,10 +113,20 @@ async def find_book_at_libraries(
     - **lat**: User's latitude
     - **lng**: User's longitude
     - **max_distance**: Maximum distance to search in km (default: 20)
+    - **limit**: Only return the best N libraries (available first, then nearest)
+    - **target_libraries**: Progressive search - start small and widen through **radius_steps**
+      (e.g. `radius_steps=2&radius_steps=5`) until this many libraries of tracked systems are
+      found, then only check those systems
+    - **radius_steps**: Radii for the progressive search (default: 2, 5, 10, then max_distance)
+    - **all_editions**: Search each library system once for every known edition of the book
+      (ISBN-10/13 and sibling ISBNs from Google Books) and merge copies, holds and available
+      branches; rows then list the per-record counts under `editions`
 
     Returns a list of nearby libraries with availability status, holds, copies, etc.
     """
-    libraries = await library_service.find_book_at_libraries(isbn, lat, lng, max_distance)
+    libraries = await library_service.find_book_at_libraries(
+        isbn, lat, lng, max_distance, limit, target_libraries, radius_steps, all_editions
+    )
     return {
         "isbn": isbn,
         "location": {"lat": lat, "lng": lng},
@@ -75,6 +135,83 @@ async def find_book_at_libraries(
     }
 
 
+@router.get("/find/stream", summary="Stream nearby libraries and availability as NDJSON")
+async def stream_book_at_libraries(
+    isbn: str = Query(..., description="Book ISBN"),
+    lat: float = Query(..., description="User's latitude"),
+    lng: float = Query(..., description="User's longitude"),
+    max_distance: float = Query(15, description="Maximum search distance in kilometers"),
+    limit: Optional[int] = Query(None, ge=1, description="Only return the best N libraries"),
+    target_libraries: Optional[int] = Query(
+        None, ge=1, description="Progressive search: stop widening the radius once this many tracked libraries are found"
+    ),
+    radius_steps: Optional[List[float]] = Query(
+        None, description="Radii in km for the progressive search, tried in order up to max_distance (default: 2, 5, 10)"
+    ),
+    all_editions: bool = Query(False, description="Also check other editions of the book and merge their availability")
+):
+    """
+    Streaming variant of /find. Emits one JSON object per line:
+
+    - **libraries**: nearby libraries with distances, sent before any availability check
+    - **availability**: branch results for one library system, sent as soon as it finishes
+    - **summary**: the full sorted list, same shape as /find's `libraries`
+
+    Supports the same progressive search (**target_libraries**, **radius_steps**) and
+    **all_editions** as /find; the libraries event carries the `radius_km` the search
+    stopped at and the `editions` being checked.
+    """
+    async def events():
+        async for event in library_service.stream_book_at_libraries(
+            isbn, lat, lng, max_distance, limit, target_libraries, radius_steps, all_editions
+        ):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class BatchFindRequest(BaseModel):
+    lat: float
+    lng: float
+    isbns: Optional[List[str]] = None  # defaults to the current user's TBR list
+    max_distance: float = 15
+
+
+@router.post("/find/batch", summary="Check availability of many books at nearby libraries")
+async def find_books_at_libraries(
+    request: BatchFindRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Check availability for a list of ISBNs in one round trip
+
+    - **isbns**: ISBNs to check (default: every book on the current user's TBR list)
+    - **lat** / **lng**: User's location
+    - **max_distance**: Maximum distance to search in km (default: 15)
+
+    Returns `libraries` (nearby branches, indexed) and `books`, where each book has
+    per-system status and `available_at`: indexes of branches that have it on the shelf.
+    """
+    isbns = request.isbns
+    if not isbns:
+        tbr = await asyncio.to_thread(user_book_repo.list_tbr, db, current_user.user_id)
+        isbns = [user_book.isbn for user_book in tbr]
+    if len(isbns) > 50:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="At most 50 ISBNs per batch")
+
+    matrix = await library_service.find_books_at_libraries(isbns, request.lat, request.lng, request.max_distance)
+    return {
+        "location": {"lat": request.lat, "lng": request.lng},
+        "count": len(matrix["books"]),
+        **matrix
+    }
+
+
 class RecommendRequest(BaseModel):
     query: str
     favorite_genres: Optional[List[str]] = None
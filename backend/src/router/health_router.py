@@ -1,7 +1,66 @@
-from fastapi import APIRouter
+import inspect
+import os
+import secrets
+from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from ..util.browser_pool import browser_pool
+from ..util.scraper_workers import scraper_workers
+from ..util.scrape_queue import scrape_queue
+from ..util.availability_cache import availability_cache
+from ..util.library_directory import library_directory
+from ..util.library_registry import library_registry
+from ..util.system_controller import system_controllers
+from ..util.find_libraries import overpass, overpass_flight
+from ..service.library_service import availability_flight
+from ..service.google_books_service import edition_index
+from ..service.watch_service import watch_scheduler
+from ..service.ingest_job_service import ingest_jobs
+from ..service.get_book_service import extraction_cache_stats, transcript_cache_stats
+from ..util.tiktok_url import tiktok_urls
+
+# Internal stats are off unless a token is configured; callers send it as X-Health-Token
+HEALTH_STATS_TOKEN = os.getenv("HEALTH_STATS_TOKEN", "")
 
 router = APIRouter(prefix="/health", tags=["health"])
 
+# Section name -> stats getter (sync or async)
+STATS_SECTIONS = {
+    "browser_pool": browser_pool.stats,
+    "scraper_workers": scraper_workers.stats,
+    "scrape_queue": scrape_queue.stats,
+    "availability_cache": availability_cache.stats,
+    "editions": edition_index.stats,
+    "library_directory": library_directory.stats,
+    "library_registry": library_registry.stats,
+    "library_systems": system_controllers.stats,
+    "overpass": overpass.stats,
+    "watch_scheduler": watch_scheduler.stats,
+    "ingest_jobs": ingest_jobs.stats,
+    "transcript_cache": lambda: {**transcript_cache_stats.stats(), "urls": tiktok_urls.stats()},
+    "extraction_cache": extraction_cache_stats.stats,
+    "in_flight": lambda: {"availability": availability_flight.stats(), "overpass": overpass_flight.stats()},
+}
+
 @router.get("/", summary="Liveness probe")
 async def ping():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@router.get("/stats", summary="Internal pool, cache, queue and job stats (needs HEALTH_STATS_TOKEN)")
+async def stats(
+    section: Optional[List[str]] = Query(None, description="Only these sections (default: all)"),
+    x_health_token: Optional[str] = Header(None),
+):
+    if not HEALTH_STATS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_health_token or not secrets.compare_digest(x_health_token, HEALTH_STATS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid health token")
+
+    unknown = [name for name in section or [] if name not in STATS_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown stats sections: {', '.join(unknown)}")
+
+    result = {}
+    for name in section or STATS_SECTIONS:
+        value = STATS_SECTIONS[name]()
+        result[name] = await value if inspect.isawaitable(value) else value
+    return result
@@ -0,0 +1,56 @@
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from ..models.User import User
+from ..service.watch_service import watch_service
+from ..util.auth_state import get_current_user
+from ..util.db import get_db
+
+router = APIRouter(prefix="/watches", tags=["watches"])
+
+
+class WatchRequest(BaseModel):
+    isbn: str
+    library_system: str  # bibliocommons id, e.g. "vpl"
+    branch_name: Optional[str] = None  # omit to watch every branch of the system
+
+
+class DeliveredRequest(BaseModel):
+    notification_ids: List[UUID]
+
+
+@router.post("", summary="Watch a book's availability at a library system or branch")
+def add_watch(request: WatchRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Register interest in a book. The pair is polled in the background and changes
+    (became available, no longer available, hold count changed) land in
+    /watches/notifications.
+    """
+    return watch_service.add_watch(db, current_user.user_id, request.isbn, request.library_system, request.branch_name)
+
+
+@router.get("", summary="List the current user's watches with their last snapshot")
+def list_watches(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return watch_service.list_watches(db, current_user.user_id)
+
+
+@router.delete("/{watch_id}", summary="Stop watching")
+def delete_watch(watch_id: UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return watch_service.delete_watch(db, current_user.user_id, watch_id)
+
+
+@router.get("/notifications", summary="Availability changes for the current user's watches")
+def list_notifications(
+    undelivered: bool = Query(False, description="Only notifications not yet marked delivered"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    return watch_service.list_notifications(db, current_user.user_id, undelivered)
+
+
+@router.post("/notifications/delivered", summary="Mark notifications as delivered")
+def mark_delivered(request: DeliveredRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return watch_service.mark_delivered(db, current_user.user_id, request.notification_ids)
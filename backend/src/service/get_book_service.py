@@ -1,133 +1,312 @@
 import os
+import contextlib
+import hashlib
+import threading
 from sqlalchemy.orm import Session
 import json
-import requests
 from ..repository.book_repository import BookRepository
 from ..repository.video_repository import VideoRepository
+from ..repository.book_extraction_repository import BookExtractionRepository
 from ..models.Book import Book
 from ..models.Video import Video
 from ..util.elevenlabs_client import ElevenLabsClient
 from ..util.gemini_client import GeminiClient
-from ..util.download import download_tiktok_audio
+from ..util.download import fetch_tiktok_audio
+from ..util.tiktok_url import tiktok_urls
 from ..models.UserBooks import UserBook
+from .google_books_service import GoogleBooksService
+
+
+class _NoProgress:
+    """Stage hooks for runs outside a job: stages just run"""
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        yield {}
+
+    def skip(self, name: str, detail: str = None):
+        pass
+
+
+NO_PROGRESS = _NoProgress()
+
+# Book extraction prompt (str.format with `text`). Any edit changes PROMPT_VERSION,
+# so extractions cached under the old wording are no longer used.
+EXTRACTION_PROMPT = """
+            From the following text, extract ALL books mentioned.
+
+            For each book:
+            1. Identify the book title.
+            2. Identify the author.
+            3. If the author or title is not explicitly stated in the text, use your general knowledge to infer the most likely correct information.
+            4. If after best-effort inference you are still unsure or cannot confidently determine the information, set the field value to "Not found".
+
+            Return ONLY a valid JSON array with this exact structure (no extra text, no explanations):
+
+            [
+            {{
+                "title": "book title here",
+                "author": "author name here"
+            }}
+            ]
+
+            Text to analyze:
+            {text}
+            """
+PROMPT_VERSION = hashlib.sha256(EXTRACTION_PROMPT.encode("utf-8")).hexdigest()[:16]
+EXTRACTION_MODEL = os.getenv("GEMINI_EXTRACTION_MODEL", "gemini-2.5-flash")
+
+
+def transcript_hash(transcript: str) -> str:
+    return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+
+class TranscriptCacheStats:
+    """How often a submitted link reuses a stored transcript instead of a paid transcription"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.legacy_url_hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool, legacy_url: bool = False):
+        with self._lock:
+            if not hit:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if legacy_url:
+                    self.legacy_url_hits += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "lookups": lookups,
+            "hits": self.hits,
+            "legacy_url_hits": self.legacy_url_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+transcript_cache_stats = TranscriptCacheStats()
+
+
+class ExtractionCacheStats:
+    """Gemini extractions served from book_extractions versus made (and stored) fresh"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.errors = 0
+
+    def record(self, hit: bool = False, stored: bool = False, error: bool = False):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            elif not error:
+                self.misses += 1
+            if stored:
+                self.stored += 1
+            if error:
+                self.errors += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "prompt_version": PROMPT_VERSION,
+            "model": EXTRACTION_MODEL,
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stored": self.stored,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+extraction_cache_stats = ExtractionCacheStats()
 
 class GetBookService:
     
     def __init__(self):
         self.book_repo = BookRepository()
         self.video_repo = VideoRepository()
+        self.extraction_repo = BookExtractionRepository()
         self.elevenlabs = ElevenLabsClient()
         self.gemini = GeminiClient()
+        self.google_books = GoogleBooksService()
     
 
 
 
 
-    def get_book_from_tt(self, db: Session, link: str, user_id: str):
-        audio_file_path = None
+    def get_book_from_tt(self, db: Session, link: str, user_id: str, progress=None):
+        """
+        TikTok link -> books on the user's list: download, transcribe, extract
+        (Gemini), lookup (Google Books) and save. Returns the saved Book rows and
+        raises on failure. `progress` receives per-stage start/finish (see
+        ingest_job_service.JobProgress); without it the stages just run.
+        """
+        progress = progress or NO_PROGRESS
+        audio = None
         
         try:
-            # 1. Handle Video/Transcript (Existing logic)
-            existing_video = self.video_repo.get_video_by_url(db, link)
+            # 1. Handle Video/Transcript: any URL variant of a video reuses its transcript
+            existing_video, video_id, canonical_url = self._find_video(db, link)
             if existing_video:
                 transcript = existing_video.transcript
+                progress.skip("download", "transcript cached")
+                progress.skip("transcribe", "transcript cached")
             else:
-                audio_file_path = download_tiktok_audio(link)
-                transcribed_text = self.elevenlabs.transcribe(audio_file_path)
-                
-                if not transcribed_text:
-                    raise Exception("Failed to transcribe audio")
+                with progress.stage("download") as info:
+                    # Compact mono 16 kHz audio in memory, nothing written to disk
+                    audio = fetch_tiktok_audio(canonical_url)
+                    info["detail"] = audio.describe()
+
+                with progress.stage("transcribe") as info:
+                    transcribed_text = self.elevenlabs.transcribe(audio)
+                    if not transcribed_text:
+                        raise Exception("Failed to transcribe audio")
+                    info["detail"] = f"uploaded {audio.size} bytes"
                 
                 transcript = transcribed_text
-                video = Video(platform="tiktok", url=link, transcript=transcribed_text)
+                video = Video(platform="tiktok", url=canonical_url, external_id=video_id, transcript=transcribed_text)
                 self.video_repo.create_video(db, video)
 
             # 2. Extract Book Data
-            books_data = self._extract_book_info(transcript)
-            if not books_data:
-                raise Exception("Failed to extract book information")
+            with progress.stage("extract") as info:
+                books_data, cached = self._cached_extract_books(db, transcript)
+                if not books_data:
+                    raise Exception("Failed to extract book information")
+                info["detail"] = f"{len(books_data)} books mentioned" + (" (cached)" if cached else "")
+
+            with progress.stage("lookup") as info:
+                self._lookup_books(books_data)
+                found = sum(1 for b in books_data if b.get("isbn") and b["isbn"] != "Not found")
+                info["detail"] = f"{found} of {len(books_data)} matched"
             
             saved_books = []
             
-            for book_data in books_data:
-                isbn = book_data.get("isbn")
-                if not isbn or isbn == "Not found":
-                    continue # Cannot accurately link UserBook without ISBN
-
-                # 3. Ensure Book exists in the global 'books' table
-                book = self.book_repo.get_book_by_isbn(db, isbn)
-                if not book:
-                    book = Book(
-                        title=book_data.get("title"),
-                        author=book_data.get("author"),
-                        isbn=isbn,
-                        cover_url=book_data.get("cover_url"),
-                        description=book_data.get("description")
-                    )
-                    self.book_repo.create_book(db, book)
+            with progress.stage("save"):
+                for book_data in books_data:
+                    isbn = book_data.get("isbn")
+                    if not isbn or isbn == "Not found":
+                        continue # Cannot accurately link UserBook without ISBN
+
+                    # 3. Ensure Book exists in the global 'books' table
+                    book = self.book_repo.get_book_by_isbn(db, isbn)
+                    if not book:
+                        book = Book(
+                            title=book_data.get("title"),
+                            author=book_data.get("author"),
+                            isbn=isbn,
+                            cover_url=book_data.get("cover_url"),
+                            description=book_data.get("description")
+                        )
+                        self.book_repo.create_book(db, book)
+                    
+                    # 4. Handle User-Book Relationship
+                    # Check if this specific user already has this book
+                    existing_user_book = db.query(UserBook).filter(
+                        UserBook.user_id == user_id,
+                        UserBook.isbn == isbn
+                    ).first()
+
+                    if not existing_user_book:
+                        new_user_book = UserBook(
+                            user_id=user_id,
+                            isbn=isbn,
+                            tbr=True # Defaulting to To-Be-Read
+                        )
+                        db.add(new_user_book)
+                        print(f"Book {isbn} added to user {user_id}'s list.")
+                    else:
+                        print(f"User already has book {isbn} in their list.")
+
+                    saved_books.append(book)
                 
-                # 4. Handle User-Book Relationship
-                # Check if this specific user already has this book
-                existing_user_book = db.query(UserBook).filter(
-                    UserBook.user_id == user_id,
-                    UserBook.isbn == isbn
-                ).first()
-
-                if not existing_user_book:
-                    new_user_book = UserBook(
-                        user_id=user_id,
-                        isbn=isbn,
-                        tbr=True # Defaulting to To-Be-Read
-                    )
-                    db.add(new_user_book)
-                    print(f"Book {isbn} added to user {user_id}'s list.")
-                else:
-                    print(f"User already has book {isbn} in their list.")
-
-                saved_books.append(book)
-            
-            db.commit() # Commit all new relations
+                db.commit() # Commit all new relations
             return saved_books
         
         except Exception as e:
             print(f"Error in get_book_from_tt: {e}")
             db.rollback()
-            return []
+            raise
         finally:
-            if audio_file_path and os.path.exists(audio_file_path):
-                os.remove(audio_file_path)
+            if audio is not None:
+                audio.close()
 
 
 
 
 
-    def _extract_book_info(self, text: str):
-        try:
-            # Step 1: Use Gemini to extract all books mentioned
-            prompt = f"""
-            From the following text, extract ALL books mentioned.
+    def _find_video(self, db: Session, link: str):
+        """
+        (stored video or None, TikTok video ID, canonical URL) for a link. Videos are
+        matched on their ID; rows saved before IDs were recorded (or links whose ID
+        can't be resolved) fall back to an exact URL match and get their ID filled in.
+        """
+        video_id, canonical_url = tiktok_urls.resolve(link)
+        video = None
+        if video_id:
+            video = self.video_repo.get_video_by_external_id(db, "tiktok", video_id)
+        if video is not None:
+            transcript_cache_stats.record(hit=True)
+            return video, video_id, canonical_url
 
-            For each book:
-            1. Identify the book title.
-            2. Identify the author.
-            3. If the author or title is not explicitly stated in the text, use your general knowledge to infer the most likely correct information.
-            4. If after best-effort inference you are still unsure or cannot confidently determine the information, set the field value to "Not found".
+        for url in dict.fromkeys((link, canonical_url)):
+            video = self.video_repo.get_video_by_url(db, url)
+            if video is not None:
+                if video_id and not video.external_id:
+                    self.video_repo.set_external_id(db, video, video_id)
+                transcript_cache_stats.record(hit=True, legacy_url=True)
+                return video, video_id, canonical_url
 
-            Return ONLY a valid JSON array with this exact structure (no extra text, no explanations):
+        transcript_cache_stats.record(hit=False)
+        return None, video_id, canonical_url
 
-            [
-            {{
-                "title": "book title here",
-                "author": "author name here"
-            }}
-            ]
+    def _cached_extract_books(self, db: Session, transcript: str):
+        """
+        (books, cached) for a transcript: the stored extraction for this transcript,
+        prompt version and model if there is one, else a fresh Gemini extraction,
+        which is stored when it found anything
+        """
+        key = transcript_hash(transcript)
+        try:
+            books = self.extraction_repo.get(db, key, PROMPT_VERSION, EXTRACTION_MODEL)
+        except Exception as e:
+            print(f"Could not read cached extraction: {e}")
+            db.rollback()
+            extraction_cache_stats.record(error=True)
+            books = None
+        if books is not None:
+            extraction_cache_stats.record(hit=True)
+            return books, True
 
-            Text to analyze:
-            {text}
-            """
+        books = self._extract_books(transcript)
+        stored = False
+        if books:
+            try:
+                self.extraction_repo.save(db, key, PROMPT_VERSION, EXTRACTION_MODEL, books)
+                stored = True
+            except Exception as e:
+                print(f"Could not cache extraction: {e}")
+                db.rollback()
+        extraction_cache_stats.record(stored=stored)
+        return [dict(book) for book in books], False
+
+    def _extract_books(self, text: str):
+        """Books (title/author) mentioned in a transcript, via Gemini"""
+        try:
+            # Use Gemini to extract all books mentioned
+            prompt = EXTRACTION_PROMPT.format(text=text)
 
             
-            response = self.gemini.generate_content(prompt)
+            response = self.gemini.generate_content(prompt, model=EXTRACTION_MODEL)
             response_text = response.strip()
             
             # Remove markdown code blocks if present
@@ -142,16 +321,6 @@ class GetBookService:
             if not isinstance(books_data, list):
                 books_data = [books_data]
             
-            # Step 2: Search for ISBN, cover URL, and description for each book
-            for book_data in books_data:
-                title = book_data.get("title")
-                author = book_data.get("author")
-                
-                isbn_data = self._find_isbn_online(title, author)
-                book_data["isbn"] = isbn_data.get("isbn")
-                book_data["cover_url"] = isbn_data.get("cover_url")
-                book_data["description"] = isbn_data.get("description")
-            
             return books_data
         
         except json.JSONDecodeError as e:
@@ -160,65 +329,64 @@ class GetBookService:
         except Exception as e:
             print(f"Error extracting book info: {e}")
             return []
-    
 
+    def _lookup_books(self, books_data):
+        """
+        Fill in ISBN, cover URL, and description for each extracted book: all books
+        are matched against Google Books at once, best edition per search_books' scoring
+        """
+        matches = self.google_books.match_books(
+            [(book_data.get("title"), book_data.get("author")) for book_data in books_data]
+        )
+        for book_data, match in zip(books_data, matches):
+            book_data["isbn"] = match["isbn"] if match else "Not found"
+            book_data["cover_url"] = match.get("cover_url") if match else None
+            book_data["description"] = match.get("description") if match else None
 
 
 
+def backfill_extractions(limit: int = None, dry_run: bool = False):
+    """
+    Extract books from stored video transcripts that have no cached extraction for
+    the current prompt version and model, so their next submission skips Gemini.
+    Each distinct transcript is extracted once.
+    """
+    from ..util.db import SessionLocal
 
+    service = GetBookService()
+    db = SessionLocal()
+    try:
+        done = service.extraction_repo.hashes(db, PROMPT_VERSION, EXTRACTION_MODEL)
+        todo = {}
+        for video in db.query(Video).filter(Video.transcript.isnot(None)).yield_per(500):
+            key = transcript_hash(video.transcript)
+            if video.transcript.strip() and key not in done:
+                todo.setdefault(key, video.transcript)
+        pending = list(todo.items())[:limit] if limit else list(todo.items())
+        print(f"{len(todo)} transcripts without an extraction for prompt {PROMPT_VERSION} / {EXTRACTION_MODEL}, "
+              f"{len(pending)} to extract{' (dry run)' if dry_run else ''}")
+        if dry_run:
+            return
 
+        stored = failed = 0
+        for i, (key, transcript) in enumerate(pending, 1):
+            books = service._extract_books(transcript)
+            if books:
+                service.extraction_repo.save(db, key, PROMPT_VERSION, EXTRACTION_MODEL, books)
+                stored += 1
+            else:
+                failed += 1
+            print(f"[{i}/{len(pending)}] {key[:12]}: {len(books)} books")
+        print(f"Stored {stored} extractions, {failed} transcripts gave nothing")
+    finally:
+        db.close()
 
-    def _find_isbn_online(self, title: str, author: str):
-        if title == "Not found":
-            return {"isbn": "Not found", "cover_url": None, "description": None}
-        
-        try:
-            # Build search query
-            query = f"{title}"
-            if author != "Not found":
-                query += f" {author}"
-            
-            # Google Books API endpoint
-            url = "https://www.googleapis.com/books/v1/volumes"
-            params = {
-                "q": query,
-                "maxResults": 1
-            }
-            
-            response = requests.get(url, params=params)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if "items" in data and len(data["items"]) > 0:
-                    book = data["items"][0]
-                    volume_info = book.get("volumeInfo", {})
-                    
-                    # Extract ISBN
-                    identifiers = volume_info.get("industryIdentifiers", [])
-                    isbn = "Not found"
-                    
-                    for identifier in identifiers:
-                        if identifier["type"] == "ISBN_13":
-                            isbn = identifier["identifier"]
-                            break
-                    
-                    if isbn == "Not found":
-                        for identifier in identifiers:
-                            if identifier["type"] == "ISBN_10":
-                                isbn = identifier["identifier"]
-                                break
-                    
-                    # Extract cover URL
-                    cover_url = volume_info.get("imageLinks", {}).get("thumbnail")
-                    
-                    # Extract description
-                    description = volume_info.get("description")
-                    
-                    return {"isbn": isbn, "cover_url": cover_url, "description": description}
-            
-            return {"isbn": "Not found", "cover_url": None, "description": None}
-        
-        except Exception as e:
-            print(f"Error searching for ISBN: {e}")
-            return {"isbn": "Not found", "cover_url": None, "description": None}
\ No newline at end of file
+
+if __name__ == "__main__":
+    # python -m src.service.get_book_service [--limit N] [--dry-run]
+    import argparse
+    parser = argparse.ArgumentParser(description="Backfill cached Gemini book extractions for stored transcripts")
+    parser.add_argument("--limit", type=int, default=None, help="extract at most this many transcripts")
+    parser.add_argument("--dry-run", action="store_true", help="only count transcripts that need extracting")
+    args = parser.parse_args()
+    backfill_extractions(args.limit, args.dry_run)
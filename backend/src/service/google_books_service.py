@@ -1,5 +1,119 @@
+import os
 import requests
-from typing import List, Dict, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from ..util.availability_cache import normalize_isbn
+
+# Editions of one work checked together at most (primary ISBN included)
+MAX_EDITIONS = 6
+EDITION_INDEX_SIZE = 20000
+# Per-request (connect, read) timeout for Google Books calls
+GOOGLE_BOOKS_TIMEOUT = float(os.getenv("GOOGLE_BOOKS_TIMEOUT", "10"))
+# Title/author matches in flight at once, across all callers of match_books
+GOOGLE_BOOKS_CONCURRENCY = int(os.getenv("GOOGLE_BOOKS_CONCURRENCY", "4"))
+# Candidates fetched per match so the edition scoring has something to choose from
+MATCH_CANDIDATES = 10
+
+# One keep-alive connection pool for every Google Books call in the process
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max(GOOGLE_BOOKS_CONCURRENCY, 10)))
+_match_executor = ThreadPoolExecutor(max_workers=max(1, GOOGLE_BOOKS_CONCURRENCY), thread_name_prefix="google-books")
+
+
+def _work_key(title: str, author: str) -> str:
+    """Group key for editions of one work: normalized title/author"""
+    return f"{title.strip().lower()}|{author.strip().lower()}"
+
+
+def _volume_isbns(volume_info: Dict) -> Tuple[Optional[str], Optional[str]]:
+    """(ISBN-13, ISBN-10) of a Google Books volume"""
+    isbn13 = None
+    isbn10 = None
+    for identifier in volume_info.get("industryIdentifiers", []):
+        if identifier.get("type") == "ISBN_13" and not isbn13:
+            isbn13 = identifier.get("identifier")
+        elif identifier.get("type") == "ISBN_10" and not isbn10:
+            isbn10 = identifier.get("identifier")
+    return isbn13, isbn10
+
+
+class EditionIndex:
+    """
+    Sibling editions of a work, learned from Google Books results.
+
+    search_books records every print edition it sees under its title/author, so
+    looking up an ISBN the user found through search costs nothing. Other ISBNs
+    are resolved with Google Books once (volume by ISBN, then the editions of its
+    title/author) and remembered, misses included. Bounded LRU of works.
+    """
+
+    def __init__(self, max_works: int = EDITION_INDEX_SIZE):
+        self.max_works = max_works
+        self._works: "OrderedDict[str, List[str]]" = OrderedDict()  # work key -> normalized ISBNs
+        self._work_of: Dict[str, str] = {}                          # normalized ISBN -> work key
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.lookups = 0
+
+    def add(self, work: str, isbns: List[Optional[str]]):
+        with self._lock:
+            editions = self._works.setdefault(work, [])
+            for isbn in isbns:
+                normalized = normalize_isbn(isbn) if isbn else ""
+                if normalized and normalized not in editions:
+                    editions.append(normalized)
+                    self._work_of[normalized] = work
+            self._works.move_to_end(work)
+            while len(self._works) > self.max_works:
+                old_work, old_isbns = self._works.popitem(last=False)
+                for isbn in old_isbns:
+                    if self._work_of.get(isbn) == old_work:
+                        del self._work_of[isbn]
+
+    def siblings(self, isbn: str) -> Optional[List[str]]:
+        """Known editions of the work this ISBN belongs to (None if never seen)"""
+        with self._lock:
+            work = self._work_of.get(normalize_isbn(isbn))
+            if work is None:
+                return None
+            self._works.move_to_end(work)
+            return list(self._works[work])
+
+    def resolve(self, isbn: str) -> List[str]:
+        """
+        This ISBN (normalized, first) and up to MAX_EDITIONS - 1 sibling editions.
+        Blocking: may call Google Books.
+        """
+        primary = normalize_isbn(isbn)
+        editions = self.siblings(primary)
+        if editions is None:
+            looked_up = GoogleBooksService().lookup_editions(primary)
+            if looked_up is None:
+                # Not remembered, so the next lookup asks again
+                return [primary]
+            work, found = looked_up
+            self.add(work, [primary, *found])
+            editions = self.siblings(primary) or [primary]
+        else:
+            self.hits += 1
+        self.lookups += 1
+        return [primary] + [e for e in editions if e != primary][:MAX_EDITIONS - 1]
+
+    def stats(self) -> Dict:
+        return {
+            "works": len(self._works),
+            "isbns": len(self._work_of),
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+
+edition_index = EditionIndex()
+
 
 class GoogleBooksService:
     BASE_URL = "https://www.googleapis.com/books/v1/volumes"
@@ -38,13 +152,15 @@ class GoogleBooksService:
                 score += 1
         return score
     
-    def search_books(self, query: str, max_results: int = 20) -> List[Dict]:
+    def search_books(self, query: str, max_results: int = 20, fetch: Optional[int] = None) -> List[Dict]:
         """
         Search for books using Google Books API
         
         Args:
             query: Search query (book title, author, etc.)
             max_results: Maximum number of results to return (default: 20)
+            fetch: Volumes to request from the API (default: max_results); more
+                than max_results gives the edition scoring more to choose from
             
         Returns:
             List of book dictionaries with relevant information
@@ -52,13 +168,13 @@ class GoogleBooksService:
         try:
             params = {
                 "q": query,
-                "maxResults": min(max_results, 40),  # Google Books API max is 40
+                "maxResults": min(fetch or max_results, 40),  # Google Books API max is 40
                 "printType": "books",  # exclude magazines
                 # request saleInfo.isEbook so we can drop digital-only results
                 "fields": "items(id,volumeInfo(title,authors,description,imageLinks,industryIdentifiers,pageCount,publishedDate,categories),saleInfo/isEbook)",
             }
             
-            response = requests.get(self.BASE_URL, params=params, timeout=10.0)
+            response = _session.get(self.BASE_URL, params=params, timeout=GOOGLE_BOOKS_TIMEOUT)
             response.raise_for_status()
             data = response.json()
             
@@ -77,18 +193,15 @@ class GoogleBooksService:
                 volume_info = item.get("volumeInfo", {})
                 
                 # Extract ISBN-13 or ISBN-10
-                isbn13 = None
-                isbn10 = None
-                industry_identifiers = volume_info.get("industryIdentifiers", [])
-                for identifier in industry_identifiers:
-                    if identifier.get("type") == "ISBN_13" and not isbn13:
-                        isbn13 = identifier.get("identifier")
-                    elif identifier.get("type") == "ISBN_10" and not isbn10:
-                        isbn10 = identifier.get("identifier")
+                isbn13, isbn10 = _volume_isbns(volume_info)
                 isbn = isbn13 or isbn10
                 if not isbn:
                     continue  # drop entries with no ISBN (likely less useful)
 
+                # Every print edition is remembered for multi-edition availability lookups
+                author = ", ".join(volume_info.get("authors", []))
+                edition_index.add(_work_key(volume_info.get("title", ""), author), [isbn13, isbn10])
+
                 cover_url = volume_info.get("imageLinks", {}).get("thumbnail", "")
                 if not cover_url:
                     continue  # require a cover image for common/physical editions
@@ -111,7 +224,7 @@ class GoogleBooksService:
                 score = self._score_volume(has_isbn13=bool(isbn13), has_cover=bool(cover_url), year=year, page_count=page_count)
 
                 # Group key by normalized title/author
-                key = f"{book['title'].strip().lower()}|{book['author'].strip().lower()}"
+                key = _work_key(book["title"], book["author"])
                 if not key.strip("|"):
                     key = book["isbn"]
 
@@ -142,3 +255,105 @@ class GoogleBooksService:
         except Exception as e:
             print(f"Error searching books: {e}")
             return []
+
+    def match_book(self, title: str, author: Optional[str] = None) -> Optional[Dict]:
+        """
+        Best edition (same shape as a search_books result) for a title/author pair,
+        picked by search_books' scoring; None when nothing matches.
+        """
+        if not title or title == "Not found":
+            return None
+        query = title if not author or author == "Not found" else f"{title} {author}"
+        books = self.search_books(query, max_results=1, fetch=MATCH_CANDIDATES)
+        return books[0] if books else None
+
+    def match_books(self, books: List[Tuple[str, Optional[str]]]) -> List[Optional[Dict]]:
+        """
+        match_book for many (title, author) pairs at once: requests fan out over the
+        shared executor and connection pool (GOOGLE_BOOKS_CONCURRENCY in flight),
+        results come back in input order. Blocking.
+        """
+        if len(books) <= 1:
+            return [self.match_book(title, author) for title, author in books]
+        return list(_match_executor.map(lambda pair: self.match_book(*pair), books))
+
+    def lookup_editions(self, isbn: str) -> Optional[Tuple[str, List[str]]]:
+        """
+        (work key, ISBNs of its print editions) for an ISBN: the volume is looked up
+        by ISBN, then its title/author is searched for other editions. An ISBN Google
+        Books doesn't know is a work of its own with no siblings; None on API errors.
+        """
+        work = f"isbn:{isbn}"
+        try:
+            response = _session.get(
+                self.BASE_URL,
+                params={"q": f"isbn:{isbn}", "maxResults": 1, "fields": "items(volumeInfo(title,authors))"},
+                timeout=GOOGLE_BOOKS_TIMEOUT,
+            )
+            response.raise_for_status()
+            items = response.json().get("items") or []
+            if not items:
+                return work, []
+            volume_info = items[0].get("volumeInfo", {})
+            title = volume_info.get("title", "")
+            authors = volume_info.get("authors", [])
+            if not title:
+                return work, []
+            work = _work_key(title, ", ".join(authors))
+
+            query = f'intitle:"{title}"' + (f' inauthor:"{authors[0]}"' if authors else "")
+            response = _session.get(
+                self.BASE_URL,
+                params={
+                    "q": query,
+                    "maxResults": 40,
+                    "printType": "books",
+                    "fields": "items(volumeInfo(title,authors,industryIdentifiers),saleInfo/isEbook)",
+                },
+                timeout=GOOGLE_BOOKS_TIMEOUT,
+            )
+            response.raise_for_status()
+
+            isbns = []
+            for item in response.json().get("items") or []:
+                if (item.get("saleInfo") or {}).get("isEbook") is True:
+                    continue
+                info = item.get("volumeInfo", {})
+                # Same work only: search results also include companions, summaries, etc.
+                if _work_key(info.get("title", ""), ", ".join(info.get("authors", []))) != work:
+                    continue
+                isbns.extend(i for i in _volume_isbns(info) if i)
+            return work, isbns
+        except requests.RequestException as e:
+            print(f"HTTP error when looking up editions of {isbn}: {e}")
+            return None
+        except Exception as e:
+            print(f"Error looking up editions of {isbn}: {e}")
+            return None
+
+
+def _benchmark(pairs: List[Tuple[str, Optional[str]]]):
+    """Match the same books one at a time, then with match_books, and compare"""
+    service = GoogleBooksService()
+
+    start = time.monotonic()
+    sequential = [service.match_book(title, author) for title, author in pairs]
+    sequential_s = time.monotonic() - start
+
+    start = time.monotonic()
+    concurrent = service.match_books(pairs)
+    concurrent_s = time.monotonic() - start
+
+    for (title, author), book in zip(pairs, concurrent):
+        print(f"{title} / {author or '-'} -> {book['isbn'] + ' ' + book['title'] if book else 'no match'}")
+    same = [b and b["isbn"] for b in sequential] == [b and b["isbn"] for b in concurrent]
+    print(f"{len(pairs)} books: sequential {sequential_s:.2f}s, concurrent {concurrent_s:.2f}s "
+          f"({GOOGLE_BOOKS_CONCURRENCY} in flight), same matches: {same}")
+
+
+if __name__ == "__main__":
+    # python -m src.service.google_books_service "Title|Author" "Title" ...
+    import sys
+    args = sys.argv[1:] or ["Dune|Frank Herbert", "The Secret History|Donna Tartt", "Piranesi|Susanna Clarke",
+                            "Circe|Madeline Miller", "The Overstory|Richard Powers", "Beloved|Toni Morrison"]
+    _benchmark([tuple(arg.split("|", 1)) if "|" in arg else (arg, None) for arg in args])
@@ -0,0 +1,305 @@
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set
+from uuid import UUID
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+
+from ..models.Book import Book
+from ..models.IngestJob import IngestJob
+from ..repository.ingest_job_repository import IngestJobRepository
+from ..util.db import SessionLocal
+from .get_book_service import GetBookService
+
+# TikTok pipelines run at once per node; more submissions queue in the executor
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+# Every node heartbeats the jobs it holds (queued or mid-stage) this often...
+HEARTBEAT_SECONDS = 30.0
+# ...so an unfinished job whose heartbeat is older than this has lost its process
+INGEST_STALE_SECONDS = float(os.getenv("INGEST_STALE_SECONDS", "120"))
+# Waiters re-read the job this often, so jobs running on another node are seen too
+POLL_SECONDS = 2.0
+KEEPALIVE_SECONDS = 15.0
+
+STAGES = ("download", "transcribe", "extract", "lookup", "save")
+FINISHED = ("done", "failed")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def book_to_dict(book) -> Dict:
+    """Every column of a Book, JSON-encoded as the API has always returned it"""
+    return jsonable_encoder({column.name: getattr(book, column.name) for column in Book.__table__.columns})
+
+
+class JobProgress:
+    """
+    Stage hooks handed to GetBookService.get_book_from_tt: every stage start,
+    finish, failure or skip is written to the job row with its timings.
+    """
+
+    def __init__(self, service: "IngestJobService", job_id: UUID):
+        self.service = service
+        self.job_id = job_id
+        self.stages: List[Dict] = [{"name": name, "status": "pending"} for name in STAGES]
+
+    def _entry(self, name: str) -> Dict:
+        return next(entry for entry in self.stages if entry["name"] == name)
+
+    def snapshot(self) -> List[Dict]:
+        return [dict(entry) for entry in self.stages]
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        entry = self._entry(name)
+        entry.update(status="running", started_at=_now().isoformat())
+        self.service._write(self.job_id, status="running", stage=name, stages=self.snapshot())
+        start = time.monotonic()
+        info: Dict = {}
+        try:
+            yield info
+        except Exception as e:
+            entry.update(status="failed", detail=str(e))
+            raise
+        else:
+            entry.update(status="done", detail=info.get("detail"))
+        finally:
+            entry.update(finished_at=_now().isoformat(), duration_ms=int((time.monotonic() - start) * 1000))
+            self.service._write(self.job_id, stages=self.snapshot())
+
+    def skip(self, name: str, detail: Optional[str] = None):
+        self._entry(name).update(status="skipped", detail=detail)
+        self.service._write(self.job_id, stages=self.snapshot())
+
+
+class IngestJobService:
+    """
+    TikTok ingestion as background jobs.
+
+    `submit` stores a pending job in ingest_jobs and hands the pipeline to a
+    thread pool, so the request returns at once. The pipeline writes each stage
+    transition (with timings) to the job row; waiters on this node are woken
+    straight away and everyone else polls the row, so status and progress
+    streams work whichever node runs the job.
+
+    Each job records the node holding it, and that node heartbeats all of its
+    unfinished jobs every HEARTBEAT_SECONDS, however long they sit in the queue
+    or in one stage. Only jobs whose heartbeat has stopped are failed.
+    """
+
+    def __init__(self, workers: int = INGEST_WORKERS):
+        self.workers = max(1, workers)
+        self.repo = IngestJobRepository()
+        self.pipeline = GetBookService()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[UUID, Set[asyncio.Event]] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+
+    # --- lifecycle ---
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest")
+        await self._sweep()
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def close(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+        if self._executor is not None:
+            # Queued jobs are dropped (their heartbeat stops and the sweep fails them); running ones finish in their threads
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _sweep(self):
+        try:
+            stale = await asyncio.to_thread(self._db, self.repo.fail_stale, INGEST_STALE_SECONDS)
+            if stale:
+                print(f"[Ingest] Failed {stale} jobs whose node stopped heartbeating")
+        except Exception as e:
+            print(f"[Ingest] Could not sweep stale jobs: {e}")
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(self._db, self.repo.heartbeat, self.node_id)
+            except Exception as e:
+                print(f"[Ingest] Heartbeat failed: {e}")
+            await self._sweep()
+
+    # --- DB helpers ---
+
+    def _db(self, fn, *args, **kwargs):
+        db = SessionLocal()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    def _write(self, job_id: UUID, **fields):
+        self._db(self.repo.update, job_id, **fields)
+        self._notify(job_id)
+
+    # --- wake-ups for waiters on this node ---
+
+    def _notify(self, job_id: UUID):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake, job_id)
+
+    def _wake(self, job_id: UUID):
+        for event in self._subscribers.get(job_id, ()):
+            event.set()
+
+    @contextlib.contextmanager
+    def _subscription(self, job_id: UUID):
+        event = asyncio.Event()
+        self._subscribers.setdefault(job_id, set()).add(event)
+        try:
+            yield event
+        finally:
+            waiters = self._subscribers.get(job_id)
+            if waiters is not None:
+                waiters.discard(event)
+                if not waiters:
+                    del self._subscribers[job_id]
+
+    # --- jobs ---
+
+    def submit(self, user_id: UUID, url: str) -> Dict:
+        """Create a job for a TikTok link and start it in the background; returns the job"""
+        if self._executor is None:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Ingestion is not running")
+        job = self._db(
+            self.repo.create, user_id, url, [{"name": name, "status": "pending"} for name in STAGES], self.node_id
+        )
+        with self._lock:
+            self.submitted += 1
+        self._executor.submit(self._run, job.job_id, user_id, url)
+        return self._job_to_dict(job)
+
+    def _run(self, job_id: UUID, user_id: UUID, url: str):
+        with self._lock:
+            self.running += 1
+        progress = JobProgress(self, job_id)
+        db = SessionLocal()
+        try:
+            books = self.pipeline.get_book_from_tt(db, url, user_id, progress)
+            result = {"books": [book_to_dict(book) for book in books]}
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            self._write(job_id, status="failed", stage=None, stages=progress.snapshot(), error=str(e), finished_at=_now())
+            return
+        finally:
+            db.close()
+            with self._lock:
+                self.running -= 1
+
+        with self._lock:
+            self.completed += 1
+        self._write(job_id, status="done", stage=None, stages=progress.snapshot(), result=result, finished_at=_now())
+
+    def get_job(self, job_id: UUID, user_id: UUID) -> Dict:
+        job = self._db(self.repo.get, job_id, user_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        return self._job_to_dict(job)
+
+    def list_jobs(self, user_id: UUID) -> List[Dict]:
+        return [self._job_to_dict(job) for job in self._db(self.repo.list_for_user, user_id)]
+
+    def _job_to_dict(self, job: IngestJob) -> Dict:
+        state, error = job.status, job.error
+        if state not in FINISHED and job.heartbeat_at and _now() - job.heartbeat_at > timedelta(seconds=INGEST_STALE_SECONDS):
+            state, error = "failed", "interrupted"
+        finished = job.finished_at or (job.updated_at if state in FINISHED else None)
+        return {
+            "job_id": str(job.job_id),
+            "url": job.url,
+            "status": state,
+            "stage": job.stage if state not in FINISHED else None,
+            "stages": job.stages,
+            "result": job.result,
+            "error": error,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+            "finished_at": finished.isoformat() if finished else None,
+            "elapsed_ms": int(((finished or _now()) - job.created_at).total_seconds() * 1000) if job.created_at else None,
+        }
+
+    async def wait(self, job_id: UUID, user_id: UUID) -> Dict:
+        """The job once it has finished (done or failed)"""
+        with self._subscription(job_id) as changed:
+            while True:
+                changed.clear()
+                job = await asyncio.to_thread(self.get_job, job_id, user_id)
+                if job["status"] in FINISHED:
+                    return job
+                try:
+                    await asyncio.wait_for(changed.wait(), POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def progress_events(self, job_id: UUID, user_id: UUID) -> AsyncIterator[str]:
+        """
+        Server-sent events for one job: a `progress` event with the whole job each
+        time it changes, then a final `done` or `failed` event. Comment lines keep
+        idle connections open.
+        """
+        with self._subscription(job_id) as changed:
+            last = None
+            idle = 0.0
+            while True:
+                changed.clear()
+                job = await asyncio.to_thread(self.get_job, job_id, user_id)
+                view = {k: v for k, v in job.items() if k != "elapsed_ms"}
+                if view != last:
+                    last = view
+                    idle = 0.0
+                    yield f"event: progress\ndata: {json.dumps(job)}\n\n"
+                if job["status"] in FINISHED:
+                    yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    idle += POLL_SECONDS
+                    if idle >= KEEPALIVE_SECONDS:
+                        idle = 0.0
+                        yield ": keep-alive\n\n"
+
+    def stats(self) -> Dict:
+        return {
+            "started": self._executor is not None,
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "running": self.running,
+            "queued": self.submitted - self.running - self.completed - self.failed,
+            "completed": self.completed,
+            "failed": self.failed,
+            "streams": sum(len(waiters) for waiters in self._subscribers.values()),
+        }
+
+
+ingest_jobs = IngestJobService()
@@ -1,10 +1,19 @@
 import asyncio
-from typing import List, Dict, Optional
+import contextlib
+from typing import AsyncIterator, List, Dict, Optional, Sequence, Set, Tuple
 from ..util.get_book_status import get_book_status
 from ..util.find_libraries import find_libraries_near, match_library_system
+from ..util.availability_cache import availability_cache, edition_key, split_editions
+from ..util.library_directory import library_directory
+from ..util.single_flight import SingleFlight
+from ..util.scrape_queue import scrape_queue
+from ..util.system_controller import CircuitOpenError, system_controllers
+from ..util.branch_index import BranchIndex, normalize_branch_name
+from .google_books_service import edition_index
 import time
 import math
 import re
+import numpy as np
 
 # Fallback static library data (used if Overpass API fails)
 FALLBACK_LIBRARIES = [
@@ -253,7 +262,7 @@ FALLBACK_LIBRARIES = [
     {
         "id": "b1",
         "name": "Metrotown Library",
-        "library_id": "bpl",
+        "library_id": "burnaby",
         "latitude": 49.2276,
         "longitude": -123.0025,
         "type": "library",
@@ -264,7 +273,7 @@ FALLBACK_LIBRARIES = [
     {
         "id": "b2",
         "name": "Tommy Douglas Library",
-        "library_id": "bpl",
+        "library_id": "burnaby",
         "latitude": 49.2482,
         "longitude": -123.0205,
         "type": "library",
@@ -275,7 +284,7 @@ FALLBACK_LIBRARIES = [
     {
         "id": "b3",
         "name": "McGill Library",
-        "library_id": "bpl",
+        "library_id": "burnaby",
         "latitude": 49.2516,
         "longitude": -122.9847,
         "type": "library",
@@ -286,16 +295,6 @@ FALLBACK_LIBRARIES = [
 ]
 
 
-def normalize_branch_name(name: str) -> str:
-    """Normalize a branch name for comparison"""
-    # Lowercase, remove extra spaces
-    name = name.lower().strip()
-    name = re.sub(r'\s+', ' ', name)
-    # Remove common suffixes like "Branch Library", "Branch", "Library"
-    name = re.sub(r'\s*(branch\s+library|branch|library)\s*$', '', name)
-    return name.strip()
-
-
 def branch_matches(library: Dict, available_locations: List[str]) -> bool:
     """Check if any available location matches this library branch"""
     if not available_locations:
@@ -325,18 +324,42 @@ def branch_matches(library: Dict, available_locations: List[str]) -> bool:
 
         # Direct match
         if normalized_name in normalized_available:
-            print(f"  [MATCH] {library['name']} matched: '{normalized_name}' in available list")
             return True
 
         # Partial match (one contains the other)
         for avail in normalized_available:
             if avail and (avail in normalized_name or normalized_name in avail):
-                print(f"  [MATCH] {library['name']} matched: '{normalized_name}' <-> '{avail}'")
                 return True
 
     return False
 
 
+# One precompiled name index per library system, grown as new branches show up
+_branch_indexes: Dict[str, BranchIndex] = {}
+
+
+def available_branch_ids(library_id: str, libraries: List[Dict], availability: Optional[Dict]) -> Set[str]:
+    """
+    Ids of the given branches that appear in an availability result's location list.
+    Equivalent to calling branch_matches per branch, but the locations are normalized
+    once and matched against the system's whole index in a single pass.
+    """
+    if not availability or availability.get("not_found") or not availability.get("available_locations"):
+        return set()
+
+    index = _branch_indexes.get(library_id)
+    if index is None:
+        index = _branch_indexes[library_id] = BranchIndex()
+    for library in libraries:
+        index.add(library["id"], library)
+
+    wanted = {library["id"] for library in libraries}
+    matched = index.match(availability["available_locations"]) & wanted
+    if matched:
+        print(f"  [MATCH] {library_id.upper()}: {len(matched)} of {len(wanted)} nearby branches have it")
+    return matched
+
+
 def clean_isbn(isbn: str) -> str:
     """Remove dashes and spaces from ISBN"""
     return re.sub(r'[-\s]', '', isbn)
@@ -360,41 +383,96 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return R * c
 
 
+def calculate_distances(latitude: float, longitude: float, lats, lons) -> np.ndarray:
+    """Vectorized Haversine: distances in km from one point to every (lat, lon) pair"""
+    R = 6371  # Earth's radius in kilometers
+
+    lat1 = np.radians(latitude)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lons, dtype=np.float64) - longitude)
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+
+# Coordinates of the fallback set, so it can be filtered in one vectorized call
+FALLBACK_LATS = np.array([lib["latitude"] for lib in FALLBACK_LIBRARIES], dtype=np.float64)
+FALLBACK_LONS = np.array([lib["longitude"] for lib in FALLBACK_LIBRARIES], dtype=np.float64)
+
+
+def rank_libraries(results: List[Dict], top_k: Optional[int] = None) -> List[Dict]:
+    """
+    Order results by (available at this branch first, then distance) and keep the
+    best top_k. Uses argpartition so only the kept rows get fully sorted.
+    """
+    n = len(results)
+    if n == 0:
+        return []
+
+    distances = np.fromiter((r["distance_km"] for r in results), dtype=np.float64, count=n)
+    unavailable = np.fromiter(
+        (0.0 if r.get("available_at_this_branch") else 1.0 for r in results), dtype=np.float64, count=n
+    )
+    # Every unavailable row sorts after every available one
+    keys = unavailable * (distances.max() + 1.0) + distances
+
+    if top_k is not None and 0 < top_k < n:
+        idx = np.argpartition(keys, top_k - 1)[:top_k]
+        idx = idx[np.argsort(keys[idx], kind="stable")]
+    else:
+        idx = np.argsort(keys, kind="stable")
+    return [results[i] for i in idx]
+
+
 async def get_nearby_libraries(latitude: float, longitude: float, max_distance_km: float = 10.0) -> List[Dict]:
     """Get libraries within max_distance_km using OpenStreetMap data"""
     print(f"Searching for libraries near ({latitude}, {longitude}) within {max_distance_km}km")
 
-    # Try to get libraries from OpenStreetMap
+    # Local library directory first; only hit Overpass live if the area couldn't be filled
     try:
-        libraries = await find_libraries_near(latitude, longitude, max_distance_km)
+        libraries = await library_directory.candidates(latitude, longitude, max_distance_km)
     except Exception as e:
-        print(f"Error fetching from OpenStreetMap, using fallback: {e}")
-        libraries = []
+        print(f"Library directory lookup failed: {e}")
+        libraries = None
+
+    if libraries is None:
+        try:
+            libraries = await find_libraries_near(latitude, longitude, max_distance_km)
+        except Exception as e:
+            print(f"Error fetching from OpenStreetMap, using fallback: {e}")
+            libraries = []
 
     # If no libraries found, use fallback static data
     if not libraries:
         print("No libraries from OSM, using fallback data")
+        distances = calculate_distances(latitude, longitude, FALLBACK_LATS, FALLBACK_LONS)
         libraries = []
-        for lib in FALLBACK_LIBRARIES:
-            distance = calculate_distance(
-                latitude, longitude,
-                lib["latitude"], lib["longitude"]
-            )
-            if distance <= max_distance_km:
-                lib_copy = lib.copy()
-                lib_copy["distance_km"] = round(distance, 2)
-                lib_copy["branch_name"] = lib["name"].split(" - ")[-1] if " - " in lib["name"] else lib["name"]
-                libraries.append(lib_copy)
-
-    # Calculate distances for OSM results
+        for i in np.flatnonzero(distances <= max_distance_km):
+            lib = FALLBACK_LIBRARIES[i]
+            lib_copy = lib.copy()
+            lib_copy["branch_name"] = lib["name"].split(" - ")[-1] if " - " in lib["name"] else lib["name"]
+            libraries.append(lib_copy)
+
+    if not libraries:
+        print("Found 0 libraries")
+        return []
+
+    # One vectorized pass for every candidate; directory results are a bounding box,
+    # so this also trims the corners
+    distances = calculate_distances(
+        latitude, longitude,
+        [lib["latitude"] for lib in libraries],
+        [lib["longitude"] for lib in libraries],
+    )
+    in_range = np.flatnonzero(distances <= max_distance_km)
+    # Sort by distance
+    in_range = in_range[np.argsort(distances[in_range], kind="stable")]
+
     nearby = []
-    for lib in libraries:
-        if "distance_km" not in lib:
-            distance = calculate_distance(
-                latitude, longitude,
-                lib["latitude"], lib["longitude"]
-            )
-            lib["distance_km"] = round(distance, 2)
+    for i in in_range:
+        lib = libraries[i]
+        lib["distance_km"] = round(float(distances[i]), 2)
 
         # Generate a unique ID if not present
         if "id" not in lib:
@@ -404,19 +482,88 @@ async def get_nearby_libraries(latitude: float, longitude: float, max_distance_k
         print(f"  + {lib['name']}: {lib['distance_km']}km ({lib.get('library_id') or 'no system'})")
 
     print(f"Found {len(nearby)} libraries")
-
-    # Sort by distance
-    nearby.sort(key=lambda x: x["distance_km"])
     return nearby
 
 
+# Progressive discovery widens the search through these radii (km), then max_distance
+DEFAULT_RADIUS_STEPS = (2.0, 5.0, 10.0)
+
+
+def radius_schedule(max_distance_km: float, radius_steps: Optional[Sequence[float]] = None) -> List[float]:
+    """Increasing search radii below max_distance_km, always ending at max_distance_km"""
+    steps = radius_steps if radius_steps else DEFAULT_RADIUS_STEPS
+    return sorted({r for r in steps if 0 < r < max_distance_km}) + [max_distance_km]
+
+
+async def discover_libraries(
+    latitude: float, longitude: float, max_distance_km: float,
+    target_libraries: Optional[int] = None, radius_steps: Optional[Sequence[float]] = None,
+) -> Tuple[List[Dict], float]:
+    """
+    Nearby libraries and the radius they were found in.
+
+    Always one search at max_distance_km. With a target, the radius then grows
+    through radius_schedule() over those results and stops at the first step that
+    has at least target_libraries branches of tracked (bibliocommons) systems, so
+    dense areas scrape far less without costing an Overpass query per step.
+    """
+    nearby = await get_nearby_libraries(latitude, longitude, max_distance_km)
+    if not target_libraries:
+        return nearby, max_distance_km
+
+    distances = calculate_distances(
+        latitude, longitude,
+        [lib["latitude"] for lib in nearby],
+        [lib["longitude"] for lib in nearby],
+    )
+    tracked = np.fromiter((bool(lib.get("library_id")) for lib in nearby), dtype=bool, count=len(nearby))
+    for radius in radius_schedule(max_distance_km, radius_steps):
+        within = distances <= radius
+        found = int(np.count_nonzero(tracked & within))
+        if found >= target_libraries:
+            print(f"Progressive search: {found} tracked libraries within {radius}km, stopping")
+            break
+    return [nearby[i] for i in np.flatnonzero(within)], radius
+
+
+# Identical (library_id, isbn) checks in flight at the same time share one scrape
+availability_flight = SingleFlight("availability")
+
+
+async def controlled_availability(library_id: str, isbn: str) -> Optional[Dict]:
+    """
+    Check book availability under the system's controller (see system_controller).
+    Callers sharing a flight share its controller call, so one scrape takes one
+    concurrency slot and records one outcome however many requests wait on it.
+    Raises CircuitOpenError while the breaker is open, asyncio.TimeoutError on timeout.
+    """
+    key = (library_id.lower(), clean_isbn(isbn))
+    controller = system_controllers.get(library_id)
+    return await availability_flight.do(key, lambda: controller.call(lambda: _check_book_availability(library_id, isbn)))
+
+
 async def check_book_availability(library_id: str, isbn: str) -> Optional[Dict]:
-    """Check book availability at a library using bibliocommons"""
+    """Check book availability at a library using bibliocommons; None on failure"""
+    try:
+        return await controlled_availability(library_id, isbn)
+    except CircuitOpenError:
+        print(f"Not checking {library_id}: circuit open")
+        return None
+    except asyncio.TimeoutError:
+        print(f"Timed out getting availability for {library_id}")
+        return None
+
+
+async def _check_book_availability(library_id: str, isbn: str) -> Optional[Dict]:
     try:
         # Clean ISBN before searching
         cleaned_isbn = clean_isbn(isbn)
         print(f"Checking availability for ISBN {cleaned_isbn} at {library_id}")
-        status = await get_book_status(library_id, cleaned_isbn)
+        if scrape_queue.enabled:
+            # Shared with every other node: reuse a fresh result or wait for one scrape fleet-wide
+            status = await scrape_queue.submit(library_id, cleaned_isbn)
+        else:
+            status = await get_book_status(library_id, cleaned_isbn)
         print(f"Got status for {library_id}: {status}")
         return status
     except Exception as e:
@@ -424,9 +571,145 @@ async def check_book_availability(library_id: str, isbn: str) -> Optional[Dict]:
         return None
 
 
+async def resolve_editions(isbn: str) -> str:
+    """
+    Edition key for an ISBN and its sibling editions (see EditionIndex), checked
+    with one search per system. Just the ISBN when no siblings are known.
+    """
+    return edition_key(await asyncio.to_thread(edition_index.resolve, isbn))
+
+
 class LibraryService:
+    def _group_by_system(self, nearby_libraries: List[Dict]) -> Dict[str, List[Dict]]:
+        """Group libraries by bibliocommons library_id to avoid duplicate checks"""
+        library_groups: Dict[str, List[Dict]] = {}
+        for lib in nearby_libraries:
+            if lib["library_id"]:
+                if lib["library_id"] not in library_groups:
+                    library_groups[lib["library_id"]] = []
+                library_groups[lib["library_id"]].append(lib)
+        return library_groups
+
+    async def _check_system(
+        self, lib_id: str, cleaned_isbn: str, semaphore: Optional[asyncio.Semaphore] = None
+    ):
+        """
+        Check one bibliocommons system through the availability cache.
+        Returns (lib_id, availability or None, cache meta).
+
+        Concurrency, timeout and circuit breaking are per system (see
+        system_controller); `semaphore` optionally bounds the caller's own fan-out.
+        While a system's breaker is open, the last known answer is returned
+        (flagged stale) or, failing that, None with `system_unavailable` set.
+        """
+        controller = system_controllers.get(lib_id)
+
+        async def fetch():
+            async with semaphore or contextlib.nullcontext():
+                try:
+                    return await controlled_availability(lib_id, cleaned_isbn)
+                except CircuitOpenError:
+                    return None
+                except asyncio.TimeoutError:
+                    print(f"Timed out getting availability for {lib_id} after {controller.timeout():.1f}s")
+                    return None
+                except Exception as e:
+                    print(f"Failed to get availability for {lib_id}: {e}")
+                    return None
+
+        result, meta = await availability_cache.get_or_fetch(lib_id, cleaned_isbn, fetch)
+        if result is None and controller.is_open():
+            last_known = availability_cache.last_known(lib_id, cleaned_isbn)
+            if last_known is not None:
+                result, meta = last_known
+            meta = {**meta, "system_unavailable": True}
+        return lib_id, result, meta
+
+    def _branch_result(
+        self, library: Dict, library_id: str, availability: Optional[Dict], meta: Dict, available_ids: Set[str]
+    ) -> Dict:
+        """Build the response row for one branch of a tracked library system"""
+        result = {
+            "id": library.get("id", f"lib_{library['latitude']}_{library['longitude']}"),
+            "name": library["name"],
+            "latitude": library["latitude"],
+            "longitude": library["longitude"],
+            "type": library.get("type", "library"),
+            "city": library.get("city", ""),
+            "distance_km": library["distance_km"],
+            "library_system": library_id.upper(),
+            **meta,
+        }
+
+        if availability:
+            # Check if book was not found in catalog
+            if availability.get("not_found"):
+                result.update({
+                    "is_available": False,
+                    "available_locations": [],
+                    "holds": 0,
+                    "copies": 0,
+                    "on_order": 0,
+                    "status_text": "Not in catalog",
+                    "available_at_this_branch": False,
+                    "not_in_catalog": True,
+                })
+            else:
+                # Branch matching was done for the whole system up front
+                is_available_here = library["id"] in available_ids
+
+                result.update({
+                    "is_available": availability["is_available"],
+                    "available_locations": availability["available_locations"],
+                    "holds": availability["holds"],
+                    "copies": availability["copies"],
+                    "on_order": availability["on_order"],
+                    "status_text": availability.get("status_text", ""),
+                    "available_at_this_branch": is_available_here,
+                })
+                if availability.get("editions"):
+                    # Multi-edition lookup: the counts above are summed over these records
+                    result["editions"] = availability["editions"]
+        else:
+            result.update({
+                "is_available": False,
+                "available_locations": [],
+                "holds": 0,
+                "copies": 0,
+                "on_order": 0,
+                "status_text": (
+                    "Temporarily unavailable" if meta.get("system_unavailable") else "Could not check availability"
+                ),
+                "available_at_this_branch": False,
+                "error": True,
+            })
+
+        return result
+
+    def _untracked_result(self, lib: Dict) -> Dict:
+        """Libraries without bibliocommons (bookstores, etc.) - no availability check"""
+        return {
+            "id": lib.get("id", f"lib_{lib['latitude']}_{lib['longitude']}"),
+            "name": lib["name"],
+            "latitude": lib["latitude"],
+            "longitude": lib["longitude"],
+            "type": lib.get("type", "library"),
+            "city": lib.get("city", ""),
+            "distance_km": lib["distance_km"],
+            "library_system": None,
+            "is_available": None,  # Unknown - can't check this library
+            "available_locations": [],
+            "holds": 0,
+            "copies": 0,
+            "on_order": 0,
+            "status_text": "Not a tracked library system",
+            "available_at_this_branch": None,
+        }
+
     async def find_book_at_libraries(
-        self, isbn: str, latitude: float, longitude: float, max_distance_km: float = 12.5
+        self, isbn: str, latitude: float, longitude: float, max_distance_km: float = 12.5,
+        limit: Optional[int] = None, target_libraries: Optional[int] = None,
+        radius_steps: Optional[Sequence[float]] = None, all_editions: bool = False,
     ) -> List[Dict]:
         """
         Find nearby libraries and check book availability
@@ -436,6 +719,12 @@ class LibraryService:
             latitude: User's latitude
             longitude: User's longitude
             max_distance_km: Maximum distance to search (default: 20km)
+            limit: Only return the best N results (available first, then nearest)
+            target_libraries: Progressive search - stop widening the radius once this
+                many libraries of tracked systems are found (see discover_libraries)
+            radius_steps: Radii in km for the progressive search (default: 2, 5, 10)
+            all_editions: Also check the book's other editions (ISBN-10/13 and sibling
+                ISBNs from Google Books) and merge their counts per system
 
         Returns:
             List of libraries with availability information
@@ -443,126 +732,193 @@ class LibraryService:
         # Clean the ISBN
         cleaned_isbn = clean_isbn(isbn)
         print(f"Finding libraries for ISBN: {cleaned_isbn} near ({latitude}, {longitude})")
+        lookup_isbn = await resolve_editions(cleaned_isbn) if all_editions else cleaned_isbn
 
         # Get nearby libraries (now async - uses OpenStreetMap)
-        nearby_libraries = await get_nearby_libraries(latitude, longitude, max_distance_km)
+        nearby_libraries, _ = await discover_libraries(
+            latitude, longitude, max_distance_km, target_libraries, radius_steps
+        )
         print(f"Found {len(nearby_libraries)} nearby libraries")
 
-        # Group libraries by bibliocommons library_id to avoid duplicate checks
-        library_groups: Dict[str, List[Dict]] = {}
-        for lib in nearby_libraries:
-            if lib["library_id"]:
-                if lib["library_id"] not in library_groups:
-                    library_groups[lib["library_id"]] = []
-                library_groups[lib["library_id"]].append(lib)
-
+        # Libraries come sorted by distance, so systems are grouped (and scraped) nearest first
+        library_groups = self._group_by_system(nearby_libraries)
         print(f"Checking {len(library_groups)} library systems: {list(library_groups.keys())}")
 
         # Check availability for each unique bibliocommons library system in parallel
-        # Timeout is 25s since get_book_status now fails fast (~5s) for books not in catalog
-        # Successful scrapes need 15-20s to complete (search -> record page -> availability)
-        # Use gather + semaphore to avoid too many concurrent Playwright launches
+        # Each system has its own adaptive concurrency limit and circuit breaker
+        # Results go through the availability cache, so repeat lookups are served
+        # immediately (stale entries refresh in the background)
         availability_results: Dict[str, Optional[Dict]] = {}
-        semaphore = asyncio.Semaphore(5)
+        availability_meta: Dict[str, Dict] = {}
 
-        async def run_check(lib_id: str):
-            async with semaphore:
-                try:
-                    return lib_id, await asyncio.wait_for(
-                        check_book_availability(lib_id, cleaned_isbn),
-                        timeout=25.0,
-                    )
-                except Exception as e:
-                    print(f"Failed to get availability for {lib_id}: {e}")
-                    return lib_id, None
-
-        tasks = [run_check(library_id) for library_id in library_groups.keys()]
-        for lib_id, result in await asyncio.gather(*tasks):
+        tasks = [self._check_system(library_id, lookup_isbn) for library_id in library_groups.keys()]
+        for lib_id, result, meta in await asyncio.gather(*tasks):
             availability_results[lib_id] = result
+            availability_meta[lib_id] = meta
 
         # Build results for each branch
         results = []
         for library_id, libraries in library_groups.items():
             availability = availability_results.get(library_id)
-
+            meta = availability_meta.get(library_id, {})
+            available_ids = available_branch_ids(library_id, libraries, availability)
             for library in libraries:
-                result = {
-                    "id": library.get("id", f"lib_{library['latitude']}_{library['longitude']}"),
-                    "name": library["name"],
-                    "latitude": library["latitude"],
-                    "longitude": library["longitude"],
-                    "type": library.get("type", "library"),
-                    "city": library.get("city", ""),
-                    "distance_km": library["distance_km"],
-                    "library_system": library_id.upper(),
-                }
+                results.append(self._branch_result(library, library_id, availability, meta, available_ids))
 
-                if availability:
-                    # Check if book was not found in catalog
-                    if availability.get("not_found"):
-                        result.update({
-                            "is_available": False,
-                            "available_locations": [],
-                            "holds": 0,
-                            "copies": 0,
-                            "on_order": 0,
-                            "status_text": "Not in catalog",
-                            "available_at_this_branch": False,
-                            "not_in_catalog": True,
-                        })
-                    else:
-                        # Use the new branch_matches function for accurate matching
-                        is_available_here = branch_matches(library, availability["available_locations"])
-
-                        result.update({
-                            "is_available": availability["is_available"],
-                            "available_locations": availability["available_locations"],
-                            "holds": availability["holds"],
-                            "copies": availability["copies"],
-                            "on_order": availability["on_order"],
-                            "status_text": availability.get("status_text", ""),
-                            "available_at_this_branch": is_available_here,
-                        })
-                else:
-                    result.update({
-                        "is_available": False,
-                        "available_locations": [],
-                        "holds": 0,
-                        "copies": 0,
-                        "on_order": 0,
-                        "status_text": "Could not check availability",
-                        "available_at_this_branch": False,
-                        "error": True,
-                    })
-
-                results.append(result)
-
-        # Add libraries without bibliocommons (bookstores, etc.) - no availability check
         for lib in nearby_libraries:
             if not lib.get("library_id"):
-                results.append({
-                    "id": lib.get("id", f"lib_{lib['latitude']}_{lib['longitude']}"),
+                results.append(self._untracked_result(lib))
+
+        # Sort by: available at this branch first, then by distance
+        results = rank_libraries(results, limit)
+
+        print(f"Returning {len(results)} results")
+        return results
+
+    async def stream_book_at_libraries(
+        self, isbn: str, latitude: float, longitude: float, max_distance_km: float = 12.5,
+        limit: Optional[int] = None, target_libraries: Optional[int] = None,
+        radius_steps: Optional[Sequence[float]] = None, all_editions: bool = False,
+    ) -> AsyncIterator[Dict]:
+        """
+        Same lookup as find_book_at_libraries, but yields events as they become ready:
+
+        - "libraries": every nearby library with its distance, before any scraping
+        - "availability": one per library system, as soon as that system's check finishes
+        - "summary": the full sorted result list once every system is done
+        """
+        cleaned_isbn = clean_isbn(isbn)
+        lookup_isbn = await resolve_editions(cleaned_isbn) if all_editions else cleaned_isbn
+        nearby_libraries, radius_km = await discover_libraries(
+            latitude, longitude, max_distance_km, target_libraries, radius_steps
+        )
+        library_groups = self._group_by_system(nearby_libraries)
+
+        yield {
+            "event": "libraries",
+            "isbn": cleaned_isbn,
+            "editions": split_editions(lookup_isbn),
+            "radius_km": radius_km,
+            "count": len(nearby_libraries),
+            "library_systems": [lib_id.upper() for lib_id in library_groups.keys()],
+            "libraries": [
+                {
+                    "id": lib["id"],
                     "name": lib["name"],
                     "latitude": lib["latitude"],
                     "longitude": lib["longitude"],
-                    "type": lib.get("type", "library"),
                     "city": lib.get("city", ""),
                     "distance_km": lib["distance_km"],
-                    "library_system": None,
-                    "is_available": None,  # Unknown - can't check this library
-                    "available_locations": [],
-                    "holds": 0,
-                    "copies": 0,
-                    "on_order": 0,
-                    "status_text": "Not a tracked library system",
-                    "available_at_this_branch": None,
-                })
+                    "library_system": lib["library_id"].upper() if lib.get("library_id") else None,
+                }
+                for lib in nearby_libraries
+            ],
+        }
+
+        results = [self._untracked_result(lib) for lib in nearby_libraries if not lib.get("library_id")]
+        tasks = [
+            asyncio.create_task(self._check_system(library_id, lookup_isbn))
+            for library_id in library_groups.keys()
+        ]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                library_id, availability, meta = await next_done
+                available_ids = available_branch_ids(library_id, library_groups[library_id], availability)
+                branches = [
+                    self._branch_result(library, library_id, availability, meta, available_ids)
+                    for library in library_groups[library_id]
+                ]
+                results.extend(branches)
+                yield {
+                    "event": "availability",
+                    "library_system": library_id.upper(),
+                    "libraries": branches,
+                }
+        finally:
+            # Client went away mid-stream: stop any scrapes still waiting
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        results = rank_libraries(results, limit)
+        yield {
+            "event": "summary",
+            "isbn": cleaned_isbn,
+            "count": len(results),
+            "available_count": sum(1 for r in results if r.get("available_at_this_branch")),
+            "libraries": results,
+        }
+
+    async def find_books_at_libraries(
+        self, isbns: List[str], latitude: float, longitude: float, max_distance_km: float = 12.5,
+        concurrency: int = 5,
+    ) -> Dict:
+        """
+        Availability of several books at once (e.g. a whole TBR list).
 
-        # Sort by: available at this branch first, then by distance
-        results.sort(key=lambda x: (
-            0 if x.get("available_at_this_branch") else 1,
-            x["distance_km"]
+        Nearby libraries are resolved once and every ISBN x library system pair is
+        checked with bounded concurrency on the shared browser pool. Returns a compact
+        matrix: `libraries` is an indexed list of branches and each entry in `books`
+        lists the indexes of branches where that book is on the shelf.
+        """
+        cleaned_isbns = list(dict.fromkeys(clean_isbn(isbn) for isbn in isbns if isbn))
+        nearby_libraries = await get_nearby_libraries(latitude, longitude, max_distance_km)
+        library_groups = self._group_by_system(nearby_libraries)
+        print(f"Batch check: {len(cleaned_isbns)} books x {len(library_groups)} library systems")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def check_pair(isbn: str, lib_id: str):
+            _, availability, meta = await self._check_system(lib_id, isbn, semaphore)
+            return isbn, lib_id, availability, meta
+
+        pairs = await asyncio.gather(*(
+            check_pair(isbn, lib_id) for isbn in cleaned_isbns for lib_id in library_groups.keys()
         ))
 
-        print(f"Returning {len(results)} results")
-        return results
+        libraries = [
+            {
+                "id": lib["id"],
+                "name": lib["name"],
+                "latitude": lib["latitude"],
+                "longitude": lib["longitude"],
+                "distance_km": lib["distance_km"],
+                "library_system": lib["library_id"].upper() if lib.get("library_id") else None,
+            }
+            for lib in nearby_libraries
+        ]
+        index_of = {id(lib): i for i, lib in enumerate(nearby_libraries)}
+
+        books = {isbn: {"isbn": isbn, "available_at": [], "systems": {}} for isbn in cleaned_isbns}
+        for isbn, lib_id, availability, meta in pairs:
+            book = books[isbn]
+            if availability is None:
+                status = "temporarily_unavailable" if meta.get("system_unavailable") else "error"
+            elif availability.get("not_found"):
+                status = "not_in_catalog"
+            elif availability.get("is_available"):
+                status = "available"
+            else:
+                status = "unavailable"
+
+            book["systems"][lib_id.upper()] = {
+                "status": status,
+                "copies": availability.get("copies", 0) if availability else 0,
+                "holds": availability.get("holds", 0) if availability else 0,
+                **meta,
+            }
+
+            if status == "available":
+                available_ids = available_branch_ids(lib_id, library_groups[lib_id], availability)
+                for library in library_groups[lib_id]:
+                    if library["id"] in available_ids:
+                        book["available_at"].append(index_of[id(library)])
+
+        for book in books.values():
+            book["available_at"].sort(key=lambda i: libraries[i]["distance_km"])
+
+        return {
+            "libraries": libraries,
+            "books": list(books.values()),
+        }
@@ -0,0 +1,226 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from ..models.AvailabilitySnapshot import AvailabilitySnapshot
+from ..models.AvailabilityWatch import AvailabilityWatch
+from ..models.NotificationOutbox import NotificationOutbox
+from ..repository.watch_repository import WatchRepository
+from ..service.library_service import branch_matches, check_book_availability
+from ..util.availability_cache import normalize_isbn
+from ..util.db import SessionLocal
+from ..util.library_registry import library_registry
+
+# A watched (system, ISBN) pair is polled at most once per interval, however many users watch it
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "1800"))
+WATCH_SCHEDULER_ENABLED = os.getenv("WATCH_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+WATCH_BATCH_SIZE = int(os.getenv("WATCH_BATCH_SIZE", "20"))
+WATCH_CONCURRENCY = int(os.getenv("WATCH_CONCURRENCY", "3"))
+WATCH_TICK_SECONDS = 60.0
+
+
+def available_for_watch(branch_name: Optional[str], availability: Dict) -> bool:
+    """Whether the book is on the shelf for this watch: anywhere in the system, or at its branch"""
+    if availability.get("not_found") or not availability.get("is_available"):
+        return False
+    if branch_name is None:
+        return True
+    return branch_matches({"name": branch_name}, availability.get("available_locations") or [])
+
+
+def _snapshot_state(snapshot: Optional[AvailabilitySnapshot]) -> Optional[Dict]:
+    if snapshot is None or snapshot.checked_at is None:
+        return None
+    return {
+        "is_available": snapshot.is_available,
+        "available_locations": snapshot.available_locations or [],
+        "holds": snapshot.holds or 0,
+        "copies": snapshot.copies or 0,
+        "not_found": snapshot.not_found,
+    }
+
+
+def watch_deltas(watch: AvailabilityWatch, previous: Optional[Dict], current: Dict) -> List[NotificationOutbox]:
+    """
+    Outbox rows for what changed for one watch between two polls. The first poll
+    of a pair is the baseline and produces nothing.
+    """
+    if previous is None:
+        return []
+
+    payload = {
+        "isbn": watch.isbn,
+        "library_system": watch.library_id.upper(),
+        "branch_name": watch.branch_name,
+        "available_locations": current.get("available_locations") or [],
+        "holds": current.get("holds", 0),
+        "copies": current.get("copies", 0),
+    }
+    notifications = []
+
+    was_available = available_for_watch(watch.branch_name, previous)
+    is_available = available_for_watch(watch.branch_name, current)
+    if was_available != is_available:
+        notifications.append(NotificationOutbox(
+            user_id=watch.user_id, watch_id=watch.watch_id,
+            kind="became_available" if is_available else "no_longer_available",
+            payload=payload,
+        ))
+
+    if not current.get("not_found") and previous.get("holds", 0) != current.get("holds", 0):
+        notifications.append(NotificationOutbox(
+            user_id=watch.user_id, watch_id=watch.watch_id, kind="holds_changed",
+            payload={**payload, "previous_holds": previous.get("holds", 0)},
+        ))
+
+    return notifications
+
+
+class WatchService:
+    def __init__(self):
+        self.watch_repo = WatchRepository()
+
+    def add_watch(self, db: Session, user_id: UUID, isbn: str, library_system: str, branch_name: Optional[str]):
+        library_id = library_system.strip().lower()
+        if library_id not in library_registry.systems:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown library system: {library_system}",
+            )
+        branch_name = branch_name.strip() if branch_name and branch_name.strip() else None
+        watch = self.watch_repo.add(db, user_id, normalize_isbn(isbn), library_id, branch_name)
+        return self._watch_to_dict(watch, self.watch_repo.get_snapshot(db, library_id, watch.isbn))
+
+    def list_watches(self, db: Session, user_id: UUID) -> List[Dict]:
+        return [self._watch_to_dict(watch, snapshot) for watch, snapshot in self.watch_repo.list_for_user(db, user_id)]
+
+    def delete_watch(self, db: Session, user_id: UUID, watch_id: UUID):
+        if not self.watch_repo.delete(db, user_id, watch_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Watch not found")
+        return {"deleted": True}
+
+    def list_notifications(self, db: Session, user_id: UUID, undelivered_only: bool = False) -> List[Dict]:
+        return [
+            {
+                "notification_id": n.notification_id,
+                "watch_id": n.watch_id,
+                "kind": n.kind,
+                "payload": n.payload,
+                "created_at": n.created_at,
+                "delivered_at": n.delivered_at,
+            }
+            for n in self.watch_repo.list_notifications(db, user_id, undelivered_only)
+        ]
+
+    def mark_delivered(self, db: Session, user_id: UUID, notification_ids: List[UUID]):
+        updated = self.watch_repo.mark_delivered(db, user_id, notification_ids, datetime.now(timezone.utc))
+        return {"updated": updated}
+
+    def _watch_to_dict(self, watch: AvailabilityWatch, snapshot: Optional[AvailabilitySnapshot]) -> Dict:
+        state = _snapshot_state(snapshot)
+        return {
+            "watch_id": watch.watch_id,
+            "isbn": watch.isbn,
+            "library_system": watch.library_id.upper(),
+            "branch_name": watch.branch_name,
+            "created_at": watch.created_at,
+            "checked_at": snapshot.checked_at if snapshot else None,
+            "is_available": available_for_watch(watch.branch_name, state) if state else None,
+            "holds": state["holds"] if state else None,
+            "copies": state["copies"] if state else None,
+        }
+
+    # --- polling ---
+
+    def _record_poll(self, library_id: str, isbn: str, availability: Dict) -> int:
+        db = SessionLocal()
+        try:
+            previous = _snapshot_state(self.watch_repo.get_snapshot(db, library_id, isbn))
+            notifications = []
+            for watch in self.watch_repo.watches_for(db, library_id, isbn):
+                notifications.extend(watch_deltas(watch, previous, availability))
+            self.watch_repo.save_poll(db, library_id, isbn, availability, datetime.now(timezone.utc), notifications)
+            return len(notifications)
+        finally:
+            db.close()
+
+    async def poll_pair(self, library_id: str, isbn: str) -> int:
+        """Check one watched pair and write its deltas to the outbox; returns how many"""
+        availability = await check_book_availability(library_id, isbn)
+        if availability is None:
+            # Keep the old snapshot; the pair comes up again next interval
+            print(f"[Watch] Could not check {library_id}:{isbn}, keeping previous snapshot")
+            return 0
+        return await asyncio.to_thread(self._record_poll, library_id, isbn, availability)
+
+
+class WatchScheduler:
+    """
+    Background loop that claims due (system, ISBN) pairs from availability_snapshots
+    and polls them with bounded concurrency. Claiming moves next_poll_at forward
+    under SKIP LOCKED, so several API nodes can run the scheduler side by side.
+    """
+
+    def __init__(self, service: WatchService, enabled: bool = WATCH_SCHEDULER_ENABLED):
+        self.service = service
+        self.enabled = enabled
+        self._task: Optional[asyncio.Task] = None
+        self.polled = 0
+        self.notifications = 0
+
+    def _claim(self) -> List:
+        db = SessionLocal()
+        try:
+            return self.service.watch_repo.claim_due(db, WATCH_BATCH_SIZE, WATCH_POLL_INTERVAL)
+        finally:
+            db.close()
+
+    async def _run(self):
+        semaphore = asyncio.Semaphore(WATCH_CONCURRENCY)
+
+        async def poll(library_id: str, isbn: str):
+            async with semaphore:
+                try:
+                    self.notifications += await self.service.poll_pair(library_id, isbn)
+                    self.polled += 1
+                except Exception as e:
+                    print(f"[Watch] Poll failed for {library_id}:{isbn}: {e}")
+
+        while True:
+            try:
+                pairs = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                print(f"[Watch] Could not claim due watches: {e}")
+                pairs = []
+            if pairs:
+                await asyncio.gather(*(poll(library_id, isbn) for library_id, isbn in pairs))
+            if len(pairs) < WATCH_BATCH_SIZE:
+                await asyncio.sleep(WATCH_TICK_SECONDS)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print(f"[Watch] Scheduler started ({WATCH_POLL_INTERVAL:.0f}s per pair)")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "poll_interval_seconds": WATCH_POLL_INTERVAL,
+            "polled": self.polled,
+            "notifications": self.notifications,
+        }
+
+
+watch_service = WatchService()
+watch_scheduler = WatchScheduler(watch_service)
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+# TTLs in seconds (override via env)
+FOUND_TTL = float(os.getenv("AVAILABILITY_FOUND_TTL", "900"))          # 15 min - holds/copies drift
+NOT_FOUND_TTL = float(os.getenv("AVAILABILITY_NOT_FOUND_TTL", "21600"))  # 6 h - catalogs rarely change
+ERROR_TTL = float(os.getenv("AVAILABILITY_ERROR_TTL", "60"))           # 1 min - don't hammer a broken system
+# How long past its TTL an entry may still be served while it refreshes
+MAX_STALE = float(os.getenv("AVAILABILITY_MAX_STALE", "86400"))
+MAX_ENTRIES = int(os.getenv("AVAILABILITY_CACHE_SIZE", "5000"))
+
+
+# Several editions of one work are checked together under one key: their ISBNs joined by "+"
+EDITION_SEPARATOR = "+"
+
+
+def normalize_isbn(isbn: str) -> str:
+    """
+    Strip separators and fold ISBN-10 into ISBN-13 so both spellings share a key.
+    An edition key is normalized part by part.
+    """
+    if EDITION_SEPARATOR in isbn:
+        return edition_key(isbn.split(EDITION_SEPARATOR))
+    cleaned = re.sub(r"[^0-9Xx]", "", isbn).upper()
+    if len(cleaned) == 10 and cleaned[:9].isdigit():
+        core = "978" + cleaned[:9]
+        total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(core))
+        return core + str((10 - total % 10) % 10)
+    return cleaned
+
+
+def isbn13_to_10(isbn: str) -> Optional[str]:
+    """ISBN-10 spelling of a 978-prefixed ISBN-13 (None if it has none)"""
+    if len(isbn) != 13 or not isbn.startswith("978") or not isbn.isdigit():
+        return None
+    core = isbn[3:12]
+    check = (11 - sum(int(d) * (10 - i) for i, d in enumerate(core)) % 11) % 11
+    return core + ("X" if check == 10 else str(check))
+
+
+def edition_key(isbns: Iterable[str]) -> str:
+    """Key for a set of editions: normalized, de-duplicated ISBNs (first one is the primary)"""
+    normalized = (normalize_isbn(isbn) for isbn in isbns if isbn and isbn.strip())
+    return EDITION_SEPARATOR.join(dict.fromkeys(n for n in normalized if n))
+
+
+def split_editions(isbn: str) -> List[str]:
+    """The ISBNs of an edition key (a plain ISBN is a key of one)"""
+    return [part for part in isbn.split(EDITION_SEPARATOR) if part]
+
+
+class _Entry:
+    __slots__ = ("result", "checked_at", "expires_at", "last_good")
+
+    def __init__(self, result: Optional[Dict], checked_at: float, ttl: float):
+        self.result = result
+        self.checked_at = checked_at
+        self.expires_at = checked_at + ttl
+        # Error entries remember the last real answer (see last_known)
+        self.last_good: Optional["_Entry"] = None
+
+
+class AvailabilityCache:
+    """
+    Bounded LRU of availability results keyed by (library_id, normalized ISBN).
+
+    Fresh entries are served directly. Expired entries still inside MAX_STALE
+    are served immediately (flagged stale) while a single background refresh
+    replaces them. Found, not-found and error (None) results get their own TTLs.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        found_ttl: float = FOUND_TTL,
+        not_found_ttl: float = NOT_FOUND_TTL,
+        error_ttl: float = ERROR_TTL,
+        max_stale: float = MAX_STALE,
+    ):
+        self.max_entries = max_entries
+        self.found_ttl = found_ttl
+        self.not_found_ttl = not_found_ttl
+        self.error_ttl = error_ttl
+        self.max_stale = max_stale
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _key(self, library_id: str, isbn: str) -> Tuple[str, str]:
+        return library_id.lower(), normalize_isbn(isbn)
+
+    def _ttl_for(self, result: Optional[Dict]) -> float:
+        if result is None:
+            return self.error_ttl
+        if result.get("not_found"):
+            return self.not_found_ttl
+        return self.found_ttl
+
+    def _store(self, key: Tuple[str, str], result: Optional[Dict]) -> _Entry:
+        entry = _Entry(result, time.time(), self._ttl_for(result))
+        previous = self._entries.get(key)
+        if result is None and previous is not None:
+            entry.last_good = previous if previous.result is not None else previous.last_good
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _meta(entry: _Entry, stale: bool) -> Dict:
+        return {
+            "checked_at": datetime.fromtimestamp(entry.checked_at, tz=timezone.utc).isoformat(),
+            "age_seconds": int(time.time() - entry.checked_at),
+            "stale": stale,
+        }
+
+    def _refresh_in_background(self, key, fetch: Callable[[], Awaitable[Optional[Dict]]]):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                result = await fetch()
+                # A failed refresh keeps the stale answer rather than replacing it with an error
+                if result is not None or key not in self._entries:
+                    self._store(key, result)
+            except Exception as e:
+                print(f"Background availability refresh failed for {key}: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    async def get_or_fetch(
+        self, library_id: str, isbn: str, fetch: Callable[[], Awaitable[Optional[Dict]]]
+    ) -> Tuple[Optional[Dict], Dict]:
+        """
+        Return (result, meta) where meta carries checked_at / age_seconds / stale.
+        `fetch` should return None on failure rather than raise.
+        """
+        key = self._key(library_id, isbn)
+        now = time.time()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if now < entry.expires_at:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.result, self._meta(entry, stale=False)
+
+            # Never serve a stale error; those are cheap to retry
+            if entry.result is not None and now < entry.expires_at + self.max_stale:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._refresh_in_background(key, fetch)
+                return entry.result, self._meta(entry, stale=True)
+
+        self.misses += 1
+        entry = self._store(key, await fetch())
+        return entry.result, self._meta(entry, stale=False)
+
+    def last_known(self, library_id: str, isbn: str) -> Optional[Tuple[Dict, Dict]]:
+        """Most recent real (non-error) result regardless of age, flagged stale"""
+        entry = self._entries.get(self._key(library_id, isbn))
+        if entry is not None and entry.result is None:
+            entry = entry.last_good
+        if entry is None:
+            return None
+        return entry.result, self._meta(entry, stale=True)
+
+    def invalidate(self, library_id: str, isbn: str):
+        self._entries.pop(self._key(library_id, isbn), None)
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshing": len(self._refreshing),
+        }
+
+
+availability_cache = AvailabilityCache()
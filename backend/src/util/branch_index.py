@@ -0,0 +1,148 @@
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Set
+
+_WHITESPACE = re.compile(r"\s+")
+_BRANCH_SUFFIX = re.compile(r"\s*(branch\s+library|branch|library)\s*$")
+# Never appears in a normalized name, so joined strings can't match across entries
+_SEP = "\x00"
+
+
+def normalize_branch_name(name: str) -> str:
+    """Normalize a branch name for comparison"""
+    # Lowercase, remove extra spaces
+    name = name.lower().strip()
+    name = _WHITESPACE.sub(" ", name)
+    # Remove common suffixes like "Branch Library", "Branch", "Library"
+    name = _BRANCH_SUFFIX.sub("", name)
+    return name.strip()
+
+
+def branch_names(library: Dict) -> List[str]:
+    """Every name a branch may appear under: full name, branch name and static aliases"""
+    names = [library["name"]]
+    if "branch_name" in library:
+        names.append(library["branch_name"])
+    names.extend(library.get("branch_aliases", []))
+    return names
+
+
+class BranchIndex:
+    """
+    Branch names of one library system, normalized once and packed into a single
+    separator-joined string.
+
+    A scraped location matches a branch when either normalized name contains the
+    other (same rule as branch_matches). Instead of comparing every name with every
+    location, `match` does one substring search per location against the packed
+    names and one per name against the packed locations.
+    """
+
+    def __init__(self):
+        self._names: List[str] = []        # normalized, deduplicated
+        self._owners: List[Set[str]] = []  # branch ids per name
+        self._position: Dict[str, int] = {}
+        self._branch_ids: Set[str] = set()
+        self._packed = ""
+        self._starts: List[int] = []
+        self._dirty = False
+
+    def add(self, branch_id: str, library: Dict):
+        if branch_id in self._branch_ids:
+            return
+        self._branch_ids.add(branch_id)
+        for name in branch_names(library):
+            normalized = normalize_branch_name(name)
+            if not normalized:
+                continue
+            i = self._position.get(normalized)
+            if i is None:
+                i = len(self._names)
+                self._position[normalized] = i
+                self._names.append(normalized)
+                self._owners.append(set())
+                self._dirty = True
+            self._owners[i].add(branch_id)
+
+    def _pack(self):
+        self._starts = []
+        offset = 0
+        for name in self._names:
+            self._starts.append(offset)
+            offset += len(name) + 1
+        self._packed = _SEP.join(self._names)
+        self._dirty = False
+
+    def match(self, available_locations: Iterable[str]) -> Set[str]:
+        """Branch ids with at least one available location, in one pass over the list"""
+        normalized = {normalize_branch_name(loc) for loc in available_locations}
+        normalized.discard("")
+        if not normalized or not self._names:
+            return set()
+        if self._dirty:
+            self._pack()
+
+        matched: Set[str] = set()
+
+        # location contained in (or equal to) a branch name
+        for avail in normalized:
+            start = self._packed.find(avail)
+            while start != -1:
+                matched |= self._owners[bisect_right(self._starts, start) - 1]
+                start = self._packed.find(avail, start + 1)
+
+        # branch name contained in a location
+        packed_available = _SEP.join(normalized)
+        for i, name in enumerate(self._names):
+            if name in packed_available:
+                matched |= self._owners[i]
+
+        return matched
+
+
+def _benchmark(branches: int = 40, locations: int = 60, runs: int = 2000):
+    """
+    Microbenchmark against the per-branch branch_matches loop: a synthetic system
+    of `branches` branches and `locations` available locations, and the VPL
+    branches of the static fallback list against their own names.
+    """
+    import time
+    from ..service.library_service import FALLBACK_LIBRARIES, branch_matches
+
+    synthetic = [
+        {"id": str(i), "name": f"Branch {i} Library", "branch_name": f"Branch {i}",
+         "branch_aliases": [f"branch {i} branch", f"alias {i}"]}
+        for i in range(branches)
+    ]
+    vpl = [lib for lib in FALLBACK_LIBRARIES if lib.get("library_id") == "vpl"]
+    cases = {
+        f"synthetic ({branches} branches, {locations} locations)": (
+            synthetic, [f"Branch {i * 3} Branch Library" for i in range(locations)]
+        ),
+        f"VPL fallback ({len(vpl)} branches, {len(vpl)} locations)": (
+            vpl, [lib["name"].replace(" Library", "") for lib in vpl]
+        ),
+    }
+
+    for label, (libraries, available) in cases.items():
+        start = time.perf_counter()
+        for _ in range(runs):
+            naive = {lib["id"] for lib in libraries if branch_matches(lib, available)}
+        naive_time = time.perf_counter() - start
+
+        index = BranchIndex()
+        for lib in libraries:
+            index.add(lib["id"], lib)
+        start = time.perf_counter()
+        for _ in range(runs):
+            indexed = index.match(available)
+        indexed_time = time.perf_counter() - start
+
+        assert naive == indexed
+        print(f"{label}:")
+        print(f"  branch_matches loop: {naive_time / runs * 1e6:.1f}us per result")
+        print(f"  BranchIndex.match:   {indexed_time / runs * 1e6:.1f}us per result")
+
+
+if __name__ == "__main__":
+    _benchmark()
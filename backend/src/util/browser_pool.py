@@ -0,0 +1,162 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+
+# Pool tuning (override via env)
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "5"))
+BROWSER_CONTEXT_MAX_USES = int(os.getenv("BROWSER_CONTEXT_MAX_USES", "25"))
+BROWSER_REUSE_PAGES = os.getenv("BROWSER_REUSE_PAGES", "true").lower() in ("1", "true", "yes")
+
+
+class _Slot:
+    """One recycled browser context (and its page) handed out by the pool."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.context = None
+        self.page = None
+        self.uses = 0
+
+
+class BrowserPool:
+    """
+    Long-lived headless Chromium shared by every Bibliocommons scrape.
+
+    The pool owns a single browser and `size` slots, each wrapping a browser
+    context. Borrowers get a ready page; a slot's context is recycled after
+    `max_uses` borrows or as soon as a scrape on it fails, and the browser is
+    relaunched if it has crashed or disconnected.
+    """
+
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        max_uses: int = BROWSER_CONTEXT_MAX_USES,
+        reuse_pages: bool = BROWSER_REUSE_PAGES,
+    ):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.reuse_pages = reuse_pages
+        self._playwright = None
+        self._browser = None
+        self._slots = None
+        self._start_lock = asyncio.Lock()
+        self._launch_lock = asyncio.Lock()
+        self.started = False
+        self.relaunches = 0
+        self.recycled_contexts = 0
+
+    async def start(self):
+        async with self._start_lock:
+            if self.started:
+                return
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._slots = asyncio.Queue()
+            for i in range(self.size):
+                self._slots.put_nowait(_Slot(i))
+            self.started = True
+            print(f"[BrowserPool] Started with {self.size} contexts (max {self.max_uses} uses each)")
+
+    async def close(self):
+        async with self._start_lock:
+            if not self.started:
+                return
+            self.started = False
+            while not self._slots.empty():
+                await self._reset_slot(self._slots.get_nowait())
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            await self._playwright.stop()
+            self._browser = None
+            self._playwright = None
+            print("[BrowserPool] Closed")
+
+    async def _ensure_browser(self):
+        """Relaunch Chromium if it crashed or got disconnected."""
+        async with self._launch_lock:
+            if self._browser and self._browser.is_connected():
+                return
+            print("[BrowserPool] Browser is not connected, relaunching")
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self.relaunches += 1
+
+    async def _reset_slot(self, slot: _Slot):
+        if slot.context is not None:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+            self.recycled_contexts += 1
+        slot.context = None
+        slot.page = None
+        slot.uses = 0
+
+    async def _prepare(self, slot: _Slot):
+        await self._ensure_browser()
+
+        # Contexts from a previous (crashed) browser or past their use budget are dropped
+        if slot.context is not None and (
+            slot.uses >= self.max_uses or slot.context.browser is not self._browser
+        ):
+            await self._reset_slot(slot)
+
+        if slot.context is None:
+            slot.context = await self._browser.new_context()
+
+        if slot.page is None or slot.page.is_closed():
+            slot.page = await slot.context.new_page()
+
+        slot.uses += 1
+        return slot.page
+
+    @asynccontextmanager
+    async def page(self):
+        """Borrow a page for one scrape; it goes back to the pool on exit."""
+        if not self.started:
+            await self.start()
+
+        slot = await self._slots.get()
+        try:
+            try:
+                page = await self._prepare(slot)
+            except Exception:
+                await self._reset_slot(slot)
+                raise
+
+            try:
+                yield page
+            except BaseException:
+                # Page state is unknown after a failed scrape, start fresh next time
+                await self._reset_slot(slot)
+                raise
+
+            if not self.reuse_pages and slot.page is not None:
+                try:
+                    await slot.page.close()
+                except Exception:
+                    pass
+                slot.page = None
+        finally:
+            self._slots.put_nowait(slot)
+
+    def stats(self):
+        return {
+            "started": self.started,
+            "size": self.size,
+            "idle": self._slots.qsize() if self._slots else 0,
+            "max_uses": self.max_uses,
+            "reuse_pages": self.reuse_pages,
+            "relaunches": self.relaunches,
+            "recycled_contexts": self.recycled_contexts,
+        }
+
+
+browser_pool = BrowserPool()
@@ -33,16 +33,56 @@ async def lifespan(app):
     if not dsn:
         raise RuntimeError("DATABASE_URL environment variable is not set")
 
+    # Imported here since these modules need SessionLocal from this module
+    from .library_directory import library_directory
+    from .browser_pool import browser_pool
+    from .scraper_workers import scraper_workers
+    from .scrape_queue import scrape_queue
+    from .get_book_status import close_http_client, get_book_status
+    from .find_libraries import close_overpass_client
+    from ..service.watch_service import watch_scheduler
+    from ..service.ingest_job_service import ingest_jobs
+    await library_directory.load()
+    # Background TikTok ingestion (download/transcribe/extract run in its thread pool)
+    await ingest_jobs.start()
+
     # Skip async pool on Windows (Proactor loop issue); fallback to sync engine
     if os.name == "nt":
         app.state.pool = None
-        yield
+        try:
+            yield
+        finally:
+            await ingest_jobs.close()
         return
 
     pool = AsyncConnectionPool(dsn, min_size=1, max_size=10)
     await pool.open()
     app.state.pool = pool
+
+    # Scrapes run in worker processes when enabled, each with its own browser pool;
+    # otherwise warm the in-process Chromium pool so the first scrape doesn't pay for a launch
+    if scraper_workers.enabled:
+        await scraper_workers.start()
+    else:
+        try:
+            await browser_pool.start()
+        except Exception as e:
+            print(f"Browser pool failed to start, will retry on first scrape: {e}")
+    app.state.browser_pool = browser_pool
+    app.state.scraper_workers = scraper_workers
+
+    # Multi-node: claim shared scrape jobs from Postgres (no-op unless SCRAPE_QUEUE_ENABLED)
+    await scrape_queue.start(get_book_status)
+    watch_scheduler.start()
+
     try:
         yield
     finally:
+        await ingest_jobs.close()
+        await watch_scheduler.close()
+        await scrape_queue.close()
+        await scraper_workers.close()
+        await browser_pool.close()
+        await close_http_client()
+        await close_overpass_client()
         await pool.close()
@@ -1,9 +1,35 @@
 import yt_dlp
+import httpx
 import os
+import shutil
+import subprocess
+import tempfile
+import time
+from typing import Dict, Optional
 
 output_dir = os.path.join("..", "audiosaves")
 
+# Compact path: speech only needs mono 16 kHz; Opus at 24 kbps (or lossless FLAC) is
+# a fraction of the size of the old 192 kbps WAV
+AUDIO_CODEC = os.getenv("TRANSCRIBE_AUDIO_CODEC", "opus")  # opus | flac
+AUDIO_SAMPLE_RATE = 16000
+OPUS_BITRATE = "24k"
+# Audio is kept in memory up to this size, then spills to an anonymous temp file
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+# Audio-only streams in these formats are uploaded as they are, without re-encoding
+NATIVE_AUDIO_EXTS = {"m4a": "audio/mp4", "mp3": "audio/mpeg", "opus": "audio/ogg", "ogg": "audio/ogg", "webm": "audio/webm"}
+ENCODED_FORMATS = {
+    "opus": ("ogg", "audio/ogg", ["-c:a", "libopus", "-b:a", OPUS_BITRATE, "-application", "voip"]),
+    "flac": ("flac", "audio/flac", ["-c:a", "flac"]),
+}
+CHUNK_BYTES = 64 * 1024
+
+
 def download_tiktok_audio(url: str) -> str:
+    """
+    Legacy path: download and convert to a 192 kbps WAV under ../audiosaves.
+    Kept for comparison (see benchmark); ingestion uses fetch_tiktok_audio.
+    """
     os.makedirs(output_dir, exist_ok=True)
 
     ydl_opts = {
@@ -21,4 +47,185 @@ def download_tiktok_audio(url: str) -> str:
         info = ydl.extract_info(url, download=True)
         filename = f"{info['id']}.wav"
         print(os.path.join(output_dir, filename))
-        return os.path.join(output_dir, filename)
\ No newline at end of file
+        return os.path.join(output_dir, filename)
+
+
+class AudioClip:
+    """
+    Audio for one video, held in a SpooledTemporaryFile (memory, spilling to an
+    anonymous temp file that is gone once closed). Use as a context manager.
+    """
+
+    def __init__(self, file, filename: str, mime_type: str, transcoded: bool, timings: Dict[str, int]):
+        self.file = file
+        self.filename = filename
+        self.mime_type = mime_type
+        self.transcoded = transcoded
+        self.timings = timings
+        file.seek(0, os.SEEK_END)
+        self.size = file.tell()
+        file.seek(0)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def describe(self) -> str:
+        how = "transcoded" if self.transcoded else "native"
+        return f"{self.size / 1024:.0f} KB {self.filename.rsplit('.', 1)[-1]} ({how})"
+
+
+def _stream_headers(info: Dict) -> Dict[str, str]:
+    headers = dict(info.get("http_headers") or {})
+    if info.get("cookies"):
+        headers["Cookie"] = info["cookies"]
+    return headers
+
+
+def _select_stream(info: Dict) -> Optional[Dict]:
+    """The single-URL format yt-dlp picked for 'bestaudio/best' (None for split DASH formats)"""
+    if info.get("url"):
+        return info
+    formats = info.get("requested_formats")
+    if formats and len(formats) == 1 and formats[0].get("url"):
+        return formats[0]
+    return None
+
+
+def _copy_native(stream: Dict, spool) -> None:
+    """Fetch an audio-only stream as-is"""
+    with httpx.stream("GET", stream["url"], headers=_stream_headers(stream), follow_redirects=True, timeout=30.0) as response:
+        response.raise_for_status()
+        for chunk in response.iter_bytes(CHUNK_BYTES):
+            spool.write(chunk)
+
+
+def _transcode(source: str, headers: Dict[str, str], spool) -> None:
+    """Decode `source` (URL or path), drop video and write mono 16 kHz audio to the spool"""
+    container, _, codec_args = ENCODED_FORMATS[AUDIO_CODEC]
+    # -xerror: a broken input fails the run instead of exiting 0 with empty output
+    command = ["ffmpeg", "-nostdin", "-xerror", "-loglevel", "error"]
+    if headers:
+        command += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+    command += ["-i", source, "-vn", "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE), *codec_args, "-f", container, "pipe:1"]
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for chunk in iter(lambda: process.stdout.read(CHUNK_BYTES), b""):
+            spool.write(chunk)
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed ({process.returncode}): {stderr.decode(errors='replace').strip()[-500:]}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def _download_and_transcode(url: str, spool) -> None:
+    """Let yt-dlp download the stream into a temporary directory, transcode it, remove the directory"""
+    workdir = tempfile.mkdtemp(prefix="tiktok-audio-")
+    try:
+        with yt_dlp.YoutubeDL({
+            "format": "bestaudio/best",
+            "outtmpl": os.path.join(workdir, "%(id)s.%(ext)s"),
+            "quiet": True,
+        }) as ydl:
+            downloaded = ydl.prepare_filename(ydl.extract_info(url, download=True))
+        _transcode(downloaded, {}, spool)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def fetch_tiktok_audio(url: str) -> AudioClip:
+    """
+    Audio of a TikTok video for transcription, without a permanent file.
+
+    yt-dlp only resolves the stream. An audio-only stream in a format the
+    transcriber accepts is fetched as-is; anything else (TikTok usually serves
+    muxed MP4) is piped through ffmpeg straight from the URL to mono 16 kHz
+    Opus/FLAC. Split audio/video formats, or a URL ffmpeg can't stream, fall back
+    to a yt-dlp download into a temporary directory that is removed afterwards.
+    """
+    timings: Dict[str, int] = {}
+    start = time.monotonic()
+    with yt_dlp.YoutubeDL({"format": "bestaudio/best", "quiet": True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    timings["resolve_ms"] = int((time.monotonic() - start) * 1000)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    start = time.monotonic()
+    try:
+        stream = _select_stream(info)
+        ext = (stream or {}).get("ext") or ""
+        container, mime_type, _ = ENCODED_FORMATS[AUDIO_CODEC]
+        transcoded = True
+
+        if stream and stream.get("vcodec") in (None, "none") and ext in NATIVE_AUDIO_EXTS:
+            _copy_native(stream, spool)
+            container, mime_type, transcoded = ext, NATIVE_AUDIO_EXTS[ext], False
+        elif stream:
+            try:
+                _transcode(stream["url"], _stream_headers(stream), spool)
+            except RuntimeError as e:
+                print(f"[Audio] Could not transcode {url} from its stream, downloading instead: {e}")
+                spool.seek(0)
+                spool.truncate()
+                _download_and_transcode(url, spool)
+        else:
+            _download_and_transcode(url, spool)
+    except Exception:
+        spool.close()
+        raise
+    timings["fetch_ms"] = int((time.monotonic() - start) * 1000)
+
+    clip = AudioClip(spool, f"{info.get('id') or 'audio'}.{container}", mime_type, transcoded, timings)
+    print(f"[Audio] {url}: {clip.describe()} in {timings['resolve_ms'] + timings['fetch_ms']}ms")
+    return clip
+
+
+def benchmark(url: str):
+    """
+    Compare the legacy WAV path with fetch_tiktok_audio for one video: bytes that
+    would be uploaded and download/convert latency. With --transcribe, the
+    ElevenLabs upload+transcription of each is timed too (uses API credits).
+    """
+    import sys
+    from .elevenlabs_client import ElevenLabsClient
+
+    transcribe = "--transcribe" in sys.argv
+    client = ElevenLabsClient()
+
+    start = time.monotonic()
+    wav_path = download_tiktok_audio(url)
+    wav_ms = int((time.monotonic() - start) * 1000)
+    wav_bytes = os.path.getsize(wav_path)
+    try:
+        if transcribe:
+            start = time.monotonic()
+            client.transcribe(wav_path)
+            print(f"WAV transcribe: {int((time.monotonic() - start) * 1000)}ms")
+    finally:
+        os.remove(wav_path)
+    print(f"WAV (192k):      {wav_bytes:>10,} bytes, download+convert {wav_ms}ms")
+
+    start = time.monotonic()
+    with fetch_tiktok_audio(url) as clip:
+        clip_ms = int((time.monotonic() - start) * 1000)
+        if transcribe:
+            start = time.monotonic()
+            client.transcribe(clip)
+            print(f"Compact transcribe: {int((time.monotonic() - start) * 1000)}ms")
+        print(f"Compact ({clip.describe()}): {clip.size:>10,} bytes, fetch {clip_ms}ms "
+              f"({wav_bytes / max(clip.size, 1):.0f}x smaller)")
+
+
+if __name__ == "__main__":
+    import sys
+    # python -m src.util.download <tiktok url> [--transcribe]
+    benchmark(sys.argv[1])
@@ -8,20 +8,30 @@ class ElevenLabsClient:
         # Use provided api_key, or get from environment variable
         self.base_url = "https://api.elevenlabs.io/v1"
     
-    def transcribe(self, wav_file_path, model_id='scribe_v1'):
-        """Transcribe audio file to text"""
+    def transcribe(self, audio, model_id='scribe_v1'):
+        """
+        Transcribe audio to text. `audio` is a file path or an AudioClip
+        (util.download), which is uploaded straight from its in-memory spool.
+        """
         url = f"{self.base_url}/speech-to-text"
         
         headers = {
             "xi-api-key": api_key
         }
+        data = {
+            'model_id': model_id
+        }
         
-        with open(wav_file_path, 'rb') as f:
+        if isinstance(audio, (str, os.PathLike)):
+            with open(audio, 'rb') as f:
+                files = {
+                    'file': f
+                }
+                response = requests.post(url, headers=headers, files=files, data=data)
+        else:
+            audio.file.seek(0)
             files = {
-                'file': f
-            }
-            data = {
-                'model_id': model_id
+                'file': (audio.filename, audio.file, audio.mime_type)
             }
             response = requests.post(url, headers=headers, files=files, data=data)
         
@@ -1,43 +1,16 @@
 import httpx
 import asyncio
-from typing import List, Dict, Optional
+import math
+import time
+from collections import deque
+from typing import List, Dict, Optional, Tuple
 import re
+from .library_registry import library_registry
+from .single_flight import SingleFlight
 
-# Map library names to bibliocommons IDs
-BIBLIOCOMMONS_SYSTEMS = {
-    "vancouver public library": "vpl",
-    "vpl": "vpl",
-    "richmond public library": "rpl",
-    "rpl": "rpl",
-    "burnaby public library": "bpl",
-    "bpl": "bpl",
-    "surrey libraries": "spl",
-    "north vancouver district public library": "nvdpl",
-    "west vancouver memorial library": "wvml",
-    "coquitlam public library": "coqlib",
-    "new westminster public library": "nwpl",
-    # Add more as needed
-}
-
-
-def match_library_system(name: str) -> Optional[str]:
-    """Try to match a library name to a bibliocommons system ID"""
-    name_lower = name.lower()
-
-    # Direct matches
-    for key, system_id in BIBLIOCOMMONS_SYSTEMS.items():
-        if key in name_lower:
-            return system_id
-
-    # Check for city-based matches
-    if "vancouver" in name_lower and "north" not in name_lower and "west" not in name_lower:
-        return "vpl"
-    if "richmond" in name_lower:
-        return "rpl"
-    if "burnaby" in name_lower:
-        return "bpl"
-
-    return None
+def match_library_system(name: str, latitude: Optional[float] = None, longitude: Optional[float] = None) -> Optional[str]:
+    """Try to match a library name to a bibliocommons system ID (see library_registry)"""
+    return library_registry.match(name, latitude, longitude)
 
 
 OVERPASS_ENDPOINTS = [
@@ -47,53 +20,209 @@ OVERPASS_ENDPOINTS = [
 ]
 
 
-async def find_libraries_near(latitude: float, longitude: float, radius_km: float = 10.0) -> List[Dict]:
-    """
-    Find libraries near a location using OpenStreetMap Overpass API.
-    Returns a list of libraries with name, coordinates, and matched bibliocommons system.
-    """
-    radius_m = int(radius_km * 1000)
+# Hedging: if a mirror hasn't answered within HEDGE_FACTOR x its recent p50, the next
+# mirror gets the same query and the first good answer wins
+HEDGE_FACTOR = 1.5
+HEDGE_DEFAULT_DELAY = 2.0  # before a mirror has any latency samples
+HEDGE_MIN_DELAY = 0.3
+HEDGE_MAX_DELAY = 6.0
+# A mirror that failed this many times in a row is tried last for MIRROR_COOLDOWN seconds
+MIRROR_FAILURE_THRESHOLD = 3
+MIRROR_COOLDOWN = 60.0
 
-    # Overpass QL query to find libraries
-    query = f"""
-    [out:json][timeout:25];
-    (
-      node["amenity"="library"](around:{radius_m},{latitude},{longitude});
-      way["amenity"="library"](around:{radius_m},{latitude},{longitude});
-      relation["amenity"="library"](around:{radius_m},{latitude},{longitude});
-    );
-    out center;
+
+class _Mirror:
+    def __init__(self, endpoint: str, order: int):
+        self.endpoint = endpoint
+        self.order = order
+        self.latencies = deque(maxlen=50)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_failure_at = 0.0
+        self.wins = 0  # answered first when hedged
+
+    def p50(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        return sorted(self.latencies)[len(self.latencies) // 2]
+
+    def healthy(self) -> bool:
+        return (
+            self.consecutive_failures < MIRROR_FAILURE_THRESHOLD
+            or time.monotonic() - self.last_failure_at > MIRROR_COOLDOWN
+        )
+
+    def hedge_delay(self) -> float:
+        p50 = self.p50()
+        if p50 is None:
+            return HEDGE_DEFAULT_DELAY
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, p50 * HEDGE_FACTOR))
+
+    def stats(self) -> Dict:
+        p50 = self.p50()
+        return {
+            "endpoint": self.endpoint,
+            "healthy": self.healthy(),
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "hedge_delay_seconds": round(self.hedge_delay(), 3),
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "wins": self.wins,
+        }
+
+
+class OverpassClient:
     """
+    Overpass mirrors behind one pooled HTTP/2 client, queried with hedged requests.
+
+    Mirrors are tried healthiest and fastest first. Each one gets a head start of
+    its adaptive hedge delay; if it hasn't answered by then (or fails sooner) the
+    next mirror is sent the same query, and the first good answer cancels the rest.
+    """
+
+    def __init__(self, endpoints: List[str]):
+        self.mirrors = [_Mirror(endpoint, i) for i, endpoint in enumerate(endpoints)]
+        self._client: Optional[httpx.AsyncClient] = None
+        self.queries = 0
+        self.hedged = 0
+        self.failed = 0
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=20.0,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                headers={"User-Agent": "Bookmarked/1.0"},
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _ordered(self) -> List[_Mirror]:
+        return sorted(
+            self.mirrors,
+            key=lambda m: (not m.healthy(), m.p50() if m.p50() is not None else float("inf"), m.order),
+        )
+
+    async def _attempt(self, mirror: _Mirror, query: str, timeout: float) -> Dict:
+        start = time.monotonic()
+        try:
+            response = await self.client().post(mirror.endpoint, data={"data": query}, timeout=timeout)
+            response.raise_for_status()
+            data = response.json()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            mirror.failures += 1
+            mirror.consecutive_failures += 1
+            mirror.last_failure_at = time.monotonic()
+            print(f"Overpass failed at {mirror.endpoint}: {e!r}")
+            raise
+        mirror.latencies.append(time.monotonic() - start)
+        mirror.successes += 1
+        mirror.consecutive_failures = 0
+        return data
+
+    async def query(self, query: str, timeout: float = 20.0) -> Optional[Dict]:
+        """Decoded JSON from the first mirror to answer, or None if every mirror failed"""
+        self.queries += 1
+        queue = self._ordered()
+        running: Dict[asyncio.Task, _Mirror] = {}
+
+        launched = 0
+
+        def launch():
+            nonlocal launched
+            mirror = queue.pop(0)
+            running[asyncio.create_task(self._attempt(mirror, query, timeout))] = mirror
+            launched += 1
+            return mirror
+
+        last = launch()
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running, timeout=last.hedge_delay() if queue else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done and queue:
+                    # Hedge a slow mirror
+                    self.hedged += 1
+                    last = launch()
+                for task in done:
+                    mirror = running.pop(task)
+                    if not task.exception():
+                        if launched > 1:
+                            mirror.wins += 1
+                        return task.result()
+                    if queue:
+                        # Replace a failed attempt right away, even while others are still running
+                        last = launch()
+        finally:
+            for task in running:
+                task.cancel()
+
+        self.failed += 1
+        print("All Overpass endpoints failed")
+        return None
+
+    def stats(self) -> Dict:
+        return {
+            "queries": self.queries,
+            "hedged": self.hedged,
+            "failed": self.failed,
+            "mirrors": [mirror.stats() for mirror in self._ordered()],
+        }
+
+
+overpass = OverpassClient(OVERPASS_ENDPOINTS)
+
+
+async def close_overpass_client():
+    await overpass.close()
+
+
+async def _query_overpass(query: str, timeout: float = 20.0) -> Optional[Dict]:
+    """
+    POST an Overpass QL query (hedged across mirrors).
+    Returns the decoded JSON, or None if every endpoint failed.
+    """
+    return await overpass.query(query, timeout)
+
+
+# A same-named element this close to one already kept is the same library
+# (e.g. a node inside the library's building way)
+DUPLICATE_DISTANCE_KM = 0.15
 
-    data = None
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        for endpoint in OVERPASS_ENDPOINTS:
-            for attempt in range(2):  # light retry per endpoint
-                try:
-                    response = await client.post(endpoint, data={"data": query})
-                    response.raise_for_status()
-                    data = response.json()
-                    break
-                except Exception as e:
-                    print(f"Overpass failed at {endpoint} (try {attempt + 1}): {e}")
-                    await asyncio.sleep(0.5 * (attempt + 1))
-            if data:
-                break
-
-    if not data:
-        print("All Overpass endpoints failed")
-        return []
 
+def _is_duplicate(seen: List[Tuple[float, float]], lat: float, lon: float) -> bool:
+    for seen_lat, seen_lon in seen:
+        dlat = (lat - seen_lat) * 111.32
+        dlon = (lon - seen_lon) * 111.32 * math.cos(math.radians(lat))
+        if math.hypot(dlat, dlon) <= DUPLICATE_DISTANCE_KM:
+            return True
+    return False
+
+
+def _parse_libraries(data: Dict) -> List[Dict]:
+    """Turn Overpass elements into library dicts with a matched bibliocommons system"""
     libraries = []
-    seen_names = set()  # Avoid duplicates
+    seen_ids = set()
+    seen_names: Dict[str, List[Tuple[float, float]]] = {}  # Avoid duplicates: name -> kept coordinates
 
     for element in data.get("elements", []):
         tags = element.get("tags", {})
         name = tags.get("name", "")
+        osm_id = f"{element['type']}/{element['id']}"
 
-        if not name or name.lower() in seen_names:
+        if not name or osm_id in seen_ids:
             continue
-        seen_names.add(name.lower())
 
         # Get coordinates (for ways/relations, use center)
         if element["type"] == "node":
@@ -106,8 +235,15 @@ async def find_libraries_near(latitude: float, longitude: float, radius_km: floa
             if not lat or not lon:
                 continue
 
+        # Two branches can share a name; only the same name at the same spot is a duplicate
+        same_name = seen_names.setdefault(name.lower(), [])
+        if _is_duplicate(same_name, lat, lon):
+            continue
+        same_name.append((lat, lon))
+        seen_ids.add(osm_id)
+
         # Try to match to a bibliocommons system
-        library_system = match_library_system(name)
+        library_system = match_library_system(name, lat, lon)
 
         # Extract branch name (remove "Vancouver Public Library - " prefix, etc.)
         branch_name = name
@@ -118,6 +254,7 @@ async def find_libraries_near(latitude: float, longitude: float, radius_km: floa
                 break
 
         libraries.append({
+            "osm_id": osm_id,
             "name": name,
             "branch_name": branch_name,
             "latitude": lat,
@@ -128,6 +265,56 @@ async def find_libraries_near(latitude: float, longitude: float, radius_km: floa
             "city": tags.get("addr:city", ""),
         })
 
+    return libraries
+
+
+# Nearby searches are coalesced on a rounded center (~1km) and radius
+overpass_flight = SingleFlight("overpass")
+COALESCE_DEGREES = 0.01
+COALESCE_PADDING_KM = 1.0
+
+
+async def find_libraries_near(latitude: float, longitude: float, radius_km: float = 10.0) -> List[Dict]:
+    """
+    Find libraries near a location using OpenStreetMap Overpass API.
+    Returns a list of libraries with name, coordinates, and matched bibliocommons system.
+
+    Concurrent searches for roughly the same area share one Overpass request: the
+    query runs on the rounded center with a padded radius, so callers should still
+    filter by their exact distance.
+    """
+    lat_key = round(round(latitude / COALESCE_DEGREES) * COALESCE_DEGREES, 4)
+    lon_key = round(round(longitude / COALESCE_DEGREES) * COALESCE_DEGREES, 4)
+    radius_key = math.ceil(radius_km + COALESCE_PADDING_KM)
+
+    libraries = await overpass_flight.do(
+        (lat_key, lon_key, radius_key),
+        lambda: _find_libraries_near(lat_key, lon_key, radius_key),
+    )
+    # Each caller gets its own dicts, they are mutated downstream
+    return [dict(lib) for lib in libraries]
+
+
+async def _find_libraries_near(latitude: float, longitude: float, radius_km: float) -> List[Dict]:
+    radius_m = int(radius_km * 1000)
+
+    # Overpass QL query to find libraries
+    query = f"""
+    [out:json][timeout:25];
+    (
+      node["amenity"="library"](around:{radius_m},{latitude},{longitude});
+      way["amenity"="library"](around:{radius_m},{latitude},{longitude});
+      relation["amenity"="library"](around:{radius_m},{latitude},{longitude});
+    );
+    out center;
+    """
+
+    data = await _query_overpass(query)
+    if not data:
+        return []
+
+    libraries = _parse_libraries(data)
+
     print(f"Found {len(libraries)} libraries from OpenStreetMap")
     for lib in libraries:
         print(f"  - {lib['name']} ({lib['library_id'] or 'no system matched'})")
@@ -135,6 +322,27 @@ async def find_libraries_near(latitude: float, longitude: float, radius_km: floa
     return libraries
 
 
+async def find_libraries_in_bbox(south: float, west: float, north: float, east: float) -> Optional[List[Dict]]:
+    """
+    Find every library inside a bounding box (used to fill the local library directory).
+    Returns None when Overpass could not be reached, so callers can tell it apart from an empty area.
+    """
+    query = f"""
+    [out:json][timeout:60];
+    (
+      node["amenity"="library"]({south},{west},{north},{east});
+      way["amenity"="library"]({south},{west},{north},{east});
+      relation["amenity"="library"]({south},{west},{north},{east});
+    );
+    out center;
+    """
+
+    data = await _query_overpass(query, timeout=65.0)
+    if data is None:
+        return None
+    return _parse_libraries(data)
+
+
 async def main():
     # Test with Vancouver downtown
     libraries = await find_libraries_near(49.2827, -123.1207, 15)
@@ -143,4 +351,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main())
\ No newline at end of file
@@ -1,7 +1,18 @@
 import asyncio
 import os
+import re
+import sys
+import time
+import weakref
+import httpx
+from typing import Dict, List, Optional
+from urllib.parse import urlencode, urlparse
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser as HTMLParser
+from .availability_cache import edition_key, isbn13_to_10, split_editions
+from .browser_pool import browser_pool
+from .record_index import record_index
+from .scraper_workers import scraper_workers
 
 AVAILABLE_STATUSES = {
     "AVAILABLE",
@@ -9,245 +20,821 @@ AVAILABLE_STATUSES = {
     "RETURNED TODAY",
 }
 
+# Overridable so the scraper can be pointed at a local fake Bibliocommons
+BIBLIOCOMMONS_BASE_URL = os.getenv("BIBLIOCOMMONS_BASE_URL", "https://{library_id}.bibliocommons.com")
+BIBLIOCOMMONS_GATEWAY_URL = os.getenv(
+    "BIBLIOCOMMONS_GATEWAY_URL", "https://gateway.bibliocommons.com/v2/libraries/{library_id}"
+)
+HTTP_FAST_PATH_ENABLED = os.getenv("BIBLIOCOMMONS_HTTP_FAST_PATH", "true").lower() in ("1", "true", "yes")
+
+# Record pages read for one multi-edition search (one per edition the library holds)
+MAX_EDITION_RECORDS = int(os.getenv("BIBLIOCOMMONS_MAX_EDITION_RECORDS", "4"))
+
+# A search page with no hits: the no-results block, or a heading / result-count
+# element saying so. Matched on parsed elements, never on the raw page source,
+# whose inline JS and JSON mention these strings too.
+NO_RESULTS_CSS = '.search-no-results, [data-testid="searchNoResults"]'
+RESULT_COUNT_CSS = 'h1, h2, h3, [class*="results-count"], [class*="result-count"], [data-testid*="resultscount" i]'
+NO_RESULTS_TEXT = re.compile(r"did not match|^\s*no results\b|^\s*0 results\b", re.IGNORECASE)
+
+
+class UnexpectedPageShape(Exception):
+    """The HTTP fast path got a page/JSON it doesn't understand; use Playwright instead."""
+
+
+class SearchTimeout(Exception):
+    """The rendered search page showed neither results nor a no-results message in time."""
+
+
+def catalog_url(library_id: str, path: str) -> str:
+    return BIBLIOCOMMONS_BASE_URL.format(library_id=library_id) + path
+
+
+def search_params(isbn: str) -> Dict[str, str]:
+    """
+    Catalog search for an ISBN, or for an edition key a boolean identifier search
+    matching any of its editions (ISBN-13s also in their ISBN-10 spelling).
+    """
+    isbns = split_editions(isbn)
+    if len(isbns) == 1:
+        return {"query": isbns[0], "searchType": "smart"}
+    identifiers = []
+    for edition in isbns:
+        identifiers.append(edition)
+        isbn10 = isbn13_to_10(edition)
+        if isbn10:
+            identifiers.append(isbn10)
+    return {"query": f"identifier:({' OR '.join(identifiers)})", "searchType": "bl"}
+
+
+def max_records(isbn: str) -> int:
+    return MAX_EDITION_RECORDS if len(split_editions(isbn)) > 1 else 1
+
 # ----------------------------
 # Parsers
 # ----------------------------
 
-def parse_summary(html: str):
-    soup = BeautifulSoup(html, "html.parser")
+# The HTTP path parses with selectolax (lexbor); pages are parsed once and every
+# field is read from that tree. Cell text joins stripped text nodes, like
+# BeautifulSoup's get_text(strip=True), so results match the old parsers.
 
-    def extract_int(selector):
-        el = soup.select_one(selector)
-        return int(el.get_text(strip=True)) if el else 0
+def _parse_int(node) -> int:
+    return int(node.text(strip=True)) if node is not None else 0
 
-    status_el = soup.select_one(".cp-availability-status")
-    status_text = status_el.get_text(strip=True) if status_el else ""
 
+def _summary_from(circulation):
+    status_el = circulation.css_first(".cp-availability-status")
     return {
-        "status_text": status_text,
-        "copies": extract_int(".total-copies-count .circulation-count"),
-        "on_order": extract_int(".on-order-count .circulation-count"),
-        "holds": extract_int(".on-hold-count .circulation-count"),
+        "status_text": status_el.text(strip=True) if status_el is not None else "",
+        "copies": _parse_int(circulation.css_first(".total-copies-count .circulation-count")),
+        "on_order": _parse_int(circulation.css_first(".on-order-count .circulation-count")),
+        "holds": _parse_int(circulation.css_first(".on-hold-count .circulation-count")),
     }
 
 
-def parse_available_locations(html: str):
-    soup = BeautifulSoup(html, "html.parser")
-
-    table = soup.select_one("table.cp-table")
-    if not table:
+def _locations_from(container):
+    table = container.css_first("table.cp-table")
+    if table is None:
         return []
 
-    rows = table.select("tbody tr.cp-table-row")
     locations = []
-
-    for row in rows:
-        cells = row.select("td.cp-table-cell")
+    for row in table.css("tbody tr.cp-table-row"):
+        cells = row.css("td.cp-table-cell")
         if len(cells) < 4:
             continue
-
-        def clean(cell):
-            for label in cell.select("span.table-cell__label"):
+        for cell in (cells[0], cells[3]):
+            for label in cell.css("span.table-cell__label"):
                 label.decompose()
-            return cell.get_text(strip=True)
+        if cells[3].text(strip=True).upper() in AVAILABLE_STATUSES:
+            locations.append(cells[0].text(strip=True))
+
+    # Deduplicate while preserving order
+    seen = set()
+    return [l for l in locations if not (l in seen or seen.add(l))]
 
-        location = clean(cells[0])
-        status = clean(cells[3]).upper()
 
-        if status in AVAILABLE_STATUSES:
-            locations.append(location)
+def parse_summary(html: str):
+    return _summary_from(HTMLParser(html).root)
+
+
+def parse_available_locations(html: str):
+    return _locations_from(HTMLParser(html).root)
+
+
+def parse_record_page(html: str):
+    """
+    (summary, available_locations) from a whole record page in one parse.
+    available_locations is None when the availability table isn't inlined.
+    """
+    tree = HTMLParser(html)
+    circulation = tree.css_first("div.cp-circulation-info")
+    if circulation is None:
+        raise UnexpectedPageShape("record page has no circulation info")
+    table = tree.css_first("div.cp-item-availability-table")
+    return _summary_from(circulation), (_locations_from(table) if table is not None else None)
+
+
+def parse_gateway_availability(data: dict):
+    """
+    Map the Bibliocommons gateway availability JSON onto the same
+    available-only, deduplicated location list as parse_available_locations.
+    """
+    items = (data.get("entities") or {}).get("bibItems")
+    if not isinstance(items, dict):
+        raise UnexpectedPageShape("gateway availability has no bibItems")
+
+    locations = []
+    for item in items.values():
+        branch = (item.get("branch") or {}).get("name") or item.get("branchName")
+        availability = item.get("availability") or {}
+        status = (availability.get("libraryStatus") or availability.get("status") or "").strip().upper()
+        if branch and status in AVAILABLE_STATUSES:
+            locations.append(branch.strip())
 
-    # Deduplicate while preserving order
     seen = set()
     return [l for l in locations if not (l in seen or seen.add(l))]
 
 
 # ----------------------------
-# Main pipeline
+# HTTP fast path
 # ----------------------------
 
-async def _fetch_book_status(library_id: str, isbn: str):
+_http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared pooled client for the browserless path."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=10.0,
+            follow_redirects=True,
+            headers={"User-Agent": "Mozilla/5.0 (compatible; Bookmarked/1.0)"},
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _parse_search_html(html: str, limit: int = 1) -> List[str]:
+    """Return up to `limit` record IDs in result order, [] for a definite no-results page, or raise."""
+    tree = HTMLParser(html)
+    record_ids = []
+    for link in tree.css('a[href*="/v2/record/S"]'):
+        href = link.attributes.get("href")
+        if href:
+            record_id = href.split("?")[0].rstrip("/").split("/")[-1]
+            if record_id not in record_ids:
+                record_ids.append(record_id)
+                if len(record_ids) >= limit:
+                    break
+    if record_ids:
+        return record_ids
+    if tree.css_first(NO_RESULTS_CSS) is not None:
+        return []
+    if any(NO_RESULTS_TEXT.search(node.text(separator=" ", strip=True)) for node in tree.css(RESULT_COUNT_CSS)):
+        return []
+    raise UnexpectedPageShape("search page has neither results nor a no-results marker")
+
+
+async def _fetch_book_status_http(library_id: str, isbn: str, record_id: Optional[str] = None):
     """
-    Internal async implementation for fetching availability with Playwright.
+    Browserless availability check: fetch the server-rendered search and record
+    pages (plus the gateway availability JSON when the table isn't inlined) and
+    run them through the same parsers as the Playwright scrape.
+    For an edition key, every matching record is read and the results merged.
     """
     library_id = library_id.lower()
+    client = get_http_client()
+
+    if record_id is None:
+        response = await client.get(catalog_url(library_id, "/v2/search"), params=search_params(isbn))
+        response.raise_for_status()
+        record_ids = _parse_search_html(response.text, max_records(isbn))
+        if not record_ids:
+            print(f"[{library_id.upper()}] (http) No results found for ISBN {isbn}")
+            return _not_found_result(library_id, isbn, searched=True)
+    else:
+        record_ids = [record_id]
+
+    results = await asyncio.gather(*(_fetch_record_http(client, library_id, isbn, rid) for rid in record_ids))
+    return merge_edition_results(library_id, isbn, list(results))
+
+
+async def _fetch_record_http(client: httpx.AsyncClient, library_id: str, isbn: str, record_id: str):
+    response = await client.get(catalog_url(library_id, f"/v2/record/{record_id}"))
+    response.raise_for_status()
+    summary, available_locations = parse_record_page(response.text)
+
+    if available_locations is None:
+        gateway_url = BIBLIOCOMMONS_GATEWAY_URL.format(library_id=library_id)
+        response = await client.get(f"{gateway_url}/bibs/{record_id}/availability")
+        response.raise_for_status()
+        try:
+            available_locations = parse_gateway_availability(response.json())
+        except ValueError as e:
+            raise UnexpectedPageShape(f"gateway availability is not JSON: {e}")
+
+    result = {
+        "library": library_id.upper(),
+        "isbn": isbn,
+        "record_id": record_id,
+        "is_available": len(available_locations) > 0 or summary["copies"] > 0,
+        "available_locations": available_locations,
+        "holds": summary["holds"],
+        "copies": summary["copies"],
+        "on_order": summary["on_order"],
+        "status_text": summary.get("status_text", ""),
+    }
+    print(f"[{library_id.upper()}] (http) Result: {result['copies']} copies, {len(available_locations)} available locations")
+    return result
 
-    search_url = (
-        f"https://{library_id}.bibliocommons.com/v2/search"
-        f"?query={isbn}&searchType=smart"
-    )
+
+# ----------------------------
+# Main pipeline
+# ----------------------------
+
+def merge_edition_results(library_id: str, isbn: str, results: List[Dict]) -> Dict:
+    """
+    One availability answer from the records of several editions: circulation
+    counts are summed and available branches combined. The record shown is the
+    best one (available first, then most copies); `editions` keeps each record's counts.
+    """
+    if len(results) == 1:
+        return results[0]
+
+    best = max(results, key=lambda r: (r["is_available"], r["copies"]))
+    locations = [loc for r in results for loc in r["available_locations"]]
+    return {
+        "library": library_id.upper(),
+        "isbn": isbn,
+        "record_id": best["record_id"],
+        "is_available": any(r["is_available"] for r in results),
+        "available_locations": list(dict.fromkeys(locations)),
+        "holds": sum(r["holds"] for r in results),
+        "copies": sum(r["copies"] for r in results),
+        "on_order": sum(r["on_order"] for r in results),
+        "status_text": best.get("status_text", ""),
+        "editions": [
+            {key: r[key] for key in ("record_id", "is_available", "copies", "holds", "on_order")}
+            for r in results
+        ],
+    }
+
+
+def _not_found_result(library_id: str, isbn: str, searched: bool = False):
+    """
+    Availability of a book the catalog doesn't hold. `searched` marks a result
+    read off a search page that showed a no-results message; only those are
+    indexed as not in the catalog.
+    """
+    result = {
+        "library": library_id.upper(),
+        "isbn": isbn,
+        "record_id": None,
+        "is_available": False,
+        "available_locations": [],
+        "holds": 0,
+        "copies": 0,
+        "on_order": 0,
+        "status_text": "Not in catalog",
+        "not_found": True,
+    }
+    if searched:
+        result["no_results_page"] = True
+    return result
+
+
+BLOCK_HEAVY_RESOURCES = os.getenv("BROWSER_BLOCK_RESOURCES", "true").lower() in ("1", "true", "yes")
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+FIRST_PARTY_HOSTS = ("bibliocommons.com", urlparse(BIBLIOCOMMONS_BASE_URL.format(library_id="x")).hostname or "")
+
+AVAILABILITY_TOGGLE = 'button:has-text("Check availability"), button:has-text("Availability")'
+
+# Reads the circulation summary and available location rows in the page and returns
+# them as JSON, so neither HTML crosses the Playwright IPC nor gets parsed again.
+# Same selectors and text rules as _summary_from / _locations_from.
+EXTRACT_AVAILABILITY_JS = """
+(availableStatuses) => {
+  const text = (el) => {
+    if (!el) return "";
+    const parts = [];
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT, {
+      acceptNode: (node) => node.parentElement.closest("span.table-cell__label")
+        ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT,
+    });
+    while (walker.nextNode()) parts.push(walker.currentNode.nodeValue.trim());
+    return parts.join("");
+  };
+  const count = (root, selector) => {
+    const n = parseInt(text(root.querySelector(selector)), 10);
+    return Number.isNaN(n) ? 0 : n;
+  };
+
+  const circulation = document.querySelector("div.cp-circulation-info");
+  const summary = circulation && {
+    status_text: text(circulation.querySelector(".cp-availability-status")),
+    copies: count(circulation, ".total-copies-count .circulation-count"),
+    on_order: count(circulation, ".on-order-count .circulation-count"),
+    holds: count(circulation, ".on-hold-count .circulation-count"),
+  };
+
+  const container = document.querySelector("div.cp-item-availability-table");
+  let locations = null;
+  if (container) {
+    const available = new Set(availableStatuses);
+    const seen = new Set();
+    locations = [];
+    for (const row of container.querySelectorAll("table.cp-table tbody tr.cp-table-row")) {
+      const cells = row.querySelectorAll("td.cp-table-cell");
+      if (cells.length < 4) continue;
+      const location = text(cells[0]);
+      if (available.has(text(cells[3]).toUpperCase()) && !seen.has(location)) {
+        seen.add(location);
+        locations.push(location);
+      }
+    }
+  }
+  return { summary, locations };
+}
+"""
+
+_routed_pages = weakref.WeakSet()
+blocked_requests = 0
+
+
+def _is_first_party(url: str) -> bool:
+    host = urlparse(url).hostname or ""
+    return any(host == h or host.endswith("." + h) for h in FIRST_PARTY_HOSTS if h)
+
+
+async def _block_heavy_resources(route):
+    """Drop images, media, fonts and third-party scripts; they never affect availability."""
+    global blocked_requests
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or (
+        request.resource_type == "script" and not _is_first_party(request.url)
+    ):
+        blocked_requests += 1
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _prepare_page(page):
+    """Install request interception once per (possibly pooled) page."""
+    if BLOCK_HEAVY_RESOURCES and page not in _routed_pages:
+        await page.route("**/*", _block_heavy_resources)
+        _routed_pages.add(page)
+
+
+async def _search_record_ids(page, library_id: str, isbn: str) -> List[str]:
+    """
+    Run the catalog search on a Playwright page.
+    Returns the matching record IDs (one for a single ISBN), or [] when the page
+    shows a no-results message. Raises SearchTimeout if it shows neither: a slow
+    render says nothing about the catalog.
+    """
+    search_url = catalog_url(library_id, "/v2/search?" + urlencode(search_params(isbn)))
 
     print(f"[{library_id.upper()}] Searching for ISBN {isbn}")
 
-    browser = None
+    # Go to search page
+    await page.goto(search_url, wait_until="domcontentloaded")
+
+    # Race the result link against every no-results indicator in a single wait,
+    # so both outcomes resolve as soon as the page renders them
+    result_link = page.locator('a[href*="/v2/record/S"]')
+    no_results = page.locator(NO_RESULTS_CSS).or_(page.get_by_text(NO_RESULTS_TEXT))
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
+        await result_link.or_(no_results).first.wait_for(timeout=8000)
+    except PlaywrightTimeout:
+        raise SearchTimeout(f"no results or no-results message for ISBN {isbn} after 8s")
 
-            # Go to search page
-            await page.goto(search_url, wait_until="domcontentloaded")
+    if await result_link.count() == 0:
+        print(f"[{library_id.upper()}] No results found for ISBN {isbn}")
+        return []
 
-            # Race: wait for either results OR no-results indicator
-            # This makes "not found" fail fast instead of waiting for timeout
-            try:
-                result_selector = 'a[href*="/v2/record/S"]'
-                no_result_selectors = [
-                    'text="did not match"',
-                    'text="No results"',
-                    'text="0 results"',
-                    '.search-no-results',
-                    '[data-testid="searchNoResults"]'
-                ]
-
-                # Wait for page to settle a bit
-                await page.wait_for_timeout(1000)
-
-                # Check for no results first (fast path)
-                for selector in no_result_selectors:
-                    try:
-                        if await page.locator(selector).count() > 0:
-                            print(f"[{library_id.upper()}] No results found for ISBN {isbn}")
-                            await browser.close()
-                            return {
-                                "library": library_id.upper(),
-                                "isbn": isbn,
-                                "record_id": None,
-                                "is_available": False,
-                                "available_locations": [],
-                                "holds": 0,
-                                "copies": 0,
-                                "on_order": 0,
-                                "status_text": "Not in catalog",
-                                "not_found": True,
-                            }
-                    except:
-                        pass
-
-                # Check for results
-                result_link = page.locator(result_selector)
-
-                # Short timeout - if results exist, they should appear quickly
-                await result_link.first.wait_for(timeout=5000)
-
-                href = await result_link.first.get_attribute("href")
-                if not href:
-                    raise Exception("No href found")
-
-            except PlaywrightTimeout:
-                print(f"[{library_id.upper()}] Timeout waiting for search results - book likely not in catalog")
-                await browser.close()
-                return {
-                    "library": library_id.upper(),
-                    "isbn": isbn,
-                    "record_id": None,
-                    "is_available": False,
-                    "available_locations": [],
-                    "holds": 0,
-                    "copies": 0,
-                    "on_order": 0,
-                    "status_text": "Not in catalog",
-                    "not_found": True,
-                }
-
-            record_id = href.split("/")[-1]
-            print(f"[{library_id.upper()}] Found record: {record_id}")
-
-            # Record page
-            record_url = f"https://{library_id}.bibliocommons.com/v2/record/{record_id}"
-            await page.goto(record_url, wait_until="domcontentloaded")
-
-            # Summary availability
-            try:
-                await page.wait_for_selector("div.cp-circulation-info", timeout=8000)
-                summary_html = await page.locator("div.cp-circulation-info").inner_html()
-                summary = parse_summary(summary_html)
-            except PlaywrightTimeout:
-                print(f"[{library_id.upper()}] Timeout getting circulation info")
-                summary = {"status_text": "", "copies": 0, "on_order": 0, "holds": 0}
-
-            # Trigger lazy-loaded availability table
-            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            await page.wait_for_timeout(1000)
-
-            toggle = page.locator(
-                'button:has-text("Check availability"), button:has-text("Availability")'
-            )
-            if await toggle.count() > 0:
+    hrefs = await result_link.evaluate_all("links => links.map(a => a.getAttribute('href'))")
+    record_ids = []
+    for href in hrefs:
+        if href:
+            record_id = href.split("?")[0].rstrip("/").split("/")[-1]
+            if record_id not in record_ids:
+                record_ids.append(record_id)
+    if not record_ids:
+        raise Exception("No href found")
+
+    record_ids = record_ids[:max_records(isbn)]
+    print(f"[{library_id.upper()}] Found records: {', '.join(record_ids)}")
+    return record_ids
+
+
+async def _load_availability_table(page, library_id: str):
+    """
+    Get the lazily-loaded availability table: scroll to trigger it and, if the page
+    wants a click, press the toggle and wait for the availability response.
+    """
+    table = page.locator("div.cp-item-availability-table")
+    toggle = page.locator(AVAILABILITY_TOGGLE)
+
+    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+    await table.or_(toggle).first.wait_for(state="attached", timeout=5000)
+
+    if await table.count() == 0:
+        try:
+            async with page.expect_response(lambda r: "availability" in r.url, timeout=5000):
                 await toggle.first.click()
-                await page.wait_for_timeout(1000)
+        except PlaywrightTimeout:
+            print(f"[{library_id.upper()}] No availability response after toggle")
+        await table.wait_for(state="attached", timeout=5000)
 
-            # Get availability table
-            available_locations = []
-            try:
-                await page.wait_for_selector(
-                    "div.cp-item-availability-table",
-                    state="attached",
-                    timeout=5000
-                )
-                table_html = await page.locator("div.cp-item-availability-table").inner_html()
-                available_locations = parse_available_locations(table_html)
-            except PlaywrightTimeout:
-                print(f"[{library_id.upper()}] Timeout getting availability table")
-
-            await browser.close()
-
-            result = {
-                "library": library_id.upper(),
-                "isbn": isbn,
-                "record_id": record_id,
-                "is_available": len(available_locations) > 0 or summary["copies"] > 0,
-                "available_locations": available_locations,
-                "holds": summary["holds"],
-                "copies": summary["copies"],
-                "on_order": summary["on_order"],
-                "status_text": summary.get("status_text", ""),
-            }
-            print(f"[{library_id.upper()}] Result: {result['copies']} copies, {len(available_locations)} available locations")
-            return result
 
+async def _scrape_book_status(page, library_id: str, isbn: str, record_id: Optional[str] = None):
+    """
+    Drive an already-open Playwright page through search -> record -> availability.
+    With a known record_id the search step is skipped; for an edition key each
+    matching record is read in turn and the results merged.
+    """
+    await _prepare_page(page)
+
+    if record_id is None:
+        record_ids = await _search_record_ids(page, library_id, isbn)
+        if not record_ids:
+            return _not_found_result(library_id, isbn, searched=True)
+    else:
+        record_ids = [record_id]
+
+    results = [await _scrape_record(page, library_id, isbn, rid) for rid in record_ids]
+    return merge_edition_results(library_id, isbn, results)
+
+
+async def _scrape_record(page, library_id: str, isbn: str, record_id: str):
+    # Record page
+    record_url = catalog_url(library_id, f"/v2/record/{record_id}")
+    await page.goto(record_url, wait_until="domcontentloaded")
+
+    # Wait for the summary and the availability table, then read both in one evaluate
+    try:
+        await page.wait_for_selector("div.cp-circulation-info", timeout=8000)
+    except PlaywrightTimeout:
+        print(f"[{library_id.upper()}] Timeout getting circulation info")
+    try:
+        await _load_availability_table(page, library_id)
+    except PlaywrightTimeout:
+        print(f"[{library_id.upper()}] Timeout getting availability table")
+
+    extracted = await page.evaluate(EXTRACT_AVAILABILITY_JS, sorted(AVAILABLE_STATUSES))
+    summary = extracted["summary"]
+    if summary is None:
+        # Same as the HTTP path: a withdrawn or reshaped record is not "zero copies"
+        raise UnexpectedPageShape(f"record page {record_id} has no circulation info")
+    available_locations = extracted["locations"] or []
+
+    result = {
+        "library": library_id.upper(),
+        "isbn": isbn,
+        "record_id": record_id,
+        "is_available": len(available_locations) > 0 or summary["copies"] > 0,
+        "available_locations": available_locations,
+        "holds": summary["holds"],
+        "copies": summary["copies"],
+        "on_order": summary["on_order"],
+        "status_text": summary.get("status_text", ""),
+    }
+    print(f"[{library_id.upper()}] Result: {result['copies']} copies, {len(available_locations)} available locations")
+    return result
+
+
+async def _fetch_book_status(library_id: str, isbn: str, record_id: Optional[str] = None):
+    """
+    Internal async implementation for fetching availability with Playwright.
+    Borrows a warm page from the shared browser pool instead of launching Chromium.
+    """
+    library_id = library_id.lower()
+
+    try:
+        async with browser_pool.page() as page:
+            return await _scrape_book_status(page, library_id, isbn, record_id)
     except Exception as e:
         print(f"[{library_id.upper()}] Error: {e}")
-        if browser:
+        raise
+
+
+async def _fetch_book_status_standalone(library_id: str, isbn: str, record_id: Optional[str] = None):
+    """
+    Launch a throwaway browser for one scrape. Used where the shared pool can't
+    live (the per-call Proactor loop on Windows).
+    """
+    library_id = library_id.lower()
+
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
             try:
+                page = await browser.new_page()
+                return await _scrape_book_status(page, library_id, isbn, record_id)
+            finally:
                 await browser.close()
-            except:
-                pass
+    except Exception as e:
+        print(f"[{library_id.upper()}] Error: {e}")
         raise
 
 
-async def get_book_status(library_id: str, isbn: str):
+async def _fetch_with_fallback(library_id: str, isbn: str, record_id: Optional[str] = None):
     """
-    Get book availability status from bibliocommons.
-    Returns quickly if book not found (within 3-4 seconds).
+    Tries the browserless HTTP path first and only drives Playwright when the
+    pages come back in a shape the fast path doesn't recognise.
 
     On Windows, Playwright requires a Proactor event loop for subprocesses.
     The main app uses Selector loop for psycopg; so we offload Playwright work
     to a background thread with a Proactor policy to avoid NotImplementedError.
+    Everywhere else the scrape runs on a page borrowed from the shared browser pool.
+    Results carry "scrape_path" ("http" or "browser") for per-path latency tracking.
     """
+    if HTTP_FAST_PATH_ENABLED:
+        try:
+            return {**await _fetch_book_status_http(library_id, isbn, record_id), "scrape_path": "http"}
+        except (UnexpectedPageShape, httpx.HTTPError) as e:
+            print(f"[{library_id.upper()}] HTTP fast path unavailable, falling back to Playwright: {e}")
+
     # On Windows, always offload Playwright to a background thread with a Proactor loop
     if os.name == "nt":
         def runner():
             # Switch to Proactor for this thread only
             asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-            return asyncio.run(_fetch_book_status(library_id, isbn))
+            return asyncio.run(_fetch_book_status_standalone(library_id, isbn, record_id))
+
+        result = await asyncio.to_thread(runner)
+    else:
+        # Non-Windows or already on a Proactor-capable loop
+        result = await _fetch_book_status(library_id, isbn, record_id)
+    return {**result, "scrape_path": "browser"}
+
+
+async def get_book_status(library_id: str, isbn: str):
+    """
+    Get book availability status from bibliocommons.
+    Returns quickly if book not found (within 3-4 seconds).
 
-        return await asyncio.to_thread(runner)
+    Record IDs are looked up in the persisted ISBN -> record index first, so a
+    known book goes straight to its record page and a book recently confirmed
+    missing from the catalog returns without any request. Searches fill the index:
+    records as they are found, and misses only from a search page that showed a
+    no-results message (`no_results_page`; timeouts and unrecognised pages raise).
+    """
+    if len(split_editions(isbn)) > 1:
+        return await _get_editions_status(library_id, split_editions(isbn))
 
-    # Non-Windows or already on a Proactor-capable loop
-    return await _fetch_book_status(library_id, isbn)
+    known, record_id = await record_index.lookup(library_id, isbn)
+    if known and record_id is None:
+        print(f"[{library_id.upper()}] ISBN {isbn} is indexed as not in catalog")
+        return _not_found_result(library_id.lower(), isbn)
+
+    try:
+        if scraper_workers.enabled:
+            # Scrape in a worker process; the API event loop only waits for the result
+            result = await scraper_workers.submit(library_id, isbn, record_id)
+        else:
+            result = await _fetch_with_fallback(library_id, isbn, record_id)
+    except Exception:
+        if known:
+            # The indexed record may have been withdrawn; search again next time
+            await record_index.forget(library_id, isbn)
+        raise
+
+    if not known and (result.get("record_id") or result.get("no_results_page")):
+        await record_index.remember(library_id, isbn, result.get("record_id"))
+    return result
+
+
+async def _get_editions_status(library_id: str, isbns: List[str]):
+    """
+    Availability of a work from several of its editions with one catalog search.
+
+    Editions indexed as not in the catalog are left out; if only one is left it
+    takes the single-ISBN path with its indexed record. Only a search page that
+    showed a no-results message for all of them marks each one as not in the catalog.
+    """
+    lookups = await asyncio.gather(*(record_index.lookup(library_id, isbn) for isbn in isbns))
+    candidates = [isbn for isbn, (known, record_id) in zip(isbns, lookups) if not known or record_id is not None]
+    if not candidates:
+        print(f"[{library_id.upper()}] No edition of {isbns[0]} is in the catalog (indexed)")
+        return {**_not_found_result(library_id.lower(), isbns[0]), "editions_checked": isbns}
+    if len(candidates) == 1:
+        return {**await get_book_status(library_id, candidates[0]), "editions_checked": isbns}
+
+    key = edition_key(candidates)
+    if scraper_workers.enabled:
+        result = await scraper_workers.submit(library_id, key)
+    else:
+        result = await _fetch_with_fallback(library_id, key)
+
+    if result.get("no_results_page"):
+        indexed = dict(zip(isbns, lookups))
+        for isbn in candidates:
+            if indexed[isbn][0]:
+                await record_index.forget(library_id, isbn)
+            else:
+                await record_index.remember(library_id, isbn, None)
+    return {**result, "isbn": isbns[0], "editions_checked": isbns}
 
 
 # ----------------------------
 # Runner
 # ----------------------------
 
-async def main():
-    result = await get_book_status(
-        library_id="vpl",
-        isbn="9780747532743"  # Harry Potter
+async def benchmark(library_id: str, isbn: str, runs: int = 3):
+    """
+    Compare per-check latency of the HTTP fast path and the Playwright scrape.
+    Point BIBLIOCOMMONS_BASE_URL at a server replaying recorded pages for stable
+    numbers; BROWSER_BLOCK_RESOURCES=false gives the no-interception baseline.
+    """
+    timings = {"http": [], "playwright": []}
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            await _fetch_book_status_http(library_id, isbn)
+            timings["http"].append(time.perf_counter() - start)
+        except (UnexpectedPageShape, httpx.HTTPError) as e:
+            print(f"HTTP path failed: {e}")
+
+        start = time.perf_counter()
+        await _fetch_book_status(library_id, isbn)
+        timings["playwright"].append(time.perf_counter() - start)
+
+    for path, samples in timings.items():
+        if samples:
+            print(f"{path:>10}: best {min(samples):.2f}s, mean {sum(samples) / len(samples):.2f}s over {len(samples)} runs")
+    print(f"Requests blocked by interception: {blocked_requests}")
+
+
+async def benchmark_editions(library_id: str, isbns: List[str], runs: int = 3):
+    """
+    Checking every edition of a work over the HTTP path: one combined identifier
+    search against a search per ISBN (one after another, and concurrently), with
+    the number of catalog requests each makes. Point BIBLIOCOMMONS_BASE_URL at a
+    server replaying recorded pages for stable numbers.
+    """
+    client = get_http_client()
+    requests_made = 0
+
+    async def count_request(request):
+        nonlocal requests_made
+        requests_made += 1
+
+    async def sequential():
+        for isbn in isbns:
+            await _fetch_book_status_http(library_id, isbn)
+
+    async def concurrent():
+        await asyncio.gather(*(_fetch_book_status_http(library_id, isbn) for isbn in isbns))
+
+    strategies = {
+        "combined search": lambda: _fetch_book_status_http(library_id, edition_key(isbns)),
+        "per-ISBN, sequential": sequential,
+        "per-ISBN, concurrent": concurrent,
+    }
+    client.event_hooks["request"].append(count_request)
+    try:
+        for label, strategy in strategies.items():
+            samples = []
+            requests_made = 0
+            for _ in range(runs):
+                start = time.perf_counter()
+                await strategy()
+                samples.append(time.perf_counter() - start)
+            print(
+                f"{label:>21}: best {min(samples):.3f}s, mean {sum(samples) / len(samples):.3f}s, "
+                f"{requests_made / runs:.0f} requests per check ({len(isbns)} editions, {runs} runs)"
+            )
+    finally:
+        client.event_hooks["request"].remove(count_request)
+
+
+def _fixture_record_page(rows: int = 60) -> str:
+    """Record page shaped like Bibliocommons' (padding plus an inlined availability table)"""
+    statuses = ["Available", "Checked out", "In", "On hold shelf", "In transit"]
+    body = "".join(
+        f'<tr class="cp-table-row"><td class="cp-table-cell"><span class="table-cell__label">Location</span>'
+        f'Branch {i % 25} Library</td><td class="cp-table-cell">Adult Fiction</td>'
+        f'<td class="cp-table-cell">FIC {i}</td><td class="cp-table-cell">'
+        f'<span class="table-cell__label">Status</span>{statuses[i % len(statuses)]}</td></tr>'
+        for i in range(rows)
+    )
+    padding = "".join(f'<div class="cp-nav-item"><a href="/v2/list/{i}">List {i}</a></div>' for i in range(400))
+    return (
+        f"<html><head><title>Record</title></head><body>{padding}"
+        '<div class="cp-circulation-info"><span class="cp-availability-status">Available</span>'
+        '<span class="total-copies-count"><span class="circulation-count">12</span></span>'
+        '<span class="on-order-count"><span class="circulation-count">1</span></span>'
+        '<span class="on-hold-count"><span class="circulation-count">7</span></span></div>'
+        f'<div class="cp-item-availability-table"><table class="cp-table"><tbody>{body}</tbody></table></div>'
+        "</body></html>"
     )
-    print(result)
+
+
+def _bs4_parse_record_page(html: str):
+    """The previous parse: BeautifulSoup page, then re-serialize and re-parse each section."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    circulation = BeautifulSoup(str(soup.select_one("div.cp-circulation-info")), "html.parser")
+
+    def extract_int(selector):
+        el = circulation.select_one(selector)
+        return int(el.get_text(strip=True)) if el else 0
+
+    status_el = circulation.select_one(".cp-availability-status")
+    summary = {
+        "status_text": status_el.get_text(strip=True) if status_el else "",
+        "copies": extract_int(".total-copies-count .circulation-count"),
+        "on_order": extract_int(".on-order-count .circulation-count"),
+        "holds": extract_int(".on-hold-count .circulation-count"),
+    }
+
+    table = BeautifulSoup(str(soup.select_one("div.cp-item-availability-table")), "html.parser")
+    locations = []
+    for row in table.select("table.cp-table tbody tr.cp-table-row"):
+        cells = row.select("td.cp-table-cell")
+        if len(cells) < 4:
+            continue
+        for cell in cells:
+            for label in cell.select("span.table-cell__label"):
+                label.decompose()
+        if cells[3].get_text(strip=True).upper() in AVAILABLE_STATUSES:
+            locations.append(cells[0].get_text(strip=True))
+    seen = set()
+    return summary, [l for l in locations if not (l in seen or seen.add(l))]
+
+
+async def benchmark_parsers(paths, runs: int = 200):
+    """
+    Parse cost per record page: the old BeautifulSoup path, selectolax (HTTP path)
+    and, when Chromium is available, the in-page evaluate against inner_html + parse.
+    `paths` are saved record pages; without any a synthetic page is used.
+    """
+    fixtures = {path: open(path, encoding="utf-8").read() for path in paths} or {"synthetic": _fixture_record_page()}
+
+    for name, html in fixtures.items():
+        expected = _bs4_parse_record_page(html)
+        assert parse_record_page(html) == expected, f"{name}: selectolax and BeautifulSoup disagree"
+
+        timings = {}
+        for label, parse in (("beautifulsoup", _bs4_parse_record_page), ("selectolax", parse_record_page)):
+            start = time.perf_counter()
+            for _ in range(runs):
+                parse(html)
+            timings[label] = (time.perf_counter() - start) / runs
+
+        try:
+            async with browser_pool.page() as page:
+                await page.set_content(html)
+                start = time.perf_counter()
+                for _ in range(runs):
+                    extracted = await page.evaluate(EXTRACT_AVAILABILITY_JS, sorted(AVAILABLE_STATUSES))
+                timings["page.evaluate"] = (time.perf_counter() - start) / runs
+                assert (extracted["summary"], extracted["locations"]) == expected, f"{name}: evaluate disagrees"
+
+                start = time.perf_counter()
+                for _ in range(runs):
+                    summary_html = await page.locator("div.cp-circulation-info").inner_html()
+                    table_html = await page.locator("div.cp-item-availability-table").inner_html()
+                    _bs4_parse_record_page(
+                        f'<div class="cp-circulation-info">{summary_html}</div>'
+                        f'<div class="cp-item-availability-table">{table_html}</div>'
+                    )
+                timings["inner_html + bs4"] = (time.perf_counter() - start) / runs
+        except Exception as e:
+            print(f"Skipping in-page timings (no browser): {e}")
+
+        print(f"{name} ({len(html) // 1024} KB, {len(expected[1])} available locations):")
+        for label, seconds in timings.items():
+            print(f"  {label:>17}: {seconds * 1000:.3f} ms")
+
+
+async def main():
+    if "--bench-parse" in sys.argv:
+        await benchmark_parsers([arg for arg in sys.argv[1:] if not arg.startswith("--")])
+    elif "--bench-editions" in sys.argv:
+        isbns = [arg for arg in sys.argv[1:] if not arg.startswith("--")] or ["9780747532743", "9780747532699"]
+        await benchmark_editions(library_id="vpl", isbns=isbns)
+    elif "--bench" in sys.argv:
+        await benchmark(library_id="vpl", isbn="9780747532743")
+    else:
+        result = await get_book_status(
+            library_id="vpl",
+            isbn="9780747532743"  # Harry Potter
+        )
+        print(result)
+    await close_http_client()
+    await browser_pool.close()
+    await scraper_workers.close()
 
 
 if __name__ == "__main__":
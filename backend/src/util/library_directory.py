@@ -0,0 +1,243 @@
+import asyncio
+import math
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from .db import SessionLocal
+from .find_libraries import find_libraries_in_bbox
+from ..models.LibraryLocation import LibraryLocation
+from ..repository.library_directory_repository import LibraryDirectoryRepository
+
+# Overpass is fetched (and persisted) one tile at a time
+TILE_DEGREES = 0.25
+# Finer cells for the in-memory radius index
+CELL_DEGREES = 0.05
+MAX_TILE_AGE = timedelta(days=float(os.getenv("LIBRARY_DIRECTORY_MAX_AGE_DAYS", "7")))
+# Background tile fetches in flight at once (each is a 60s bbox Overpass query)
+TILE_FETCH_CONCURRENCY = int(os.getenv("LIBRARY_DIRECTORY_FETCH_CONCURRENCY", "2"))
+
+KM_PER_DEGREE_LAT = 111.32
+
+
+def tile_key(latitude: float, longitude: float) -> str:
+    return f"{math.floor(latitude / TILE_DEGREES)}:{math.floor(longitude / TILE_DEGREES)}"
+
+
+def tile_bounds(tile: str) -> Tuple[float, float, float, float]:
+    """(south, west, north, east) of a tile"""
+    i, j = (int(part) for part in tile.split(":"))
+    return i * TILE_DEGREES, j * TILE_DEGREES, (i + 1) * TILE_DEGREES, (j + 1) * TILE_DEGREES
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Bounding box (south, west, north, east) that contains the search circle"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon
+
+
+class GridIndex:
+    """Uniform lat/lon grid; a radius query only touches the cells under its bounding box."""
+
+    def __init__(self, cell_degrees: float = CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[Tuple[int, int], List[Dict]] = defaultdict(list)
+        self._by_tile: Dict[str, List[Dict]] = defaultdict(list)
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def __len__(self):
+        return sum(len(libs) for libs in self._by_tile.values())
+
+    def insert(self, library: Dict):
+        self._cells[self._cell(library["latitude"], library["longitude"])].append(library)
+        self._by_tile[library["tile"]].append(library)
+
+    def replace_tile(self, tile: str, libraries: List[Dict]):
+        for old in self._by_tile.pop(tile, []):
+            cell = self._cells[self._cell(old["latitude"], old["longitude"])]
+            cell[:] = [lib for lib in cell if lib is not old]
+        for library in libraries:
+            self.insert(library)
+
+    def query_bbox(self, south: float, west: float, north: float, east: float) -> List[Dict]:
+        i0, j0 = self._cell(south, west)
+        i1, j1 = self._cell(north, east)
+        found = []
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                for library in self._cells.get((i, j), ()):
+                    if south <= library["latitude"] <= north and west <= library["longitude"] <= east:
+                        found.append(library)
+        return found
+
+
+def _location_to_dict(location: LibraryLocation) -> Dict:
+    return {
+        "osm_id": location.osm_id,
+        "name": location.name,
+        "branch_name": location.branch_name or location.name,
+        "latitude": location.latitude,
+        "longitude": location.longitude,
+        "library_id": location.library_id,
+        "type": "library",
+        "address": location.address or "",
+        "city": location.city or "",
+        "tile": location.tile,
+    }
+
+
+class LibraryDirectory:
+    """
+    Local copy of OSM libraries (with bibliocommons matches precomputed), persisted
+    in Postgres and served from an in-memory grid index.
+
+    Tiles are only ever fetched in the background: an area with tiles that have
+    never been fetched is answered by the caller's live Overpass query while its
+    tiles fill, and tiles older than MAX_TILE_AGE keep being served while they
+    refresh.
+    """
+
+    def __init__(self):
+        self.repo = LibraryDirectoryRepository()
+        self.index = GridIndex()
+        self.tiles: Dict[str, datetime] = {}
+        self.loaded = False
+        self._load_lock = asyncio.Lock()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._fetch_slots: Optional[asyncio.Semaphore] = None
+
+    def _load_sync(self):
+        db = SessionLocal()
+        try:
+            locations = self.repo.list_locations(db)
+            tiles = self.repo.list_tiles(db)
+        finally:
+            db.close()
+
+        index = GridIndex()
+        for location in locations:
+            index.insert(_location_to_dict(location))
+        self.index = index
+        self.tiles = {
+            t.tile: t.refreshed_at if t.refreshed_at.tzinfo else t.refreshed_at.replace(tzinfo=timezone.utc)
+            for t in tiles
+        }
+        print(f"Library directory loaded: {len(locations)} libraries in {len(self.tiles)} tiles")
+
+    async def load(self):
+        async with self._load_lock:
+            if self.loaded:
+                return
+            try:
+                await asyncio.to_thread(self._load_sync)
+            except Exception as e:
+                # Still usable: tiles will be fetched from Overpass as they're needed
+                print(f"Could not load library directory from database: {e}")
+            self.loaded = True
+
+    def _persist_tile_sync(self, tile: str, libraries: List[Dict], refreshed_at: datetime):
+        db = SessionLocal()
+        try:
+            locations = [
+                LibraryLocation(
+                    osm_id=lib["osm_id"],
+                    name=lib["name"],
+                    branch_name=lib["branch_name"],
+                    latitude=lib["latitude"],
+                    longitude=lib["longitude"],
+                    library_id=lib["library_id"],
+                    address=lib["address"],
+                    city=lib["city"],
+                    tile=tile,
+                )
+                for lib in libraries
+            ]
+            self.repo.replace_tile(db, tile, locations, refreshed_at)
+        finally:
+            db.close()
+
+    async def _fetch_tile(self, tile: str) -> bool:
+        if self._fetch_slots is None:
+            self._fetch_slots = asyncio.Semaphore(TILE_FETCH_CONCURRENCY)
+        south, west, north, east = tile_bounds(tile)
+        async with self._fetch_slots:
+            libraries = await find_libraries_in_bbox(south, west, north, east)
+        if libraries is None:
+            print(f"Library directory tile {tile} could not be fetched, will retry on next use")
+            return False
+
+        # Overpass returns ways that merely touch the box; keep only centers inside this tile
+        libraries = [lib for lib in libraries if tile_key(lib["latitude"], lib["longitude"]) == tile]
+        for lib in libraries:
+            lib["tile"] = tile
+
+        refreshed_at = datetime.now(timezone.utc)
+        try:
+            await asyncio.to_thread(self._persist_tile_sync, tile, libraries, refreshed_at)
+        except Exception as e:
+            print(f"Could not persist library tile {tile}: {e}")
+
+        self.index.replace_tile(tile, libraries)
+        self.tiles[tile] = refreshed_at
+        print(f"Library directory tile {tile} refreshed: {len(libraries)} libraries")
+        return True
+
+    def _refresh_tile(self, tile: str) -> asyncio.Task:
+        """Start (or join) the background refresh of one tile"""
+        task = self._refreshing.get(tile)
+        if task is None:
+            task = asyncio.create_task(self._fetch_tile(tile))
+            self._refreshing[tile] = task
+            task.add_done_callback(lambda t: self._refresh_done(tile, t))
+        return task
+
+    def _refresh_done(self, tile: str, task: asyncio.Task):
+        self._refreshing.pop(tile, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Library directory tile {tile} refresh failed: {task.exception()}")
+
+    def _tiles_covering(self, south: float, west: float, north: float, east: float) -> List[str]:
+        i0, j0 = math.floor(south / TILE_DEGREES), math.floor(west / TILE_DEGREES)
+        i1, j1 = math.floor(north / TILE_DEGREES), math.floor(east / TILE_DEGREES)
+        return [f"{i}:{j}" for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+
+    async def candidates(self, latitude: float, longitude: float, radius_km: float) -> Optional[List[Dict]]:
+        """
+        Libraries inside the bounding box of the search circle (callers still filter
+        by exact distance). Returns None at once if part of the area has never been
+        fetched; its tiles are filled in the background for later searches.
+        """
+        if not self.loaded:
+            await self.load()
+
+        bbox = radius_bbox(latitude, longitude, radius_km)
+        tiles = self._tiles_covering(*bbox)
+
+        missing = [tile for tile in tiles if tile not in self.tiles]
+        if missing:
+            print(f"Library directory missing {len(missing)} tiles, filling them in the background")
+            for tile in missing:
+                self._refresh_tile(tile)
+            return None
+
+        now = datetime.now(timezone.utc)
+        for tile in tiles:
+            if now - self.tiles[tile] > MAX_TILE_AGE:
+                self._refresh_tile(tile)
+
+        return [dict(lib) for lib in self.index.query_bbox(*bbox)]
+
+    def stats(self) -> Dict:
+        return {
+            "loaded": self.loaded,
+            "libraries": len(self.index),
+            "tiles": len(self.tiles),
+            "refreshing": len(self._refreshing),
+        }
+
+
+library_directory = LibraryDirectory()
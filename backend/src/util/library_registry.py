@@ -0,0 +1,165 @@
+import csv
+import os
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "biblioID.csv")
+
+BBox = Tuple[float, float, float, float]  # (south, west, north, east)
+
+# Rough (padded) bounds of every region listed in biblioID.csv. Systems without
+# their own BBox column are only considered for coordinates inside their region.
+REGION_BOUNDS: Dict[Tuple[str, str], BBox] = {
+    ("CA", "BC"): (48.0, -139.5, 60.5, -113.5),
+    ("CA", "AB"): (48.5, -120.5, 60.5, -109.5),
+    ("CA", "ON"): (41.5, -95.5, 57.0, -74.0),
+    ("CA", "NS"): (43.0, -66.8, 47.5, -59.3),
+    ("US", "NY"): (40.3, -80.0, 45.3, -71.5),
+    ("US", "IL"): (36.7, -91.8, 42.8, -87.0),
+    ("US", "WA"): (45.3, -125.0, 49.2, -116.6),
+    ("US", "MA"): (41.0, -73.8, 43.1, -69.6),
+    ("US", "CA"): (32.3, -124.8, 42.3, -113.8),
+    ("US", "TX"): (25.5, -107.0, 36.8, -93.2),
+    ("US", "OR"): (41.7, -124.9, 46.5, -116.2),
+    ("US", "AZ"): (31.0, -115.0, 37.3, -108.7),
+    ("US", "NV"): (34.8, -120.3, 42.3, -113.7),
+    ("US", "OH"): (38.2, -85.1, 42.3, -80.2),
+    ("US", "MN"): (43.2, -97.5, 49.6, -89.2),
+    ("US", "CO"): (36.7, -109.3, 41.3, -101.8),
+    ("US", "FL"): (24.3, -87.9, 31.2, -79.8),
+    ("US", "NJ"): (38.7, -75.8, 41.6, -73.6),
+    ("US", "MI"): (41.5, -90.7, 48.5, -82.1),
+    ("NZ", "CAN"): (-45.2, 169.5, -41.6, 174.5),
+    ("AU", "VIC"): (-39.4, 140.7, -33.7, 150.2),
+}
+
+
+def _contains(bbox: BBox, latitude: float, longitude: float) -> bool:
+    south, west, north, east = bbox
+    return south <= latitude <= north and west <= longitude <= east
+
+
+def _parse_bbox(value: str) -> Optional[BBox]:
+    parts = value.split()
+    if len(parts) != 4:
+        return None
+    south, west, north, east = (float(part) for part in parts)
+    return south, west, north, east
+
+
+class LibrarySystem:
+    """One Bibliocommons library system (a row of biblioID.csv)"""
+
+    def __init__(self, system_id: str, name: str, country: str, region: str,
+                 aliases: List[str], bbox: Optional[BBox] = None):
+        self.id = system_id
+        self.name = name
+        self.country = country
+        self.region = region
+        self.aliases = aliases
+        self.bbox = bbox
+
+    def covers(self, latitude: float, longitude: float) -> bool:
+        bounds = self.bbox or REGION_BOUNDS.get((self.country, self.region))
+        return bounds is None or _contains(bounds, latitude, longitude)
+
+    def __repr__(self):
+        return f"LibrarySystem({self.id!r}, {self.name!r})"
+
+
+class LibraryRegistry:
+    """
+    Bibliocommons systems with the aliases they go by in OSM names.
+
+    Name matching compiles the aliases of a candidate set into one regex
+    alternation (longest alias first, on word boundaries), so a name is scanned
+    once instead of once per alias. Aliases starting with "!" are blockers: text
+    they cover can't match a system ("north vancouver" is not VPL). Candidates
+    are prefiltered by bounding box / region when coordinates are known, and
+    results are memoized per (name, candidate set).
+    """
+
+    def __init__(self, systems: List[LibrarySystem]):
+        self.systems: Dict[str, LibrarySystem] = {system.id: system for system in systems}
+        self._all = frozenset(self.systems)
+        self._patterns: Dict[FrozenSet[str], Tuple[Pattern, Dict[str, Optional[str]]]] = {}
+        self._match_cached = lru_cache(maxsize=8192)(self._match)
+
+    @classmethod
+    def from_csv(cls, path: str = CSV_PATH) -> "LibraryRegistry":
+        systems = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                system_id = (row.get("ID") or "").strip()
+                if not system_id:
+                    continue
+                aliases = [a.strip().lower() for a in (row.get("Aliases") or "").split(";") if a.strip()]
+                systems.append(LibrarySystem(
+                    system_id=system_id,
+                    name=row["Library System"].strip(),
+                    country=(row.get("Country") or "").strip(),
+                    region=(row.get("Region") or "").strip(),
+                    aliases=aliases,
+                    bbox=_parse_bbox(row.get("BBox") or ""),
+                ))
+        print(f"Library registry loaded: {len(systems)} systems from {os.path.basename(path)}")
+        return cls(systems)
+
+    def candidates(self, latitude: Optional[float] = None, longitude: Optional[float] = None) -> FrozenSet[str]:
+        """Ids of the systems that may serve a location (all of them without coordinates)"""
+        if latitude is None or longitude is None:
+            return self._all
+        return frozenset(
+            system.id for system in self.systems.values() if system.covers(latitude, longitude)
+        )
+
+    def _pattern(self, candidates: FrozenSet[str]) -> Tuple[Pattern, Dict[str, Optional[str]]]:
+        compiled = self._patterns.get(candidates)
+        if compiled is not None:
+            return compiled
+
+        owners: Dict[str, Optional[str]] = {}
+        for system_id in sorted(candidates):
+            system = self.systems[system_id]
+            for alias in [system.name.lower()] + system.aliases:
+                if alias.startswith("!"):
+                    owners[alias[1:]] = None
+                else:
+                    owners.setdefault(alias, system_id)
+
+        if owners:
+            alternation = "|".join(re.escape(alias) for alias in sorted(owners, key=len, reverse=True))
+            pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)")
+        else:
+            pattern = re.compile(r"(?!)")
+        compiled = pattern, owners
+        self._patterns[candidates] = compiled
+        return compiled
+
+    def _match(self, name: str, candidates: FrozenSet[str]) -> Optional[str]:
+        pattern, owners = self._pattern(candidates)
+        for found in pattern.finditer(name):
+            system_id = owners[found.group(0)]
+            if system_id is not None:
+                return system_id
+        return None
+
+    def match(self, name: str, latitude: Optional[float] = None, longitude: Optional[float] = None) -> Optional[str]:
+        """Bibliocommons system id for an OSM library name, or None"""
+        if not name:
+            return None
+        return self._match_cached(" ".join(name.lower().split()), self.candidates(latitude, longitude))
+
+    def stats(self) -> Dict:
+        info = self._match_cached.cache_info()
+        return {
+            "systems": len(self.systems),
+            "compiled_patterns": len(self._patterns),
+            "match_cache_hits": info.hits,
+            "match_cache_misses": info.misses,
+            "match_cache_size": info.currsize,
+        }
+
+
+library_registry = LibraryRegistry.from_csv()
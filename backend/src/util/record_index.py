@@ -0,0 +1,99 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from cachetools import LRUCache
+
+from .db import SessionLocal
+from .availability_cache import normalize_isbn
+from ..repository.bibliocommons_record_repository import BibliocommonsRecordRepository
+
+# "Not in catalog" can change when a library acquires the book, so negatives expire
+NEGATIVE_TTL = timedelta(days=float(os.getenv("RECORD_INDEX_NEGATIVE_TTL_DAYS", "3")))
+# Records get withdrawn or merged; re-search now and then rather than trust an id forever
+POSITIVE_TTL = timedelta(days=float(os.getenv("RECORD_INDEX_POSITIVE_TTL_DAYS", "30")))
+
+
+class RecordIndex:
+    """
+    Persistent (library_id, ISBN) -> Bibliocommons record ID mapping.
+
+    Record IDs are stable, so a hit lets the scraper skip the search page entirely.
+    Negative entries (record_id None) remember "not in catalog" for NEGATIVE_TTL,
+    record ids are trusted for POSITIVE_TTL before the next search re-checks them.
+    Rows live in bibliocommons_records with an in-process LRU in front.
+    """
+
+    def __init__(self, memo_size: int = 20000):
+        self.repo = BibliocommonsRecordRepository()
+        self._memo = LRUCache(maxsize=memo_size)
+
+    def _key(self, library_id: str, isbn: str) -> Tuple[str, str]:
+        return library_id.lower(), normalize_isbn(isbn)
+
+    def _load_sync(self, key: Tuple[str, str]):
+        db = SessionLocal()
+        try:
+            row = self.repo.get(db, *key)
+            if not row:
+                return None
+            checked_at = row.checked_at
+            if checked_at.tzinfo is None:
+                checked_at = checked_at.replace(tzinfo=timezone.utc)
+            return row.record_id, checked_at
+        finally:
+            db.close()
+
+    def _store_sync(self, key: Tuple[str, str], record_id: Optional[str], checked_at: datetime):
+        db = SessionLocal()
+        try:
+            self.repo.upsert(db, key[0], key[1], record_id, checked_at)
+        finally:
+            db.close()
+
+    def _delete_sync(self, key: Tuple[str, str]):
+        db = SessionLocal()
+        try:
+            self.repo.delete(db, *key)
+        finally:
+            db.close()
+
+    async def lookup(self, library_id: str, isbn: str) -> Tuple[bool, Optional[str]]:
+        """(known, record_id); known with record_id None means not in catalog"""
+        key = self._key(library_id, isbn)
+        entry = self._memo.get(key)
+        if entry is None:
+            try:
+                entry = await asyncio.to_thread(self._load_sync, key)
+            except Exception as e:
+                print(f"Record index lookup failed for {key}: {e}")
+                return False, None
+            if entry is None:
+                return False, None
+            self._memo[key] = entry
+
+        record_id, checked_at = entry
+        ttl = NEGATIVE_TTL if record_id is None else POSITIVE_TTL
+        if datetime.now(timezone.utc) - checked_at > ttl:
+            return False, None
+        return True, record_id
+
+    async def remember(self, library_id: str, isbn: str, record_id: Optional[str]):
+        key = self._key(library_id, isbn)
+        checked_at = datetime.now(timezone.utc)
+        self._memo[key] = (record_id, checked_at)
+        try:
+            await asyncio.to_thread(self._store_sync, key, record_id, checked_at)
+        except Exception as e:
+            print(f"Could not persist record index entry for {key}: {e}")
+
+    async def forget(self, library_id: str, isbn: str):
+        key = self._key(library_id, isbn)
+        self._memo.pop(key, None)
+        try:
+            await asyncio.to_thread(self._delete_sync, key)
+        except Exception as e:
+            print(f"Could not delete record index entry for {key}: {e}")
+
+
+record_index = RecordIndex()
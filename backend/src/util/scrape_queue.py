@@ -0,0 +1,284 @@
+import asyncio
+import os
+import socket
+from typing import Awaitable, Callable, Dict, Optional
+
+import psycopg
+
+from .db import SessionLocal
+from .availability_cache import normalize_isbn
+from ..repository.scrape_job_repository import DONE_JOB_CHANNEL, NEW_JOB_CHANNEL, ScrapeJobRepository
+
+SCRAPE_QUEUE_ENABLED = os.getenv("SCRAPE_QUEUE_ENABLED", "false").lower() in ("1", "true", "yes")
+# Nodes can enqueue without claiming (API-only replicas)
+SCRAPE_QUEUE_WORKER = os.getenv("SCRAPE_QUEUE_WORKER", "true").lower() in ("1", "true", "yes")
+SCRAPE_QUEUE_CONCURRENCY = int(os.getenv("SCRAPE_QUEUE_CONCURRENCY", "4"))
+# A (system, ISBN) scraped by any node within this window is not scraped again
+FRESHNESS_SECONDS = float(os.getenv("SCRAPE_QUEUE_FRESHNESS", "900"))
+LEASE_SECONDS = float(os.getenv("SCRAPE_QUEUE_LEASE", "60"))
+MAX_ATTEMPTS = int(os.getenv("SCRAPE_QUEUE_MAX_ATTEMPTS", "2"))
+RETENTION_SECONDS = 86400.0
+# Fallback polling in case a notification is missed (e.g. while the listener reconnects)
+POLL_SECONDS = 5.0
+
+
+class ScrapeJobFailed(Exception):
+    pass
+
+
+class ScrapeQueue:
+    """
+    Fleet-wide scrape queue in the scrape_jobs table.
+
+    `submit` returns a result scraped by any node within FRESHNESS_SECONDS, or
+    enqueues the (system, ISBN) job (one active job per key, enforced by a partial
+    unique index) and waits for it. Worker loops on every node claim jobs with
+    FOR UPDATE SKIP LOCKED under a renewable lease, so a node that dies mid-scrape
+    only delays the job until its lease expires. Completion is pushed to waiters
+    with LISTEN/NOTIFY; new jobs wake idle claimers the same way.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = SCRAPE_QUEUE_ENABLED,
+        worker: bool = SCRAPE_QUEUE_WORKER,
+        concurrency: int = SCRAPE_QUEUE_CONCURRENCY,
+    ):
+        self.enabled = enabled
+        self.worker = worker
+        self.concurrency = max(1, concurrency)
+        self.repo = ScrapeJobRepository()
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._scrape: Optional[Callable[[str, str], Awaitable[Dict]]] = None
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._new_job = asyncio.Event()
+        self._tasks = []
+        self.started = False
+        self.fresh_hits = 0
+        self.enqueued = 0
+        self.claimed = 0
+        self.completed = 0
+        self.failed = 0
+
+    # --- sync DB helpers (run in threads) ---
+
+    def _db(self, fn, *args):
+        db = SessionLocal()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+
+    async def _run_db(self, fn, *args):
+        return await asyncio.to_thread(self._db, fn, *args)
+
+    # --- lifecycle ---
+
+    async def start(self, scrape: Callable[[str, str], Awaitable[Dict]]):
+        """Start listening (and claiming, on worker nodes); `scrape(library_id, isbn)` does the work"""
+        if self.started or not self.enabled:
+            return
+        self._scrape = scrape
+        self.started = True
+        self._tasks.append(asyncio.create_task(self._listen()))
+        if self.worker:
+            self._tasks.extend(asyncio.create_task(self._work(i)) for i in range(self.concurrency))
+            self._tasks.append(asyncio.create_task(self._sweep()))
+        print(f"[ScrapeQueue] Started on {self.node_id} "
+              f"({self.concurrency if self.worker else 0} claimers, {FRESHNESS_SECONDS:.0f}s freshness)")
+
+    async def close(self):
+        if not self.started:
+            return
+        self.started = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    # --- notifications ---
+
+    async def _listen(self):
+        delay = 1.0
+        while self.started:
+            try:
+                async with await psycopg.AsyncConnection.connect(os.getenv("DATABASE_URL"), autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {NEW_JOB_CHANNEL}")
+                    await conn.execute(f"LISTEN {DONE_JOB_CHANNEL}")
+                    delay = 1.0
+                    # Anything that finished while we weren't listening is picked up by polling
+                    self._new_job.set()
+                    async for notify in conn.notifies():
+                        if notify.channel == NEW_JOB_CHANNEL:
+                            self._new_job.set()
+                        elif notify.payload in self._waiters:
+                            asyncio.create_task(self._resolve(notify.payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ScrapeQueue] Listener disconnected, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def _resolve(self, job_id: str) -> bool:
+        """Settle the waiter for a job if the job has finished"""
+        future = self._waiters.get(job_id)
+        if future is None or future.done():
+            return True
+        try:
+            job = await self._run_db(self.repo.get, job_id)
+        except Exception as e:
+            print(f"[ScrapeQueue] Could not read job {job_id}: {e}")
+            return False
+        if job is None:
+            future.set_exception(ScrapeJobFailed(f"scrape job {job_id} disappeared"))
+        elif job["status"] == "done":
+            future.set_result(job["result"])
+        elif job["status"] == "failed":
+            future.set_exception(ScrapeJobFailed(job["error"] or "scrape failed"))
+        else:
+            return False
+        return True
+
+    # --- enqueue side ---
+
+    async def submit(self, library_id: str, isbn: str) -> Dict:
+        """Availability for (library_id, isbn), scraped at most once per freshness window fleet-wide"""
+        library_id = library_id.lower()
+        isbn = normalize_isbn(isbn)
+        key = f"{library_id}:{isbn}"
+
+        fresh = await self._run_db(self.repo.fresh_result, key, FRESHNESS_SECONDS)
+        if fresh is not None:
+            self.fresh_hits += 1
+            return fresh
+
+        job_id = await self._run_db(self.repo.enqueue, key, library_id, isbn)
+        self.enqueued += 1
+        future = self._waiters.get(job_id)
+        if future is None:
+            future = self._waiters[job_id] = asyncio.get_running_loop().create_future()
+            future.add_done_callback(lambda _: self._waiters.pop(job_id, None))
+            # Mark retrieved so an abandoned waiter doesn't log "exception never retrieved"
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            # It may already have finished before we were waiting for its notification
+            await self._resolve(job_id)
+
+        while not future.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(future), POLL_SECONDS)
+            except asyncio.TimeoutError:
+                await self._resolve(job_id)
+        return future.result()
+
+    # --- worker side ---
+
+    async def _work(self, index: int):
+        while self.started:
+            try:
+                job = await self._run_db(self.repo.claim, self.node_id, LEASE_SECONDS, MAX_ATTEMPTS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ScrapeQueue] Claim failed: {e}")
+                job = None
+                await asyncio.sleep(POLL_SECONDS)
+
+            if job is None:
+                self._new_job.clear()
+                try:
+                    await asyncio.wait_for(self._new_job.wait(), POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.claimed += 1
+            await self._run_job(job)
+
+    async def _run_job(self, job: Dict):
+        job_id = str(job["id"])
+
+        async def keep_lease():
+            while True:
+                await asyncio.sleep(LEASE_SECONDS / 3)
+                await self._run_db(self.repo.renew, job_id, self.node_id, LEASE_SECONDS)
+
+        renewer = asyncio.create_task(keep_lease())
+        try:
+            result = await self._scrape(job["library_id"], job["isbn"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            retry = job["attempts"] < MAX_ATTEMPTS
+            print(f"[ScrapeQueue] Job {job_id} ({job['library_id']}:{job['isbn']}) failed"
+                  f"{', will retry' if retry else ''}: {e}")
+            await self._run_db(self.repo.fail, job_id, self.node_id, f"{type(e).__name__}: {e}", retry)
+            return
+        finally:
+            renewer.cancel()
+
+        self.completed += 1
+        await self._run_db(self.repo.complete, job_id, self.node_id, result)
+
+    async def _sweep(self):
+        while self.started:
+            await asyncio.sleep(LEASE_SECONDS)
+            try:
+                expired = await self._run_db(self.repo.sweep, MAX_ATTEMPTS, RETENTION_SECONDS)
+                if expired:
+                    print(f"[ScrapeQueue] Failed {expired} jobs whose lease expired on their last attempt")
+            except Exception as e:
+                print(f"[ScrapeQueue] Sweep failed: {e}")
+
+    async def stats(self) -> Dict:
+        info = {
+            "enabled": self.enabled,
+            "started": self.started,
+            "node_id": self.node_id,
+            "worker": self.worker,
+            "concurrency": self.concurrency if self.worker else 0,
+            "waiting": len(self._waiters),
+            "fresh_hits": self.fresh_hits,
+            "enqueued": self.enqueued,
+            "claimed": self.claimed,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+        if self.enabled:
+            try:
+                info["jobs"] = await self._run_db(self.repo.counts)
+            except Exception as e:
+                info["jobs_error"] = str(e)
+        return info
+
+
+scrape_queue = ScrapeQueue()
+
+
+async def _demo():
+    """
+    Exercise the queue against the DATABASE_URL database (after `alembic upgrade head`):
+    concurrent submits for one key should produce a single scrape, and a repeat
+    submit should be served from the freshness window.
+    """
+    queue = ScrapeQueue(enabled=True, worker=True, concurrency=2)
+    scrapes = []
+
+    async def fake_scrape(library_id: str, isbn: str) -> Dict:
+        scrapes.append((library_id, isbn))
+        await asyncio.sleep(1.0)
+        return {"library_id": library_id, "isbn": isbn, "copies": 1, "is_available": True}
+
+    await queue.start(fake_scrape)
+    isbn = "978" + str(os.getpid()).zfill(10)[-10:]
+    results = await asyncio.gather(*(queue.submit("demo", isbn) for _ in range(5)))
+    print(f"5 concurrent submits -> {len(scrapes)} scrape(s), results equal: {all(r == results[0] for r in results)}")
+    await queue.submit("demo", isbn)
+    print(f"Repeat submit -> {len(scrapes)} scrape(s) total, fresh hits: {queue.fresh_hits}")
+    print(await queue.stats())
+    await queue.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_demo())
@@ -0,0 +1,272 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .browser_pool import BROWSER_POOL_SIZE
+
+# Number of scraper processes (opt-in); 0 scrapes in the API process
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", "0"))
+# Jobs one worker runs at once; matches its browser pool so no job waits for a page
+SCRAPER_WORKER_CONCURRENCY = int(os.getenv("SCRAPER_WORKER_CONCURRENCY", str(BROWSER_POOL_SIZE)))
+# A worker that dies sooner than this after starting is restarted with backoff
+MIN_WORKER_UPTIME = 10.0
+MAX_RESTART_DELAY = 30.0
+
+
+class ScraperWorkerError(Exception):
+    """A scrape failed inside a worker (the worker's exception, as text)"""
+
+
+class ScraperWorkerCrashed(ScraperWorkerError):
+    """The worker running the job died before answering"""
+
+
+# ----------------------------
+# Worker process
+# ----------------------------
+
+def _worker_main(conn):
+    # Ctrl+C goes to the whole process group; the API shuts workers down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_worker_loop(conn))
+
+
+async def _worker_loop(conn):
+    # Imported in the child only: get_book_status imports this module
+    from .browser_pool import browser_pool
+    from .get_book_status import _fetch_with_fallback, close_http_client
+
+    loop = asyncio.get_running_loop()
+    messages: asyncio.Queue = asyncio.Queue()
+    tasks: Dict[int, asyncio.Task] = {}
+
+    def read_messages():
+        # Connection.recv blocks, so it gets its own thread
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                message = None
+            loop.call_soon_threadsafe(messages.put_nowait, message)
+            if message is None or message[0] == "stop":
+                return
+
+    threading.Thread(target=read_messages, daemon=True).start()
+
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        print(f"[ScraperWorker {os.getpid()}] Browser pool failed to start, will retry on first scrape: {e}")
+
+    async def run(job_id: int, library_id: str, isbn: str, record_id: Optional[str]):
+        try:
+            result = await _fetch_with_fallback(library_id, isbn, record_id)
+            conn.send(("ok", job_id, result))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            conn.send(("error", job_id, f"{type(e).__name__}: {e}"))
+        finally:
+            tasks.pop(job_id, None)
+
+    try:
+        while True:
+            message = await messages.get()
+            if message is None or message[0] == "stop":
+                break
+            kind, job_id = message[0], message[1]
+            if kind == "job":
+                tasks[job_id] = asyncio.create_task(run(job_id, *message[2:]))
+            elif kind == "cancel" and job_id in tasks:
+                tasks[job_id].cancel()
+    finally:
+        for task in list(tasks.values()):
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        await browser_pool.close()
+        await close_http_client()
+
+
+# ----------------------------
+# API side
+# ----------------------------
+
+class _Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.conn = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.started_at = 0.0
+        self.quick_exits = 0
+        self.completed = 0
+        self.failed = 0
+
+
+class ScraperWorkerPool:
+    """
+    Runs Bibliocommons scrapes (HTTP fast path, Playwright and HTML parsing) in
+    `size` child processes, each with its own browser pool, so none of that work
+    shares the API event loop.
+
+    Jobs go to the least busy worker over a pipe and results come back tagged
+    with the job id. A worker that dies fails its in-flight jobs with
+    ScraperWorkerCrashed and is restarted; cancelling a submit cancels the job
+    in the worker too.
+    """
+
+    def __init__(self, size: int = SCRAPER_WORKERS, concurrency: int = SCRAPER_WORKER_CONCURRENCY):
+        self.size = max(0, size)
+        self.concurrency = max(1, concurrency)
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._job_ids = itertools.count(1)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.started = False
+        self.restarts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    async def start(self):
+        if self.started or not self.enabled:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.size * self.concurrency)
+        self._workers = [_Worker(i) for i in range(self.size)]
+        for worker in self._workers:
+            self._spawn(worker)
+        self.started = True
+        print(f"[ScraperWorkers] Started {self.size} workers ({self.concurrency} jobs each)")
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, args=(child_conn,), name=f"scraper-worker-{worker.index}", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker.process, worker.conn = process, parent_conn
+        worker.started_at = time.monotonic()
+        self._loop.add_reader(parent_conn.fileno(), self._on_readable, worker)
+        self._loop.add_reader(process.sentinel, self._on_exit, worker)
+
+    def _detach(self, worker: _Worker):
+        self._loop.remove_reader(worker.conn.fileno())
+        self._loop.remove_reader(worker.process.sentinel)
+        worker.conn.close()
+
+    def _on_readable(self, worker: _Worker):
+        try:
+            while worker.conn.poll():
+                kind, job_id, payload = worker.conn.recv()
+                future = worker.pending.pop(job_id, None)
+                if future is None or future.done():
+                    continue
+                if kind == "ok":
+                    worker.completed += 1
+                    future.set_result(payload)
+                else:
+                    worker.failed += 1
+                    future.set_exception(ScraperWorkerError(payload))
+        except (EOFError, OSError):
+            self._on_exit(worker)
+
+    def _on_exit(self, worker: _Worker):
+        if worker.conn is None or worker.conn.closed:
+            return
+        self._detach(worker)
+        worker.process.join(timeout=0)
+        for future in worker.pending.values():
+            if not future.done():
+                future.set_exception(ScraperWorkerCrashed(f"worker {worker.index} exited"))
+        if not self.started:
+            return
+
+        print(f"[ScraperWorkers] Worker {worker.index} exited (code {worker.process.exitcode}), "
+              f"failed {len(worker.pending)} jobs, restarting")
+        worker.pending.clear()
+        self.restarts += 1
+        if time.monotonic() - worker.started_at < MIN_WORKER_UPTIME:
+            worker.quick_exits += 1
+        else:
+            worker.quick_exits = 0
+        delay = min(MAX_RESTART_DELAY, 0.5 * (2 ** worker.quick_exits - 1))
+        self._loop.call_later(delay, self._respawn, worker)
+
+    def _respawn(self, worker: _Worker):
+        if self.started and (worker.conn is None or worker.conn.closed):
+            self._spawn(worker)
+
+    async def submit(self, library_id: str, isbn: str, record_id: Optional[str] = None) -> Dict:
+        """Scrape (library_id, isbn) in a worker process and return its result dict"""
+        if not self.started:
+            await self.start()
+
+        async with self._slots:
+            live = [w for w in self._workers if w.conn is not None and not w.conn.closed]
+            if not live:
+                raise ScraperWorkerCrashed("no scraper worker is running")
+            worker = min(live, key=lambda w: len(w.pending))
+            job_id = next(self._job_ids)
+            future = self._loop.create_future()
+            worker.pending[job_id] = future
+            try:
+                worker.conn.send(("job", job_id, library_id, isbn, record_id))
+                return await future
+            except asyncio.CancelledError:
+                if worker.pending.pop(job_id, None) is not None:
+                    try:
+                        worker.conn.send(("cancel", job_id))
+                    except (OSError, ValueError):
+                        pass
+                raise
+            finally:
+                worker.pending.pop(job_id, None)
+
+    async def close(self):
+        if not self.started:
+            return
+        self.started = False
+        for worker in self._workers:
+            try:
+                worker.conn.send(("stop", 0))
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            await asyncio.to_thread(worker.process.join, 10)
+            if worker.process.is_alive():
+                worker.process.kill()
+            if not worker.conn.closed:
+                self._detach(worker)
+        print("[ScraperWorkers] Closed")
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "started": self.started,
+            "size": self.size,
+            "concurrency_per_worker": self.concurrency,
+            "restarts": self.restarts,
+            "workers": [
+                {
+                    "index": w.index,
+                    "pid": w.process.pid if w.process else None,
+                    "alive": bool(w.process and w.process.is_alive()),
+                    "in_flight": len(w.pending),
+                    "completed": w.completed,
+                    "failed": w.failed,
+                }
+                for w in self._workers
+            ],
+        }
+
+
+scraper_workers = ScraperWorkerPool()
@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key onto one in-flight task.
+
+    Every caller awaits the same task (shielded, so one caller being cancelled
+    doesn't cancel it for the others). The task itself is only cancelled once its
+    last waiter has gone away.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Last interested caller was cancelled, nobody needs the result. Drop
+                # the key now, not in the done callback a loop iteration later, so a
+                # caller arriving meanwhile starts a fresh call instead of joining
+                # one that is being cancelled.
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def waiters(self) -> Dict[str, int]:
+        return {str(key): call.waiters for key, call in self._calls.items()}
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._calls),
+            "coalesced": self.coalesced,
+            "waiters": self.waiters(),
+        }
@@ -0,0 +1,261 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Concurrency limits per bibliocommons system (AIMD between MIN and MAX)
+INITIAL_CONCURRENCY = float(os.getenv("SYSTEM_INITIAL_CONCURRENCY", "3"))
+MIN_CONCURRENCY = 1.0
+MAX_CONCURRENCY = float(os.getenv("SYSTEM_MAX_CONCURRENCY", "8"))
+
+# Timeouts follow the observed p95 once there are enough samples
+DEFAULT_TIMEOUT = float(os.getenv("SYSTEM_DEFAULT_TIMEOUT", "25"))
+MIN_TIMEOUT = float(os.getenv("SYSTEM_MIN_TIMEOUT", "8"))
+TIMEOUT_P95_FACTOR = 1.5
+MIN_LATENCY_SAMPLES = 10
+
+# Latency is kept per scrape path (a result's "scrape_path"): a browser scrape
+# takes several times as long as the HTTP fast path
+HTTP_PATH, BROWSER_PATH = "http", "browser"
+
+# Circuit breaker
+FAILURE_THRESHOLD = int(os.getenv("SYSTEM_BREAKER_FAILURES", "5"))   # consecutive failures
+ERROR_RATE_THRESHOLD = 0.5                                            # over the outcome window
+BREAKER_COOLDOWN = float(os.getenv("SYSTEM_BREAKER_COOLDOWN", "30"))
+MAX_BREAKER_COOLDOWN = 300.0
+
+WINDOW = 50
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class SystemController:
+    """
+    Load control for one bibliocommons system.
+
+    - Concurrency limit adapts AIMD-style: +1/limit per success, halved on a
+      failure or timeout.
+    - Timeout is TIMEOUT_P95_FACTOR x the p95 of recent successful calls,
+      between MIN_TIMEOUT and DEFAULT_TIMEOUT, from the browser window once the
+      system has needed the browser (any call may fall back to it), otherwise
+      from the HTTP window. A call cut off by the timeout counts as a browser
+      sample, so a fast-path timeout that is too tight loosens itself.
+    - The breaker opens after FAILURE_THRESHOLD consecutive failures (or an error
+      rate over ERROR_RATE_THRESHOLD); while open, calls are rejected without
+      waiting. After the cooldown one probe call is let through (half-open); its
+      outcome closes the breaker or reopens it with a doubled cooldown.
+    """
+
+    def __init__(self, library_id: str):
+        self.library_id = library_id
+        self.limit = INITIAL_CONCURRENCY
+        self.in_flight = 0
+        self._waiters: deque = deque()  # futures of calls waiting for a slot
+        self._latencies: Dict[str, deque] = {path: deque(maxlen=WINDOW) for path in (HTTP_PATH, BROWSER_PATH)}
+        self._outcomes: deque = deque(maxlen=WINDOW)  # True = success
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+        self._probing = False
+        self.rejected = 0
+        self.timeouts = 0
+
+    # --- latency / timeout ---
+
+    def percentile(self, q: float, path: str = HTTP_PATH) -> Optional[float]:
+        latencies = self._latencies[path]
+        if not latencies:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self) -> float:
+        path = BROWSER_PATH if self._latencies[BROWSER_PATH] else HTTP_PATH
+        if len(self._latencies[path]) < MIN_LATENCY_SAMPLES:
+            return DEFAULT_TIMEOUT
+        return min(DEFAULT_TIMEOUT, max(MIN_TIMEOUT, self.percentile(0.95, path) * TIMEOUT_P95_FACTOR))
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return 1.0 - sum(self._outcomes) / len(self._outcomes)
+
+    # --- breaker ---
+
+    def is_open(self) -> bool:
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.cooldown
+
+    def _admit(self) -> bool:
+        """Raise CircuitOpenError unless this call may go out; True if it is the half-open probe"""
+        if self.state == CLOSED:
+            return False
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                raise CircuitOpenError(self.library_id)
+            self.state = HALF_OPEN
+        # Half-open: a single probe at a time
+        if self._probing:
+            raise CircuitOpenError(self.library_id)
+        self._probing = True
+        return True
+
+    def _open(self):
+        if self.state == HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, MAX_BREAKER_COOLDOWN)
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        print(f"Circuit opened for {self.library_id} ({self.cooldown:.0f}s cooldown)")
+
+    def _record(self, success: bool, latency: Optional[float] = None, probe: bool = False, path: str = HTTP_PATH):
+        self._outcomes.append(success)
+        if probe:
+            self._probing = False
+
+        if success:
+            if latency is not None:
+                self._latencies[path].append(latency)
+            self.consecutive_failures = 0
+            self.limit = min(MAX_CONCURRENCY, self.limit + 1.0 / self.limit)
+            self._wake()
+            if self.state != CLOSED:
+                print(f"Circuit closed for {self.library_id}")
+                self.state = CLOSED
+                self.cooldown = BREAKER_COOLDOWN
+            return
+
+        self.consecutive_failures += 1
+        self.limit = max(MIN_CONCURRENCY, self.limit / 2)
+        if probe or self.consecutive_failures >= FAILURE_THRESHOLD or (
+            len(self._outcomes) >= MIN_LATENCY_SAMPLES and self.error_rate() >= ERROR_RATE_THRESHOLD
+        ):
+            if self.state != OPEN:
+                self._open()
+
+    # --- calls ---
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def _acquire(self):
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as we were cancelled
+                self._release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn under this system's concurrency limit and timeout.
+        A None result counts as a failure (fetchers return None on error); a dict
+        result's "scrape_path" picks the latency window (HTTP by default).
+        Each call takes one slot and records one outcome, so callers sharing a
+        scrape should share one call.
+        Raises CircuitOpenError while the breaker is open, asyncio.TimeoutError on timeout.
+        """
+        try:
+            probe = self._admit()
+        except CircuitOpenError:
+            self.rejected += 1
+            raise
+
+        try:
+            await self._acquire()
+        except BaseException:
+            if probe:
+                self._probing = False
+            raise
+
+        start = time.monotonic()
+        timeout = self.timeout()
+        try:
+            result = await asyncio.wait_for(fn(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            # Too slow for the fast path: widen the next deadline towards the browser's
+            self._latencies[BROWSER_PATH].append(timeout)
+            self._record(False, probe=probe)
+            raise
+        except asyncio.CancelledError:
+            # Caller went away; says nothing about the system
+            if probe:
+                self._probing = False
+            raise
+        except Exception:
+            self._record(False, probe=probe)
+            raise
+        finally:
+            self._release()
+
+        path = result.get("scrape_path", HTTP_PATH) if isinstance(result, dict) else HTTP_PATH
+        self._record(result is not None, time.monotonic() - start, probe, path)
+        return result
+
+    def stats(self) -> Dict:
+        open_for = max(0.0, self.cooldown - (time.monotonic() - self.opened_at)) if self.state == OPEN else 0.0
+        return {
+            "state": self.state,
+            "concurrency_limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "timeout_seconds": round(self.timeout(), 1),
+            "latency": {
+                path: {
+                    "samples": len(self._latencies[path]),
+                    "p50_seconds": round(p50, 2) if p50 is not None else None,
+                    "p95_seconds": round(p95, 2) if p95 is not None else None,
+                }
+                for path in (HTTP_PATH, BROWSER_PATH)
+                for p50, p95 in [(self.percentile(0.5, path), self.percentile(0.95, path))]
+            },
+            "error_rate": round(self.error_rate(), 3),
+            "consecutive_failures": self.consecutive_failures,
+            "samples": len(self._outcomes),
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "retry_in_seconds": round(open_for, 1),
+        }
+
+
+class SystemControllers:
+    """One SystemController per bibliocommons library_id, created on first use"""
+
+    def __init__(self):
+        self._controllers: Dict[str, SystemController] = {}
+
+    def get(self, library_id: str) -> SystemController:
+        key = library_id.lower()
+        controller = self._controllers.get(key)
+        if controller is None:
+            controller = self._controllers[key] = SystemController(key)
+        return controller
+
+    def stats(self) -> Dict:
+        return {library_id: c.stats() for library_id, c in sorted(self._controllers.items())}
+
+
+system_controllers = SystemControllers()
@@ -0,0 +1,129 @@
+import re
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+import httpx
+from cachetools import LRUCache
+
+# Share links that only redirect to the real video URL
+SHORT_LINK_HOSTS = ("vm.tiktok.com", "vt.tiktok.com")
+SHORT_LINK_CACHE_SIZE = 5000
+MAX_REDIRECTS = 5
+
+# /@user/video/<id>, /@user/photo/<id>, /embed/v2/<id>, /embed/<id>, m.tiktok.com/v/<id>.html
+_PATH_ID = re.compile(r"/(?:video|photo|embed(?:/v2)?|v)/(\d{8,})(?:\.html)?(?:/|$)")
+# Share-sheet and app links carry the ID as a query parameter instead
+_QUERY_ID_KEYS = ("item_id", "share_item_id", "aweme_id")
+
+
+def _is_tiktok_host(host: str) -> bool:
+    return host == "tiktok.com" or host.endswith(".tiktok.com")
+
+
+def _is_short_link(host: str, path: str) -> bool:
+    return host in SHORT_LINK_HOSTS or (_is_tiktok_host(host) and path.startswith("/t/"))
+
+
+def video_id_from_url(url: str) -> Optional[str]:
+    """Numeric TikTok video ID in a full (not short) URL, or None"""
+    parts = urlsplit(url.strip())
+    if not _is_tiktok_host((parts.hostname or "").lower()):
+        return None
+    match = _PATH_ID.search(parts.path)
+    if match:
+        return match.group(1)
+    query = parse_qs(parts.query)
+    for key in _QUERY_ID_KEYS:
+        for value in query.get(key, []):
+            if value.isdigit():
+                return value
+    return None
+
+
+def canonical_video_url(url: str, video_id: str) -> str:
+    """https://www.tiktok.com/@user/video/<id> without query string or fragment"""
+    match = re.search(r"/(@[^/]+)/", urlsplit(url).path)
+    user = match.group(1) if match else "@"
+    return f"https://www.tiktok.com/{user}/video/{video_id}"
+
+
+class TikTokUrlResolver:
+    """
+    Maps any TikTok URL variant to the numeric video ID used as the transcript
+    cache key. Full URLs are parsed locally; short share links (vm./vt.tiktok.com,
+    tiktok.com/t/...) cost one request per redirect hop, reading headers only,
+    and are remembered in a bounded LRU.
+    """
+
+    def __init__(self, cache_size: int = SHORT_LINK_CACHE_SIZE):
+        self._short_links: LRUCache = LRUCache(maxsize=cache_size)
+        self._lock = threading.Lock()
+        self.parsed = 0
+        self.short_links_resolved = 0
+        self.short_link_hits = 0
+        self.unresolved = 0
+
+    def _follow(self, url: str) -> str:
+        """Final URL of a short link, following Location headers without fetching pages"""
+        with httpx.Client(timeout=5.0, headers={"User-Agent": "Mozilla/5.0"}) as client:
+            for _ in range(MAX_REDIRECTS):
+                with client.stream("GET", url) as response:
+                    location = response.headers.get("location")
+                if not response.is_redirect or not location:
+                    return url
+                url = urljoin(url, location)
+                if video_id_from_url(url):
+                    return url
+        return url
+
+    def resolve(self, url: str) -> Tuple[Optional[str], str]:
+        """
+        (video ID, canonical URL) for a TikTok link. Blocking for short links.
+        If no ID can be found the ID is None and the URL comes back trimmed.
+        """
+        url = url.strip()
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+
+        if _is_short_link(host, parts.path):
+            key = f"{host}{parts.path.rstrip('/')}"
+            with self._lock:
+                cached = self._short_links.get(key)
+            if cached is not None:
+                self.short_link_hits += 1
+                return cached
+            try:
+                target = self._follow(url)
+            except httpx.HTTPError as e:
+                print(f"[TikTok] Could not resolve short link {url}: {e}")
+                self.unresolved += 1
+                return None, url
+            video_id = video_id_from_url(target)
+            if video_id is None:
+                self.unresolved += 1
+                return None, url
+            resolved = (video_id, canonical_video_url(target, video_id))
+            with self._lock:
+                self._short_links[key] = resolved
+            self.short_links_resolved += 1
+            return resolved
+
+        video_id = video_id_from_url(url)
+        if video_id is None:
+            self.unresolved += 1
+            return None, url
+        self.parsed += 1
+        return video_id, canonical_video_url(url, video_id)
+
+    def stats(self) -> Dict:
+        return {
+            "parsed": self.parsed,
+            "short_links_resolved": self.short_links_resolved,
+            "short_link_hits": self.short_link_hits,
+            "short_links_cached": len(self._short_links),
+            "unresolved": self.unresolved,
+        }
+
+
+tiktok_urls = TikTokUrlResolver()
@@ -0,0 +1,51 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# src.util.db builds its engine at import time; nothing connects until a test asks for the database
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+os.environ.setdefault("DATABASE_URL", TEST_DATABASE_URL or "postgresql://localhost/bookmarked_test")
+os.environ.setdefault("GEMINI_API_KEY", "test")
+
+
+@pytest.fixture
+def pg_engine(request):
+    """
+    Engine on a throwaway Postgres database (TEST_DATABASE_URL) with the tables
+    named in the test module's PG_TABLES created fresh. Tests using it are skipped
+    when no database is configured.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from sqlalchemy import create_engine, text
+    from src.models.Base import Base
+
+    # Register every model on Base.metadata, as alembic/env.py does
+    for name in sorted(os.listdir(os.path.join(BACKEND_DIR, "src", "models"))):
+        if name.endswith(".py"):
+            importlib.import_module(f"src.models.{name[:-3]}")
+
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    tables = [Base.metadata.tables[name] for name in request.module.PG_TABLES]
+    Base.metadata.create_all(engine, tables=tables)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_session(pg_engine, monkeypatch):
+    """Sessions on the test database, with src.util.db.SessionLocal pointed at it"""
+    from sqlalchemy.orm import sessionmaker
+    import src.util.db
+
+    factory = sessionmaker(bind=pg_engine, autoflush=False, autocommit=False)
+    monkeypatch.setattr(src.util.db, "SessionLocal", factory)
+    return factory
@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+def search_page(record_ids: List[str] = (), extra: str = "") -> str:
+    """Server-rendered search results linking to `record_ids`"""
+    links = "".join(
+        f'<li class="cp-search-result-item"><a href="/v2/record/{rid}?q=x">Title {rid}</a></li>' for rid in record_ids
+    )
+    return f"<html><body><h2 class=\"cp-results-count\">{len(record_ids)} results</h2><ul>{links}</ul>{extra}</body></html>"
+
+
+def no_results_page() -> str:
+    return (
+        '<html><body><div class="cp-search-no-results"><h2>Your search for '
+        "9780000000000 did not match any items.</h2></div></body></html>"
+    )
+
+
+def record_page(copies: int, holds: int, rows: Optional[List[tuple]] = None) -> str:
+    """Record page; `rows` of (branch, status) inline the availability table, None leaves it to the gateway"""
+    circulation = (
+        '<div class="cp-circulation-info"><span class="cp-availability-status">Available</span>'
+        f'<span class="total-copies-count"><span class="circulation-count">{copies}</span></span>'
+        '<span class="on-order-count"><span class="circulation-count">0</span></span>'
+        f'<span class="on-hold-count"><span class="circulation-count">{holds}</span></span></div>'
+    )
+    table = ""
+    if rows is not None:
+        body = "".join(
+            f'<tr class="cp-table-row"><td class="cp-table-cell"><span class="table-cell__label">Location</span>{branch}</td>'
+            f'<td class="cp-table-cell">Adult Fiction</td><td class="cp-table-cell">FIC</td>'
+            f'<td class="cp-table-cell"><span class="table-cell__label">Status</span>{status}</td></tr>'
+            for branch, status in rows
+        )
+        table = f'<div class="cp-item-availability-table"><table class="cp-table"><tbody>{body}</tbody></table></div>'
+    return f"<html><body>{circulation}{table}</body></html>"
+
+
+class FakeBibliocommons:
+    """
+    Local stand-in for a Bibliocommons catalog and its gateway API.
+
+    Catalog pages live under /<library_id>/v2/..., gateway JSON under
+    /gateway/<library_id>/bibs/<record_id>/availability. Searches are answered by
+    query string, records by record id; anything else is a 404. Every request
+    path is kept in `requests`. `latency` seconds are slept before each response
+    to stand in for the network.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.searches: Dict[str, str] = {}
+        self.records: Dict[str, str] = {}
+        self.gateway: Dict[str, Dict] = {}
+        self.requests: List[str] = []
+        self.latency = latency
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                fake.requests.append(self.path)
+                if fake.latency:
+                    time.sleep(fake.latency)
+                segments = parts.path.strip("/").split("/")
+                body, content_type = None, "text/html"
+                if segments[:1] == ["gateway"] and segments[-1] == "availability":
+                    data = fake.gateway.get(segments[-2])
+                    if data is not None:
+                        body, content_type = json.dumps(data), "application/json"
+                elif segments[1:3] == ["v2", "search"]:
+                    body = fake.searches.get(parse_qs(parts.query).get("query", [""])[0])
+                elif segments[1:3] == ["v2", "record"]:
+                    body = fake.records.get(segments[3])
+
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Type", content_type)
+                self.end_headers()
+                self.wfile.write((body or "not found").encode("utf-8"))
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def catalog_url(self) -> str:
+        return self.base_url + "/{library_id}"
+
+    @property
+    def gateway_url(self) -> str:
+        return self.base_url + "/gateway/{library_id}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from src.service.library_service import FALLBACK_LIBRARIES, branch_matches
+from src.util.branch_index import BranchIndex
+
+# Branches as the directory stores them: the static fallback rows, plus the same
+# branches under their OpenStreetMap names with the prefix-stripped branch_name
+OSM_BRANCHES = [
+    {"id": "osm-central", "name": "Vancouver Public Library - Central Library", "branch_name": "Central Library"},
+    {"id": "osm-kits", "name": "Vancouver Public Library - Kitsilano Branch", "branch_name": "Kitsilano Branch"},
+    {"id": "osm-strathcona", "name": "nə́c̓aʔmat ct Strathcona Branch", "branch_name": "nə́c̓aʔmat ct Strathcona Branch"},
+    {"id": "osm-britannia", "name": "Britannia Branch Library", "branch_name": "Britannia Branch Library"},
+    {"id": "osm-carnegie", "name": "Carnegie Branch  Library", "branch_name": "Carnegie Branch  Library"},
+    {"id": "osm-champlain", "name": "Champlain Heights Branch", "branch_name": "Champlain Heights Branch"},
+    {"id": "osm-brighouse", "name": "Richmond Public Library - Brighouse (Main)", "branch_name": "Brighouse (Main)"},
+    {"id": "osm-cambie", "name": "RPL Cambie", "branch_name": "Cambie"},
+    {"id": "osm-cameron", "name": "Burnaby Public Library - Cameron", "branch_name": "Cameron"},
+    {"id": "osm-library", "name": "Library", "branch_name": "Library"},
+]
+BRANCHES = [lib for lib in FALLBACK_LIBRARIES if lib.get("library_id")] + OSM_BRANCHES
+
+# Location strings as catalogs list them in availability tables
+LOCATIONS = [
+    "Central Library", "Kitsilano", "Mount Pleasant", "Joe Fortes", "Renfrew", "South Hill",
+    "Terry Salman Branch", "Hastings", "Kensington", "Collingwood", "Firehall", "Fraserview",
+    "Oakridge", "Riley Park", "nə́c̓aʔmat ct Strathcona", "West Point Grey", "Britannia",
+    "Carnegie", "Champlain Heights", "Marpole", "Brighouse (Main)", "Cambie", "Ironwood",
+    "Steveston", "Bob Prittie Metrotown", "Tommy Douglas", "McGill", "Cameron",
+    "Outreach Services", "Inter-Library Loan", "Library", "  KITSILANO   BRANCH  ", "", "Point",
+]
+
+
+def indexed(branches):
+    index = BranchIndex()
+    for lib in branches:
+        index.add(lib["id"], lib)
+    return index
+
+
+def naive(branches, locations):
+    return {lib["id"] for lib in branches if branch_matches(lib, locations)}
+
+
+@pytest.mark.parametrize("location", LOCATIONS)
+def test_each_location_matches_like_branch_matches(location):
+    assert indexed(BRANCHES).match([location]) == naive(BRANCHES, [location])
+
+
+def test_random_location_lists_match_like_branch_matches():
+    rng = random.Random(16)
+    index = indexed(BRANCHES)
+    for _ in range(500):
+        locations = rng.sample(LOCATIONS, rng.randint(0, 12))
+        assert index.match(locations) == naive(BRANCHES, locations), locations
+
+
+def test_index_grown_in_steps_matches_a_full_one():
+    index = indexed(BRANCHES[:5])
+    assert index.match(LOCATIONS) == naive(BRANCHES[:5], LOCATIONS)
+    for lib in BRANCHES[5:]:
+        index.add(lib["id"], lib)
+    assert index.match(LOCATIONS) == naive(BRANCHES, LOCATIONS)
@@ -0,0 +1,64 @@
+import asyncio
+
+from src.service import library_service
+from src.service.library_service import calculate_distance, discover_libraries
+
+HOME = (49.2634, -123.1382)
+
+# Branches due north of HOME at these distances (km); None is an untracked system
+BRANCHES = [(0.5, "vpl"), (1.5, None), (3.0, "vpl"), (4.0, "vpl"), (8.0, "bpl"), (14.0, "rpl")]
+
+
+def branch(distance_km, library_id):
+    latitude = HOME[0] + distance_km / 111.195
+    return {
+        "id": f"b{distance_km}", "name": f"Branch {distance_km}", "library_id": library_id,
+        "latitude": latitude, "longitude": HOME[1],
+        "distance_km": round(calculate_distance(*HOME, latitude, HOME[1]), 2),
+    }
+
+
+def fake_search(monkeypatch):
+    radii = []
+
+    async def get_nearby_libraries(latitude, longitude, max_distance_km=10.0):
+        radii.append(max_distance_km)
+        return [branch(d, lib) for d, lib in BRANCHES if d <= max_distance_km]
+
+    monkeypatch.setattr(library_service, "get_nearby_libraries", get_nearby_libraries)
+    return radii
+
+
+def test_one_search_covers_every_radius_step(monkeypatch):
+    radii = fake_search(monkeypatch)
+
+    nearby, radius = asyncio.run(discover_libraries(*HOME, 15, target_libraries=3))
+
+    assert radii == [15]
+    assert radius == 5.0
+    assert [lib["distance_km"] for lib in nearby] == [0.5, 1.5, 3.0, 4.0]
+
+
+def test_untracked_branches_do_not_count_toward_the_target(monkeypatch):
+    fake_search(monkeypatch)
+
+    nearby, radius = asyncio.run(discover_libraries(*HOME, 15, target_libraries=2, radius_steps=[2.0, 3.5]))
+
+    assert radius == 3.5 and len(nearby) == 3
+
+
+def test_unmet_target_returns_everything_at_max_distance(monkeypatch):
+    fake_search(monkeypatch)
+
+    nearby, radius = asyncio.run(discover_libraries(*HOME, 15, target_libraries=10))
+
+    assert radius == 15 and len(nearby) == len(BRANCHES)
+
+
+def test_no_libraries(monkeypatch):
+    async def nothing(latitude, longitude, max_distance_km=10.0):
+        return []
+
+    monkeypatch.setattr(library_service, "get_nearby_libraries", nothing)
+
+    assert asyncio.run(discover_libraries(*HOME, 15, target_libraries=3)) == ([], 15)
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from src.util import get_book_status as gbs
+from tests.fake_bibliocommons import FakeBibliocommons, no_results_page, record_page, search_page
+
+ISBN = "9780441013593"
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    fake = FakeBibliocommons()
+    monkeypatch.setattr(gbs, "BIBLIOCOMMONS_BASE_URL", fake.catalog_url)
+    monkeypatch.setattr(gbs, "BIBLIOCOMMONS_GATEWAY_URL", fake.gateway_url)
+    yield fake
+    fake.close()
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await gbs.close_http_client()
+    return asyncio.run(main())
+
+
+# --- search page parsing ---
+
+def test_parse_search_returns_record_ids_in_order():
+    html = search_page(["S38C1", "S38C2", "S38C1"])
+    assert gbs._parse_search_html(html, limit=4) == ["S38C1", "S38C2"]
+    assert gbs._parse_search_html(html) == ["S38C1"]
+
+
+def test_parse_search_no_results_block():
+    assert gbs._parse_search_html(no_results_page()) == []
+
+
+def test_parse_search_zero_result_count():
+    assert gbs._parse_search_html('<html><body><h2 class="cp-results-count">0 results</h2></body></html>') == []
+
+
+def test_parse_search_nonzero_count_without_links_is_unexpected():
+    # Client-rendered results: "10 results" must not read as "0 results"
+    html = '<html><body><h2 class="cp-results-count">10 results</h2><div id="app"></div></body></html>'
+    with pytest.raises(gbs.UnexpectedPageShape):
+        gbs._parse_search_html(html)
+
+
+def test_parse_search_ignores_markers_in_scripts():
+    html = (
+        '<html><body><div id="app"></div><script>window.__i18n = {"empty": "No results", '
+        '"count": "0 results", "cls": "search-no-results", "id": "searchNoResults", '
+        '"msg": "did not match"};</script></body></html>'
+    )
+    with pytest.raises(gbs.UnexpectedPageShape):
+        gbs._parse_search_html(html)
+
+
+# --- HTTP fast path against the fake catalog ---
+
+def test_http_path_reads_inlined_availability(catalog):
+    catalog.searches[ISBN] = search_page(["S38C101"])
+    catalog.records["S38C101"] = record_page(
+        copies=3, holds=2, rows=[("Central Library", "Available"), ("Kits Branch", "Checked out"), ("Central Library", "In")]
+    )
+
+    result = run(gbs._fetch_book_status_http("vpl", ISBN))
+
+    assert result["record_id"] == "S38C101"
+    assert result["available_locations"] == ["Central Library"]
+    assert (result["copies"], result["holds"], result["is_available"]) == (3, 2, True)
+    assert not any("/gateway/" in path for path in catalog.requests)
+
+
+def test_http_path_uses_gateway_when_table_is_not_inlined(catalog):
+    catalog.searches[ISBN] = search_page(["S38C102"])
+    catalog.records["S38C102"] = record_page(copies=1, holds=0)
+    catalog.gateway["S38C102"] = {"entities": {"bibItems": {
+        "a": {"branch": {"name": "Kits Branch"}, "availability": {"libraryStatus": "Available"}},
+        "b": {"branchName": "Central Library", "availability": {"status": "Checked out"}},
+    }}}
+
+    result = run(gbs._fetch_book_status_http("vpl", ISBN))
+
+    assert result["available_locations"] == ["Kits Branch"]
+    assert any(path.endswith("/bibs/S38C102/availability") for path in catalog.requests)
+
+
+def test_http_path_not_found_only_on_no_results_page(catalog):
+    catalog.searches[ISBN] = no_results_page()
+
+    result = run(gbs._fetch_book_status_http("vpl", ISBN))
+
+    assert result["not_found"] is True and result["no_results_page"] is True
+    assert not any("/v2/record/" in path for path in catalog.requests)
+
+
+def test_http_path_skips_search_for_known_record(catalog):
+    catalog.records["S38C103"] = record_page(copies=2, holds=5, rows=[("Kits Branch", "Available")])
+
+    result = run(gbs._fetch_book_status_http("vpl", ISBN, record_id="S38C103"))
+
+    assert result["holds"] == 5
+    assert not any("/v2/search" in path for path in catalog.requests)
+
+
+def test_http_path_merges_editions(catalog):
+    key = "9780441013593+9780441172719"
+    catalog.searches[gbs.search_params(key)["query"]] = search_page(["S38C201", "S38C202"])
+    catalog.records["S38C201"] = record_page(copies=2, holds=4, rows=[("Central Library", "Checked out")])
+    catalog.records["S38C202"] = record_page(copies=1, holds=1, rows=[("Kits Branch", "Available")])
+
+    result = run(gbs._fetch_book_status_http("vpl", key))
+
+    assert (result["copies"], result["holds"]) == (3, 5)
+    assert result["record_id"] == "S38C201"  # both circulate; more copies wins
+    assert result["available_locations"] == ["Kits Branch"]
+    assert [e["record_id"] for e in result["editions"]] == ["S38C201", "S38C202"]
+
+
+def test_client_rendered_search_falls_back_to_playwright(catalog, monkeypatch):
+    catalog.searches[ISBN] = '<html><body><h2 class="cp-results-count">12 results</h2><div id="app"></div></body></html>'
+    scraped = []
+
+    async def fake_playwright(library_id, isbn, record_id=None):
+        scraped.append((library_id, isbn, record_id))
+        return {"record_id": "S38C999"}
+
+    monkeypatch.setattr(gbs, "_fetch_book_status", fake_playwright)
+    monkeypatch.setattr(gbs.os, "name", "posix")
+
+    assert run(gbs._fetch_with_fallback("vpl", ISBN)) == {"record_id": "S38C999", "scrape_path": "browser"}
+    assert scraped == [("vpl", ISBN, None)]
+
+
+def test_http_error_falls_back_to_playwright(catalog, monkeypatch):
+    scraped = []
+
+    async def fake_playwright(library_id, isbn, record_id=None):
+        scraped.append(isbn)
+        return {"record_id": None, "not_found": True}
+
+    monkeypatch.setattr(gbs, "_fetch_book_status", fake_playwright)
+    monkeypatch.setattr(gbs.os, "name", "posix")
+
+    run(gbs._fetch_with_fallback("vpl", "9780000000001"))  # the fake 404s unknown searches
+    assert scraped == ["9780000000001"]
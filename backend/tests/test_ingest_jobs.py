@@ -0,0 +1,104 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from src.models.Book import Book
+from src.models.IngestJob import IngestJob
+from src.models.User import User
+from src.repository.ingest_job_repository import IngestJobRepository
+from src.service import ingest_job_service
+from src.service.ingest_job_service import IngestJobService, book_to_dict
+
+PG_TABLES = ["users", "ingest_jobs"]
+
+repo = IngestJobRepository()
+LONG_AGO = datetime.now(timezone.utc) - timedelta(hours=1)
+
+
+@pytest.fixture
+def db(pg_session):
+    session = pg_session()
+    user = User(email="reader@example.com", password="x")
+    session.add(user)
+    session.commit()
+    session.user_id = user.user_id
+    yield session
+    session.rollback()
+    session.close()
+
+
+def make_job(db, owner, status, heartbeat_at):
+    job = repo.create(db, db.user_id, "https://www.tiktok.com/@a/video/7300000000000000001", [], owner)
+    db.execute(
+        text("UPDATE ingest_jobs SET status = :status, updated_at = :long_ago, heartbeat_at = :beat WHERE job_id = :id"),
+        {"status": status, "long_ago": LONG_AGO, "beat": heartbeat_at, "id": job.job_id},
+    )
+    db.commit()
+    return job.job_id
+
+
+def status_of(db, job_id):
+    return db.execute(text("SELECT status FROM ingest_jobs WHERE job_id = :id"), {"id": job_id}).scalar()
+
+
+def test_heartbeat_keeps_queued_and_long_running_jobs(db):
+    queued = make_job(db, "node-a", "pending", LONG_AGO)
+    long_stage = make_job(db, "node-a", "running", LONG_AGO)
+    abandoned = make_job(db, "node-b", "running", LONG_AGO)
+
+    assert repo.heartbeat(db, "node-a") == 2
+    assert repo.fail_stale(db, 120) == 1
+
+    assert status_of(db, queued) == "pending"
+    assert status_of(db, long_stage) == "running"
+    assert status_of(db, abandoned) == "failed"
+
+
+def test_fresh_heartbeat_is_not_swept_without_progress(db):
+    job_id = make_job(db, "node-a", "running", datetime.now(timezone.utc))
+
+    assert repo.fail_stale(db, 120) == 0
+    assert status_of(db, job_id) == "running"
+
+
+def test_progress_write_counts_as_heartbeat(db):
+    job_id = make_job(db, "node-a", "running", LONG_AGO)
+    repo.update(db, job_id, stage="transcribe")
+
+    assert repo.fail_stale(db, 120) == 0
+
+
+def job(status, heartbeat_at):
+    return IngestJob(
+        job_id=uuid.uuid4(), url="u", status=status, stage="transcribe", stages=[],
+        created_at=LONG_AGO, updated_at=LONG_AGO, heartbeat_at=heartbeat_at,
+    )
+
+
+def test_job_view_follows_the_heartbeat_not_the_last_progress():
+    service = IngestJobService()
+    now = datetime.now(timezone.utc)
+
+    assert service._job_to_dict(job("running", now))["status"] == "running"
+    assert service._job_to_dict(job("pending", now))["status"] == "pending"
+    stale = service._job_to_dict(job("running", now - timedelta(seconds=ingest_job_service.INGEST_STALE_SECONDS + 1)))
+    assert (stale["status"], stale["error"]) == ("failed", "interrupted")
+
+
+def test_book_to_dict_has_every_book_column():
+    book = Book(
+        book_id=uuid.UUID(int=1), isbn="9780441013593", title="Dune", author="Frank Herbert",
+        cover_url="https://covers.example/dune.jpg", description="Spice.", created_at=LONG_AGO,
+    )
+
+    assert book_to_dict(book) == {
+        "book_id": "00000000-0000-0000-0000-000000000001",
+        "isbn": "9780441013593",
+        "title": "Dune",
+        "author": "Frank Herbert",
+        "cover_url": "https://covers.example/dune.jpg",
+        "description": "Spice.",
+        "created_at": LONG_AGO.isoformat(),
+    }
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from src.util import find_libraries
+from src.util.find_libraries import OverpassClient
+
+
+def client_with(behaviours):
+    """OverpassClient whose mirrors answer per `behaviours`: endpoint -> (delay, ok)"""
+    client = OverpassClient(list(behaviours))
+    launches = []
+
+    async def fake_attempt(mirror, query, timeout):
+        launches.append((mirror.endpoint, time.monotonic()))
+        delay, ok = behaviours[mirror.endpoint]
+        await asyncio.sleep(delay)
+        if not ok:
+            raise RuntimeError(f"{mirror.endpoint} failed")
+        return {"from": mirror.endpoint}
+
+    client._attempt = fake_attempt
+    return client, launches
+
+
+def test_failed_hedge_launches_next_mirror_while_first_still_runs(monkeypatch):
+    monkeypatch.setattr(find_libraries, "HEDGE_DEFAULT_DELAY", 0.2)
+    client, launches = client_with({"slow": (2.0, True), "broken": (0.0, False), "good": (0.05, True)})
+
+    start = time.monotonic()
+    result = asyncio.run(client.query("q"))
+
+    assert result == {"from": "good"}
+    assert [endpoint for endpoint, _ in launches] == ["slow", "broken", "good"]
+    # "good" went out as soon as "broken" failed, not a second hedge delay later
+    assert launches[2][1] - launches[1][1] < 0.1
+    assert time.monotonic() - start < 0.5
+
+
+def test_fails_over_when_only_attempt_fails():
+    client, launches = client_with({"broken": (0.0, False), "good": (0.0, True)})
+
+    assert asyncio.run(client.query("q")) == {"from": "good"}
+    assert client.hedged == 0
+
+
+def test_every_mirror_failing_returns_none():
+    client, _ = client_with({"a": (0.0, False), "b": (0.0, False)})
+
+    assert asyncio.run(client.query("q")) is None
+    assert client.failed == 1
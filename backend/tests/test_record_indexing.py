@@ -0,0 +1,190 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+
+from src.util import get_book_status as gbs
+from src.util import record_index as ri
+
+
+class FakeRecordIndex:
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})  # (library_id, isbn) -> record_id or None
+        self.remembered = []
+        self.forgotten = []
+
+    async def lookup(self, library_id, isbn):
+        key = (library_id, isbn)
+        return (key in self.entries, self.entries.get(key))
+
+    async def remember(self, library_id, isbn, record_id):
+        self.remembered.append((library_id, isbn, record_id))
+        self.entries[(library_id, isbn)] = record_id
+
+    async def forget(self, library_id, isbn):
+        self.forgotten.append((library_id, isbn))
+        self.entries.pop((library_id, isbn), None)
+
+
+@pytest.fixture
+def index(monkeypatch):
+    fake = FakeRecordIndex()
+    monkeypatch.setattr(gbs, "record_index", fake)
+    monkeypatch.setattr(gbs.scraper_workers, "size", 0)
+    return fake
+
+
+def scrape_returns(monkeypatch, outcome):
+    calls = []
+
+    async def fake_fetch(library_id, isbn, record_id=None):
+        calls.append(isbn)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome(library_id, isbn) if callable(outcome) else outcome
+
+    monkeypatch.setattr(gbs, "_fetch_with_fallback", fake_fetch)
+    return calls
+
+
+class _TimingOutLocator:
+    first = property(lambda self: self)
+
+    def or_(self, other):
+        return self
+
+    async def wait_for(self, **kwargs):
+        raise PlaywrightTimeout("Timeout 8000ms exceeded")
+
+
+class _SlowPage:
+    async def goto(self, url, **kwargs):
+        pass
+
+    def locator(self, selector):
+        return _TimingOutLocator()
+
+    def get_by_text(self, pattern):
+        return _TimingOutLocator()
+
+
+class _WithdrawnRecordPage:
+    async def goto(self, url, **kwargs):
+        pass
+
+    async def wait_for_selector(self, selector, **kwargs):
+        raise PlaywrightTimeout("Timeout 8000ms exceeded")
+
+    async def evaluate(self, script, *args):
+        return {"summary": None, "locations": None}
+
+
+def test_search_timeout_raises_instead_of_not_found():
+    with pytest.raises(gbs.SearchTimeout):
+        asyncio.run(gbs._search_record_ids(_SlowPage(), "vpl", "9780441013593"))
+
+
+def test_timeout_is_not_indexed_as_missing(index, monkeypatch):
+    scrape_returns(monkeypatch, gbs.SearchTimeout("slow render"))
+
+    with pytest.raises(gbs.SearchTimeout):
+        asyncio.run(gbs.get_book_status("vpl", "9780441013593"))
+    assert index.remembered == []
+
+
+def test_confirmed_no_results_is_indexed_as_missing(index, monkeypatch):
+    scrape_returns(monkeypatch, lambda library_id, isbn: gbs._not_found_result(library_id, isbn, searched=True))
+
+    result = asyncio.run(gbs.get_book_status("vpl", "9780441013593"))
+
+    assert result["not_found"] is True
+    assert index.remembered == [("vpl", "9780441013593", None)]
+
+
+def test_found_record_is_indexed(index, monkeypatch):
+    scrape_returns(monkeypatch, {"record_id": "S38C1", "copies": 1})
+
+    asyncio.run(gbs.get_book_status("vpl", "9780441013593"))
+
+    assert index.remembered == [("vpl", "9780441013593", "S38C1")]
+
+
+def test_record_page_without_circulation_info_raises(monkeypatch):
+    async def no_table(page, library_id):
+        raise PlaywrightTimeout("Timeout 5000ms exceeded")
+
+    monkeypatch.setattr(gbs, "_load_availability_table", no_table)
+
+    with pytest.raises(gbs.UnexpectedPageShape):
+        asyncio.run(gbs._scrape_record(_WithdrawnRecordPage(), "vpl", "9780441013593", "S38C1"))
+
+
+def test_withdrawn_indexed_record_is_forgotten(index, monkeypatch):
+    index.entries[("vpl", "9780441013593")] = "S38C1"
+    scrape_returns(monkeypatch, gbs.UnexpectedPageShape("record page S38C1 has no circulation info"))
+
+    with pytest.raises(gbs.UnexpectedPageShape):
+        asyncio.run(gbs.get_book_status("vpl", "9780441013593"))
+    assert index.forgotten == [("vpl", "9780441013593")] and index.remembered == []
+
+
+@pytest.mark.parametrize("record_id, age, known", [
+    ("S38C1", timedelta(days=1), True),
+    ("S38C1", ri.POSITIVE_TTL + timedelta(days=1), False),
+    (None, timedelta(days=1), True),
+    (None, ri.NEGATIVE_TTL + timedelta(days=1), False),
+])
+def test_index_entries_expire(record_id, age, known):
+    index = ri.RecordIndex()
+    index._memo[index._key("vpl", "9780441013593")] = (record_id, datetime.now(timezone.utc) - age)
+
+    assert asyncio.run(index.lookup("vpl", "9780441013593")) == ((True, record_id) if known else (False, None))
+
+
+def test_indexed_missing_skips_the_scrape(index, monkeypatch):
+    index.entries[("vpl", "9780441013593")] = None
+    calls = scrape_returns(monkeypatch, {"record_id": "S38C1"})
+
+    assert asyncio.run(gbs.get_book_status("vpl", "9780441013593"))["not_found"] is True
+    assert calls == []
+
+
+def test_not_found_without_no_results_page_is_not_indexed(index, monkeypatch):
+    scrape_returns(monkeypatch, gbs._not_found_result)
+
+    assert asyncio.run(gbs.get_book_status("vpl", "9780441013593"))["not_found"] is True
+    assert index.remembered == []
+
+
+# --- several editions in one search ---
+
+EDITIONS = ["9780441013593", "9780441172719", "9780593099322"]
+
+
+def test_editions_no_results_page_marks_each_candidate(index, monkeypatch):
+    index.entries[("vpl", EDITIONS[2])] = None
+    calls = scrape_returns(monkeypatch, lambda library_id, isbn: gbs._not_found_result(library_id, isbn, searched=True))
+
+    result = asyncio.run(gbs.get_book_status("vpl", "+".join(EDITIONS)))
+
+    assert result["not_found"] is True and result["editions_checked"] == EDITIONS
+    assert calls == [gbs.edition_key(EDITIONS[:2])]  # the indexed miss is left out of the search
+    assert index.remembered == [("vpl", EDITIONS[0], None), ("vpl", EDITIONS[1], None)]
+
+
+def test_editions_not_found_without_no_results_page_is_not_indexed(index, monkeypatch):
+    index.entries[("vpl", EDITIONS[1])] = "S38C7"
+    scrape_returns(monkeypatch, gbs._not_found_result)
+
+    assert asyncio.run(gbs.get_book_status("vpl", "+".join(EDITIONS)))["not_found"] is True
+    assert index.remembered == [] and index.forgotten == []
+    assert index.entries[("vpl", EDITIONS[1])] == "S38C7"
+
+
+def test_editions_timeout_is_not_indexed(index, monkeypatch):
+    scrape_returns(monkeypatch, gbs.SearchTimeout("slow render"))
+
+    with pytest.raises(gbs.SearchTimeout):
+        asyncio.run(gbs.get_book_status("vpl", "+".join(EDITIONS)))
+    assert index.remembered == []
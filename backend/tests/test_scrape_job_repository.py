@@ -0,0 +1,127 @@
+import threading
+import time
+
+import psycopg
+import pytest
+from sqlalchemy import text
+
+from src.repository.scrape_job_repository import DONE_JOB_CHANNEL, NEW_JOB_CHANNEL, ScrapeJobRepository
+from tests.conftest import TEST_DATABASE_URL
+
+PG_TABLES = ["scrape_jobs"]
+
+repo = ScrapeJobRepository()
+
+
+@pytest.fixture
+def db(pg_session):
+    session = pg_session()
+    yield session
+    session.close()
+
+
+def enqueue(db, n=1):
+    return [repo.enqueue(db, f"vpl:97800000000{i:02d}", "vpl", f"97800000000{i:02d}") for i in range(n)]
+
+
+def test_enqueue_keeps_one_active_job_per_key(db):
+    first = repo.enqueue(db, "vpl:9780441013593", "vpl", "9780441013593")
+    assert repo.enqueue(db, "vpl:9780441013593", "vpl", "9780441013593") == first
+
+    job = repo.claim(db, "node-a", 60, max_attempts=2)
+    repo.complete(db, str(job["id"]), "node-a", {"copies": 1})
+
+    assert repo.enqueue(db, "vpl:9780441013593", "vpl", "9780441013593") != first
+    assert repo.fresh_result(db, "vpl:9780441013593", 60) == {"copies": 1}
+
+
+def test_concurrent_claimers_never_share_a_job(pg_session, db):
+    jobs = set(enqueue(db, 3))
+    claims, lock = [], threading.Lock()
+
+    def claimer(owner):
+        session = pg_session()
+        try:
+            while (job := repo.claim(session, owner, 60, max_attempts=2)) is not None:
+                with lock:
+                    claims.append(str(job["id"]))
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=claimer, args=(f"node-{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claims) == sorted(jobs)
+
+
+def test_claim_skips_a_row_locked_by_another_claimer(pg_session, db):
+    first, second = enqueue(db, 2)
+    holder = pg_session()
+    try:
+        # Another node mid-claim holds the oldest row
+        holder.execute(text("SELECT id FROM scrape_jobs WHERE id = :id FOR UPDATE"), {"id": first})
+        start = time.monotonic()
+        job = repo.claim(db, "node-b", 60, max_attempts=2)
+        assert str(job["id"]) == second
+        assert time.monotonic() - start < 1.0  # skipped, not blocked
+    finally:
+        holder.rollback()
+        holder.close()
+
+
+def test_expired_lease_is_reclaimed_and_fences_the_old_owner(db):
+    (job_id,) = enqueue(db)
+    repo.claim(db, "node-a", 0.3, max_attempts=3)
+    assert repo.claim(db, "node-b", 60, max_attempts=3) is None
+
+    time.sleep(0.5)
+    job = repo.claim(db, "node-b", 60, max_attempts=3)
+    assert str(job["id"]) == job_id and job["attempts"] == 2
+
+    # node-a's lease is gone: it can neither renew nor complete the job
+    assert repo.renew(db, job_id, "node-a", 60) is False
+    repo.complete(db, job_id, "node-a", {"copies": 9})
+    assert repo.get(db, job_id)["status"] == "running"
+
+    repo.complete(db, job_id, "node-b", {"copies": 1})
+    assert repo.get(db, job_id)["result"] == {"copies": 1}
+
+
+def test_renewed_lease_is_not_reclaimed(db):
+    (job_id,) = enqueue(db)
+    repo.claim(db, "node-a", 0.3, max_attempts=3)
+    assert repo.renew(db, job_id, "node-a", 60) is True
+
+    time.sleep(0.5)
+    assert repo.claim(db, "node-b", 60, max_attempts=3) is None
+
+
+def test_failed_attempts_retry_until_the_sweep_gives_up(db):
+    (job_id,) = enqueue(db)
+    repo.claim(db, "node-a", 60, max_attempts=2)
+    repo.fail(db, job_id, "node-a", "boom", retry=True)
+    assert repo.get(db, job_id)["status"] == "pending"
+
+    repo.claim(db, "node-a", 0.2, max_attempts=2)
+    time.sleep(0.4)
+    # Lease expired on the last attempt: not claimable again, failed by the sweep
+    assert repo.claim(db, "node-b", 60, max_attempts=2) is None
+    assert repo.sweep(db, max_attempts=2, retention_seconds=3600) == 1
+    assert repo.get(db, job_id)["status"] == "failed"
+
+
+def test_enqueue_and_complete_notify_listeners(db):
+    with psycopg.connect(TEST_DATABASE_URL, autocommit=True) as listener:
+        listener.execute(f"LISTEN {NEW_JOB_CHANNEL}")
+        listener.execute(f"LISTEN {DONE_JOB_CHANNEL}")
+
+        (job_id,) = enqueue(db)
+        repo.claim(db, "node-a", 60, max_attempts=2)
+        repo.complete(db, job_id, "node-a", {"copies": 1})
+
+        received = [(n.channel, n.payload) for n in listener.notifies(timeout=2, stop_after=2)]
+
+    assert received == [(NEW_JOB_CHANNEL, job_id), (DONE_JOB_CHANNEL, job_id)]
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from src.util.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_task():
+    async def main():
+        flight = SingleFlight("test")
+        runs = []
+
+        async def fetch():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+        return results, runs, flight
+
+    results, runs, flight = asyncio.run(main())
+    assert results == ["result"] * 5
+    assert len(runs) == 1
+    assert flight.coalesced == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_one_cancelled_waiter_does_not_cancel_the_others():
+    async def main():
+        flight = SingleFlight("test")
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        first = asyncio.create_task(flight.do("key", fetch))
+        second = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, first
+
+    result, first = asyncio.run(main())
+    assert result == "result"
+    assert first.cancelled()
+
+
+def test_caller_arriving_after_last_waiter_cancelled_gets_a_fresh_call():
+    async def main():
+        flight = SingleFlight("test")
+        started = []
+
+        async def fetch():
+            started.append(1)
+            await asyncio.sleep(0.05)
+            return len(started)
+
+        first = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        # Same loop iteration as the cancellation: the old task's done callback hasn't run yet
+        return await flight.do("key", fetch), started
+
+    result, started = asyncio.run(main())
+    assert result == 2
+    assert len(started) == 2
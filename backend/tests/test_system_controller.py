@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from src.service import library_service
+from src.util import system_controller as sc
+
+
+def test_fast_path_samples_alone_tighten_the_timeout():
+    controller = sc.SystemController("vpl")
+    for _ in range(sc.MIN_LATENCY_SAMPLES):
+        controller._record(True, 0.4)
+
+    assert controller.timeout() == sc.MIN_TIMEOUT
+
+
+def test_browser_samples_keep_their_own_timeout():
+    controller = sc.SystemController("vpl")
+    for _ in range(40):
+        controller._record(True, 0.4, path=sc.HTTP_PATH)
+    controller._record(True, 12.0, path=sc.BROWSER_PATH)
+
+    # Too few browser samples for a p95 yet: the default, not the fast path's minimum
+    assert controller.timeout() == sc.DEFAULT_TIMEOUT
+
+    for _ in range(sc.MIN_LATENCY_SAMPLES):
+        controller._record(True, 12.0, path=sc.BROWSER_PATH)
+    assert controller.timeout() == pytest.approx(12.0 * sc.TIMEOUT_P95_FACTOR)
+
+
+def test_result_scrape_path_picks_the_window():
+    controller = sc.SystemController("vpl")
+
+    async def browser_scrape():
+        return {"record_id": "S38C1", "scrape_path": "browser"}
+
+    asyncio.run(controller.call(browser_scrape))
+
+    assert controller.stats()["latency"]["browser"]["samples"] == 1
+    assert controller.stats()["latency"]["http"]["samples"] == 0
+
+
+def test_timeout_widens_the_next_deadline(monkeypatch):
+    monkeypatch.setattr(sc, "MIN_TIMEOUT", 0.05)
+    controller = sc.SystemController("vpl")
+    for _ in range(sc.MIN_LATENCY_SAMPLES):
+        controller._record(True, 0.01)
+    assert controller.timeout() == 0.05
+
+    async def slow_browser_scrape():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(controller.call(slow_browser_scrape))
+    assert controller.timeout() == sc.DEFAULT_TIMEOUT
+
+
+def test_coalesced_callers_share_one_slot_and_outcome(monkeypatch):
+    controllers = sc.SystemControllers()
+    monkeypatch.setattr(library_service, "system_controllers", controllers)
+    scrapes = []
+
+    async def fake_check(library_id, isbn):
+        scrapes.append(isbn)
+        await asyncio.sleep(0.05)
+        return {"record_id": "S38C1", "scrape_path": "http"}
+
+    monkeypatch.setattr(library_service, "_check_book_availability", fake_check)
+
+    async def main():
+        return await asyncio.gather(*(library_service.controlled_availability("vpl", "9780441013593") for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert len(scrapes) == 1 and all(r["record_id"] == "S38C1" for r in results)
+    stats = controllers.get("vpl").stats()
+    assert stats["samples"] == 1 and stats["in_flight"] == 0
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from src.models.AvailabilityWatch import AvailabilityWatch
+from src.models.User import User
+from src.repository.watch_repository import WatchRepository
+
+PG_TABLES = ["users", "availability_watches", "availability_snapshots", "notification_outbox"]
+
+repo = WatchRepository()
+ISBN = "9780441013593"
+
+
+@pytest.fixture
+def user_id(pg_session):
+    db = pg_session()
+    user = User(email="reader@example.com", password="x")
+    db.add(user)
+    db.commit()
+    yield user.user_id
+    db.close()
+
+
+@pytest.fixture
+def db(pg_session):
+    session = pg_session()
+    yield session
+    session.rollback()
+    session.close()
+
+
+def watches(pg_session):
+    db = pg_session()
+    try:
+        return db.query(AvailabilityWatch).all()
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("branch_name", [None, "Kitsilano"])
+def test_add_is_idempotent(pg_session, db, user_id, branch_name):
+    first = repo.add(db, user_id, ISBN, "vpl", branch_name)
+    again = repo.add(db, user_id, ISBN, "vpl", branch_name)
+
+    assert again.watch_id == first.watch_id
+    assert len(watches(pg_session)) == 1
+
+
+@pytest.mark.parametrize("branch_name", [None, "Kitsilano"])
+def test_concurrent_adds_make_one_watch(pg_session, user_id, branch_name):
+    ids, errors, barrier = [], [], threading.Barrier(6)
+
+    def add():
+        db = pg_session()
+        try:
+            barrier.wait()
+            ids.append(repo.add(db, user_id, ISBN, "vpl", branch_name).watch_id)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=add) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(set(ids)) == 1 and len(watches(pg_session)) == 1
+
+
+def test_database_rejects_duplicate_any_branch_watches(db, user_id):
+    insert = text("INSERT INTO availability_watches (user_id, isbn, library_id) VALUES (:user_id, :isbn, 'vpl')")
+    db.execute(insert, {"user_id": user_id, "isbn": ISBN})
+    with pytest.raises(Exception, match="uq_availability_watches_any_branch"):
+        db.execute(insert, {"user_id": user_id, "isbn": ISBN})
+
+
+def test_any_branch_and_branch_watches_coexist(pg_session, db, user_id):
+    repo.add(db, user_id, ISBN, "vpl", None)
+    repo.add(db, user_id, ISBN, "vpl", "Kitsilano")
+    repo.add(db, user_id, ISBN, "vpl", "Dunbar")
+
+    assert sorted(w.branch_name or "" for w in watches(pg_session)) == ["", "Dunbar", "Kitsilano"]